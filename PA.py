@@ -1,31 +1,17 @@
-import os
-from dotenv import load_dotenv
-import pandas as pd
-import psycopg2 as pg
-import sqlalchemy
 import panel as pn
 
+from busca import BuscaAoVivo, filtro_nome
+from conexao import transacao
+from edicao import EdicaoEmLote
+from exportacao import BotaoExportar
+from fontes import fonte_programas as nova_fonte
+from metricas import cronometrado
+from paginacao import TabelaPaginada
+from repositorio import programas
+from tarefas import em_segundo_plano
+
 # --- Configuração Inicial ---
-load_dotenv()
-pn.extension()
-pn.extension('tabulator')
-pn.extension(notifications=True) # Ativa notificações popup
-
-# --- Conexão com Banco de Dados ---
-DB_HOST = os.getenv('DB_HOST', 'localhost')
-DB_NAME = os.getenv('DB_NAME', 'fbd-conexao')
-DB_USER = os.getenv('DB_USER', 'postgres')
-DB_PASS = os.getenv('DB_PASS', 'root')
-
-# Engine para Leituras (Pandas)
-str_conn = f'postgresql://{DB_USER}:{DB_PASS}@{DB_HOST}/{DB_NAME}'
-engine = sqlalchemy.create_engine(str_conn)
-
-# Conexão para Escritas (Inserir/Atualizar/Deletar)
-try:
-    con = pg.connect(host=DB_HOST, dbname=DB_NAME, user=DB_USER, password=DB_PASS)
-except Exception as e:
-    pn.pane.Alert(f"Erro fatal de conexão: {e}", alert_type='danger').servable()
+pn.extension('tabulator', notifications=True)
 
 # --- Widgets (Campos do Formulário) ---
 
@@ -78,132 +64,145 @@ btn_excluir   = pn.widgets.Button(name='🗑️ Excluir (pelo ID)', button_type=
 
 # --- Funções CRUD ---
 
-def carregar_dados_tabela():
-    """Função auxiliar para recarregar a tabela visualmente"""
-    try:
-        query = "SELECT * FROM Programa_Auxilio ORDER BY Id_programa"
-        df = pd.read_sql_query(query, engine)
-        return pn.widgets.Tabulator(df, pagination='remote', page_size=10, sizing_mode='stretch_width')
-    except Exception as e:
-        return pn.pane.Alert(f'Erro ao carregar tabela: {str(e)}', alert_type='danger')
+# Tabela da sessão (uma só, colunas em fontes.py): as consultas trocam a fonte e as escritas mandam só a linha alterada
+tabela = TabelaPaginada(nova_fonte())
 
-def on_consultar(event=None):
+def fonte_consulta():
     """
     Busca programas. 
     Se ID > 0, busca exata. 
-    Se Nome preenchido, busca parcial (ILIKE).
+    Se Nome preenchido, busca parcial (sem acento), ordenada por relevância.
     Caso contrário, traz tudo.
     """
+    if id_programa.value > 0:
+        fonte = nova_fonte()
+        fonte.filtrar("Id_programa = %(id)s", {'id': id_programa.value})
+    elif nome_prog.value_input:
+        # Usa o índice trigram (ignora acentos) e traz os mais parecidos primeiro
+        condicao, params, relevancia = filtro_nome('Nome_Programa', nome_prog.value_input)
+        fonte = nova_fonte(relevancia)
+        fonte.filtrar(condicao, params)
+    else:
+        fonte = nova_fonte()
+    return fonte
+
+@cronometrado('PA.on_consultar')
+async def on_consultar(event=None):
+    """Mostra na tabela o resultado dos filtros atuais (ver fonte_consulta)."""
     try:
-        query = "SELECT * FROM Programa_Auxilio WHERE 1=1"
-        params = {}
-
-        if id_programa.value > 0:
-            query += " AND Id_programa = %(id)s"
-            params['id'] = id_programa.value
-        elif nome_prog.value_input:
-            query += " AND Nome_Programa ILIKE %(nome)s"
-            params['nome'] = f"%{nome_prog.value_input}%"
-        
-        query += " ORDER BY Id_programa ASC"
-        
-        df = pd.read_sql_query(query, engine, params=params)
-        return pn.widgets.Tabulator(df, pagination='remote', page_size=10, sizing_mode='stretch_width')
-    
+        await tabela.trocar_fonte(fonte_consulta())
     except Exception as e:
         pn.state.notifications.error(f'Erro na consulta: {str(e)}')
-        return pn.pane.Alert(f'Erro: {str(e)}')
 
+def dados_formulario():
+    """Valores dos campos no formato do repositório ({coluna: valor})."""
+    return {
+        'Nome_Programa': nome_prog.value, 'Descricao': descricao.value,
+        'Valor': valor.value, 'Tipo': tipo.value, 'Vagas': vagas.value,
+    }
+
+@cronometrado('PA.on_inserir')
 def on_inserir(event=None):
-    """Insere novo programa. ID é gerado pelo banco."""
+    """Insere novo programa. ID é gerado pelo banco. Devolve a linha para a tabela (ou None)."""
     try:
         if not nome_prog.value:
             pn.state.notifications.warning('O Nome do Programa é obrigatório!')
-            return on_consultar()
-
-        with con.cursor() as cursor:
-            sql = """
-                INSERT INTO Programa_Auxilio (Nome_Programa, Descricao, Valor, Tipo, Vagas)
-                VALUES (%s, %s, %s, %s, %s)
-            """
-            cursor.execute(sql, (nome_prog.value, descricao.value, valor.value, tipo.value, vagas.value))
-            con.commit()
+            return None
+
+        with transacao() as con, con.cursor() as cursor:
+            novo = programas.inserir(cursor, dados_formulario())
+            linha = tabela.fonte.linha(novo['id_programa'], cursor)
         
         pn.state.notifications.success('Programa criado com sucesso!')
-        return carregar_dados_tabela()
+        return linha
     
     except Exception as e:
-        con.rollback()
         pn.state.notifications.error(f'Erro ao inserir: {str(e)}')
-        return on_consultar()
+        return None
 
+@cronometrado('PA.on_atualizar')
 def on_atualizar(event=None):
-    """Atualiza dados baseando-se no ID informado."""
+    """Atualiza dados baseando-se no ID informado. Devolve a linha para a tabela (ou None)."""
     try:
         if id_programa.value <= 0:
             pn.state.notifications.warning('Selecione um ID válido para atualizar.')
-            return on_consultar()
+            return None
 
-        with con.cursor() as cursor:
-            # Verifica existência
-            cursor.execute("SELECT 1 FROM Programa_Auxilio WHERE Id_programa = %s", (id_programa.value,))
-            if not cursor.fetchone():
+        with transacao() as con, con.cursor() as cursor:
+            # UPDATE ... RETURNING: se o ID não existe, não volta linha nenhuma
+            if programas.atualizar(cursor, id_programa.value, dados_formulario()) is None:
                 pn.state.notifications.warning('Programa não encontrado com este ID.')
-                return on_consultar()
-
-            sql = """
-                UPDATE Programa_Auxilio 
-                SET Nome_Programa=%s, Descricao=%s, Valor=%s, Tipo=%s, Vagas=%s
-                WHERE Id_programa=%s
-            """
-            cursor.execute(sql, (nome_prog.value, descricao.value, valor.value, tipo.value, vagas.value, id_programa.value))
-            con.commit()
+                return None
+            linha = tabela.fonte.linha(id_programa.value, cursor)
 
         pn.state.notifications.success(f'Programa {id_programa.value} atualizado!')
-        return carregar_dados_tabela()
+        return linha
 
     except Exception as e:
-        con.rollback()
         pn.state.notifications.error(f'Erro ao atualizar: {str(e)}')
-        return on_consultar()
+        return None
 
+@cronometrado('PA.on_excluir')
 def on_excluir(event=None):
-    """Exclui programa pelo ID."""
+    """Exclui programa pelo ID. Devolve True se excluiu."""
     try:
         if id_programa.value <= 0:
             pn.state.notifications.warning('Selecione um ID válido para excluir.')
-            return on_consultar()
+            return False
 
-        with con.cursor() as cursor:
+        with transacao() as con, con.cursor() as cursor:
             # Tenta excluir
-            sql = "DELETE FROM Programa_Auxilio WHERE Id_programa = %s"
-            cursor.execute(sql, (id_programa.value,))
-            
-            if cursor.rowcount == 0:
+            excluiu = programas.excluir(cursor, id_programa.value) is not None
+            if not excluiu:
                 pn.state.notifications.warning('ID não encontrado.')
             else:
-                con.commit()
                 pn.state.notifications.success('Programa excluído com sucesso!')
 
-        return carregar_dados_tabela()
+        return excluiu
 
     except Exception as e:
-        con.rollback()
         # Captura erro de chave estrangeira (se houver Editais vinculados)
         if 'foreign key' in str(e).lower():
             pn.state.notifications.error('ERRO: Não é possível excluir este Programa pois existem Editais vinculados a ele.')
         else:
             pn.state.notifications.error(f'Erro ao excluir: {str(e)}')
-        return on_consultar()
+        return False
 
 # --- Painel Reativo ---
-def painel_reativo(consultar, inserir, atualizar, excluir):
-    if inserir: return on_inserir()
-    if atualizar: return on_atualizar()
-    if excluir: return on_excluir()
-    return on_consultar()
-
-tabela_resultado = pn.bind(painel_reativo, btn_consultar, btn_inserir, btn_atualizar, btn_excluir)
+# O acesso ao banco roda num thread do executor; o IOLoop segue livre para as outras sessões.
+# Depois de gravar, a tabela recebe só a linha afetada.
+async def clique_inserir(event):
+    linha = await em_segundo_plano(on_inserir)
+    if linha is not None:
+        await tabela.inserir(linha)
+
+async def clique_atualizar(event):
+    pk_id = id_programa.value
+    linha = await em_segundo_plano(on_atualizar)
+    if linha is not None:
+        await tabela.atualizar(pk_id, linha)
+
+async def clique_excluir(event):
+    pk_id = id_programa.value
+    if await em_segundo_plano(on_excluir):
+        await tabela.remover(pk_id)
+
+btn_consultar.on_click(on_consultar)
+btn_inserir.on_click(clique_inserir)
+btn_atualizar.on_click(clique_atualizar)
+btn_excluir.on_click(clique_excluir)
+
+# Com a chave ligada, o filtro por nome é aplicado enquanto o usuário digita (sem o botão Consultar)
+busca_viva = BuscaAoVivo(tabela, [nome_prog], fonte_consulta, nome_metrica='PA.busca_ao_vivo')
+
+# Exporta o que a tabela mostra (filtro e ordenação do cabeçalho), em lotes direto do banco
+exportar = BotaoExportar(lambda: tabela.fonte, 'programas')
+
+# Correções em várias linhas direto na tabela, gravadas num único commit
+edicao = EdicaoEmLote(tabela, programas, {
+    'nome_programa': 'Nome_Programa', 'descricao': 'Descricao',
+    'valor': 'Valor', 'tipo': 'Tipo', 'vagas': 'Vagas',
+})
 
 # --- Layout Final ---
 template = pn.template.FastListTemplate(
@@ -216,14 +215,18 @@ template = pn.template.FastListTemplate(
         tipo,
         pn.Row(valor, vagas),
         pn.layout.Divider(),
-        btn_consultar, btn_inserir, btn_atualizar, btn_excluir
+        btn_consultar, busca_viva, btn_inserir, btn_atualizar, btn_excluir
     ],
     main=[
         pn.pane.Markdown("## Resultados"),
-        tabela_resultado
+        exportar,
+        edicao,
+        tabela
     ],
     accent_base_color="#88d8b0",
     header_background="#88d8b0",
 )
 
-template.servable()
\ No newline at end of file
+# `panel serve PA.py` serve a tela sozinha; em principal.py ela entra como uma das rotas
+if __name__.startswith('bokeh_app_'):
+    template.servable()
@@ -0,0 +1,84 @@
+import pandas as pd
+import panel as pn
+
+import metricas
+from auditoria import auditoria
+from conexao import status_pool
+
+# --- Configuração Inicial ---
+pn.extension('tabulator', notifications=True)
+
+ATUALIZAR_A_CADA_MS = 5000
+
+# --- Widgets ---
+tabela_operacoes = pn.widgets.Tabulator(
+    pd.DataFrame(), show_index=False, disabled=True, sizing_mode='stretch_width',
+    titles={'operacao': 'Operação', 'chamadas': 'Chamadas', 'erros': 'Erros', 'media_ms': 'Média (ms)',
+            'p50_ms': 'p50 (ms)', 'p99_ms': 'p99 (ms)', 'max_ms': 'Máx. (ms)'},
+)
+tabela_comandos = pn.widgets.Tabulator(
+    pd.DataFrame(), show_index=False, disabled=True, sizing_mode='stretch_width',
+    titles={'operacao': 'Operação', 'sql': 'SQL', 'execucoes': 'Execuções', 'erros': 'Erros',
+            'linhas': 'Linhas', 'total_ms': 'Total (ms)', 'media_ms': 'Média (ms)',
+            'p99_ms': 'p99 (ms)', 'max_ms': 'Máx. (ms)'},
+    widths={'sql': 500},
+)
+limite = pn.widgets.IntInput(name='Comandos exibidos', value=20, start=5, end=metricas.MAX_COMANDOS, step=5)
+info_pool = pn.pane.Markdown(margin=(5, 10))
+btn_atualizar = pn.widgets.Button(name='🔄 Atualizar', button_type='primary')
+btn_zerar = pn.widgets.Button(name='🧹 Zerar métricas', button_type='danger')
+# Zerar apaga os contadores de todos (inclusive do Prometheus): pede o token de metricas.py
+token = pn.widgets.PasswordInput(name='Token das métricas', placeholder='BOLSAS_TOKEN_METRICAS')
+
+
+def atualizar(event=None):
+    # Só lê os histogramas em memória: não vai ao banco
+    tabela_operacoes.value = metricas.operacoes()
+    tabela_comandos.value = metricas.comandos_mais_lentos(limite.value)
+    info_pool.object = '\n\n'.join(
+        [f"**Pool {nome}:** {status}" for nome, status in status_pool().items()]
+        + [f"**Auditoria:** {auditoria.pendentes()} na fila, {auditoria.descartados} descartados"]
+    )
+
+def zerar(event=None):
+    if not metricas.token_valido(token.value):
+        pn.state.notifications.error('Token inválido: as métricas não foram zeradas.')
+        return
+    token.value = ''
+    metricas.registro.limpar()
+    atualizar()
+    pn.state.notifications.info('Métricas zeradas.')
+
+btn_atualizar.on_click(atualizar)
+btn_zerar.on_click(zerar)
+limite.param.watch(atualizar, 'value')
+pn.state.onload(atualizar)
+pn.state.onload(lambda: pn.state.add_periodic_callback(atualizar, period=ATUALIZAR_A_CADA_MS))
+
+# --- Layout ---
+template = pn.template.FastListTemplate(
+    title='⏱️ Desempenho',
+    sidebar=[
+        pn.pane.Markdown("### Métricas do processo"),
+        pn.pane.Markdown(f"Atualiza a cada {ATUALIZAR_A_CADA_MS // 1000} s. "
+                         "Para o Prometheus: /metricas, com o token."),
+        limite,
+        btn_atualizar,
+        token,
+        btn_zerar,
+        pn.layout.Divider(),
+        info_pool,
+    ],
+    main=[
+        pn.pane.Markdown("### Operações (callbacks das telas)"),
+        tabela_operacoes,
+        pn.pane.Markdown("### Comandos SQL de maior tempo total"),
+        tabela_comandos,
+    ],
+    accent_base_color="#3F51B5",
+    header_background="#3F51B5",
+)
+
+# `panel serve admin.py` serve a tela sozinha; em principal.py ela entra como uma das rotas
+if __name__.startswith('bokeh_app_'):
+    template.servable()
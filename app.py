@@ -1,28 +1,17 @@
-import os
-from dotenv import load_dotenv
-import pandas as pd
-import psycopg2 as pg
-import sqlalchemy
 import panel as pn
 
-# Carrega configurações
-load_dotenv()
-pn.extension()
-pn.extension('tabulator')
-pn.extension(notifications=True)
-
-# --- Configuração do Banco de Dados ---
-DB_HOST = os.getenv('DB_HOST', 'localhost')
-DB_NAME = os.getenv('DB_NAME', 'fbd-conexao') # Ajuste para seu banco
-DB_USER = os.getenv('DB_USER', 'postgres')
-DB_PASS = os.getenv('DB_PASS', 'root')
-
-# Conexão para Transações (INSERT, UPDATE, DELETE)
-con = pg.connect(host=DB_HOST, dbname=DB_NAME, user=DB_USER, password=DB_PASS)
+from busca import BuscaAoVivo, filtro_nome
+from conexao import transacao
+from edicao import EdicaoEmLote
+from exportacao import BotaoExportar
+from fontes import fonte_usuarios as nova_fonte
+from metricas import cronometrado
+from paginacao import TabelaPaginada
+from repositorio import usuarios
+from tarefas import em_segundo_plano
 
-# Conexão para Consultas (Pandas/SQLAlchemy)
-str_conn = f'postgresql://{DB_USER}:{DB_PASS}@{DB_HOST}/{DB_NAME}'
-engine = sqlalchemy.create_engine(str_conn)
+# Carrega configurações
+pn.extension('tabulator', notifications=True)
 
 # --- Widgets (Campos de Entrada) ---
 # ID é usado apenas para Atualizar/Excluir/Buscar Específico
@@ -43,130 +32,144 @@ btn_excluir   = pn.widgets.Button(name='🗑️ Excluir (pelo ID)', button_type=
 
 # --- Funções do CRUD ---
 
-def carregar_todos():
-    """Busca todos os usuários para recarregar a tabela."""
-    try:
-        # Ordenamos por ID para manter a tabela organizada
-        df = pd.read_sql_query("SELECT * FROM Usuario ORDER BY Id_usuario", engine)
-        return pn.widgets.Tabulator(df, pagination='remote', page_size=10, sizing_mode='stretch_width')
-    except Exception as e:
-        return pn.pane.Alert(f'Erro ao carregar dados: {str(e)}', alert_type='danger')
+# Tabela da sessão (uma só, colunas em fontes.py): as consultas trocam a fonte e as escritas mandam só a linha alterada
+tabela = TabelaPaginada(nova_fonte())
 
-def on_consultar(event=None):
+def fonte_consulta():
     """
     Busca dinâmica:
     - Se ID > 0 informado: Busca pelo ID.
-    - Se Nome preenchido: Busca por parte do nome (ILIKE).
+    - Se Nome preenchido: Busca por parte do nome (sem acento), ordenada por relevância.
     - Se vazio: Busca tudo.
     """
+    if id_usuario.value > 0:
+        fonte = nova_fonte()
+        fonte.filtrar("Id_usuario = %(id)s", {'id': id_usuario.value})
+    elif nome.value_input:
+        # Usa o índice trigram (ignora acentos) e traz os mais parecidos primeiro
+        condicao, params, relevancia = filtro_nome('Nome', nome.value_input)
+        fonte = nova_fonte(relevancia)
+        fonte.filtrar(condicao, params)
+    else:
+        fonte = nova_fonte()
+    return fonte
+
+@cronometrado('app.on_consultar')
+async def on_consultar(event=None):
+    """Mostra na tabela o resultado dos filtros atuais (ver fonte_consulta)."""
     try:
-        query = "SELECT * FROM Usuario WHERE 1=1"
-        params = {}
-        
-        if id_usuario.value > 0:
-            query += " AND Id_usuario = %(id)s"
-            params['id'] = id_usuario.value
-        elif nome.value_input:
-            query += " AND Nome ILIKE %(nome)s"
-            params['nome'] = f"%{nome.value_input}%"
-            
-        query += " ORDER BY Id_usuario"
-        
-        df = pd.read_sql_query(query, engine, params=params)
-        return pn.widgets.Tabulator(df, pagination='remote', page_size=10, sizing_mode='stretch_width')
+        await tabela.trocar_fonte(fonte_consulta())
     except Exception as e:
-        return pn.pane.Alert(f'Erro na consulta: {str(e)}', alert_type='danger')
+        pn.state.notifications.error(f'Erro na consulta: {str(e)}')
+
+def dados_formulario():
+    """Valores dos campos no formato do repositório ({coluna: valor})."""
+    return {
+        'CPF': cpf.value, 'Nome': nome.value, 'Email': email.value, 'Senha': senha.value,
+        'Endereco': endereco.value, 'Telefone': telefone.value,
+    }
 
+@cronometrado('app.on_inserir')
 def on_inserir(event=None):
-    """Insere novo usuário. O ID é gerado automaticamente (SERIAL)."""
+    """Insere novo usuário. O ID é gerado automaticamente (SERIAL). Devolve a linha para a tabela (ou None)."""
     try:
         if not cpf.value or not nome.value or not email.value or not senha.value:
             pn.state.notifications.warning('Preencha CPF, Nome, Email e Senha!')
-            return on_consultar()
-
-        with con.cursor() as cursor:
-            sql = """
-                INSERT INTO Usuario (CPF, Nome, Email, Senha, Endereco, Telefone)
-                VALUES (%s, %s, %s, %s, %s, %s)
-            """
-            cursor.execute(sql, (cpf.value, nome.value, email.value, senha.value, endereco.value, telefone.value))
-            con.commit()
+            return None
+
+        with transacao() as con, con.cursor() as cursor:
+            novo = usuarios.inserir(cursor, dados_formulario())
+            linha = tabela.fonte.linha(novo['id_usuario'], cursor)
         
         pn.state.notifications.success('Usuário inserido com sucesso!')
-        return carregar_todos()
+        return linha
     except Exception as e:
-        con.rollback()
         pn.state.notifications.error(f'Erro ao inserir: {str(e)}')
-        return on_consultar()
+        return None
 
+@cronometrado('app.on_atualizar')
 def on_atualizar(event=None):
-    """Atualiza os dados do usuário baseado no ID informado no widget."""
+    """Atualiza os dados do usuário baseado no ID informado no widget. Devolve a linha para a tabela (ou None)."""
     try:
         if id_usuario.value <= 0:
             pn.state.notifications.warning('Informe um ID válido para atualizar!')
-            return on_consultar()
+            return None
 
-        with con.cursor() as cursor:
-            # Verifica se o ID existe antes
-            cursor.execute("SELECT 1 FROM Usuario WHERE Id_usuario = %s", (id_usuario.value,))
-            if not cursor.fetchone():
+        with transacao() as con, con.cursor() as cursor:
+            # UPDATE ... RETURNING: se o ID não existe, não volta linha nenhuma
+            if usuarios.atualizar(cursor, id_usuario.value, dados_formulario()) is None:
                 pn.state.notifications.warning('ID não encontrado.')
-                return on_consultar()
-
-            sql = """
-                UPDATE Usuario 
-                SET CPF=%s, Nome=%s, Email=%s, Senha=%s, Endereco=%s, Telefone=%s
-                WHERE Id_usuario=%s
-            """
-            cursor.execute(sql, (cpf.value, nome.value, email.value, senha.value, endereco.value, telefone.value, id_usuario.value))
-            con.commit()
+                return None
+            linha = tabela.fonte.linha(id_usuario.value, cursor)
 
         pn.state.notifications.success(f'Usuário ID {id_usuario.value} atualizado!')
-        return carregar_todos()
+        return linha
     except Exception as e:
-        con.rollback()
         pn.state.notifications.error(f'Erro ao atualizar: {str(e)}')
-        return on_consultar()
+        return None
 
+@cronometrado('app.on_excluir')
 def on_excluir(event=None):
-    """Exclui o usuário baseado no ID informado."""
+    """Exclui o usuário baseado no ID informado. Devolve True se excluiu."""
     try:
         if id_usuario.value <= 0:
             pn.state.notifications.warning('Informe um ID válido para excluir!')
-            return on_consultar()
+            return False
 
-        with con.cursor() as cursor:
+        with transacao() as con, con.cursor() as cursor:
             # Atenção: Isso pode falhar se o usuário tiver vínculos (FK) com Estudante/Servidor
             # Idealmente, tratar a constraint exception
-            sql = "DELETE FROM Usuario WHERE Id_usuario = %s"
-            cursor.execute(sql, (id_usuario.value,))
-            
-            if cursor.rowcount == 0:
+            excluiu = usuarios.excluir(cursor, id_usuario.value) is not None
+            if not excluiu:
                 pn.state.notifications.warning('ID não encontrado para exclusão.')
             else:
-                con.commit()
                 pn.state.notifications.success('Usuário excluído com sucesso!')
 
-        return carregar_todos()
+        return excluiu
     except Exception as e:
-        con.rollback()
         # Tratamento simples para erro de chave estrangeira
         if 'foreign key constraint' in str(e).lower():
              pn.state.notifications.error('Não é possível excluir: Usuário possui vínculos (Estudante/Servidor).')
         else:
             pn.state.notifications.error(f'Erro ao excluir: {str(e)}')
-        return on_consultar()
+        return False
 
 # --- Binding (Lógica dos Botões) ---
-def painel_reativo(consultar, inserir, atualizar, excluir):
-    # A lógica aqui identifica qual botão foi clicado baseando-se no 'watch' do Panel
-    # Mas para simplificar e garantir retorno visual:
-    if inserir: return on_inserir()
-    if atualizar: return on_atualizar()
-    if excluir: return on_excluir()
-    return on_consultar() # Padrão ou botão consultar
-
-tabela_resultado = pn.bind(painel_reativo, btn_consultar, btn_inserir, btn_atualizar, btn_excluir)
+# O acesso ao banco roda num thread do executor; o IOLoop segue livre para as outras sessões.
+# Depois de gravar, a tabela recebe só a linha afetada.
+async def clique_inserir(event):
+    linha = await em_segundo_plano(on_inserir)
+    if linha is not None:
+        await tabela.inserir(linha)
+
+async def clique_atualizar(event):
+    pk_id = id_usuario.value
+    linha = await em_segundo_plano(on_atualizar)
+    if linha is not None:
+        await tabela.atualizar(pk_id, linha)
+
+async def clique_excluir(event):
+    pk_id = id_usuario.value
+    if await em_segundo_plano(on_excluir):
+        await tabela.remover(pk_id)
+
+btn_consultar.on_click(on_consultar)
+btn_inserir.on_click(clique_inserir)
+btn_atualizar.on_click(clique_atualizar)
+btn_excluir.on_click(clique_excluir)
+
+# Com a chave ligada, o filtro por nome é aplicado enquanto o usuário digita (sem o botão Consultar)
+busca_viva = BuscaAoVivo(tabela, [nome], fonte_consulta, nome_metrica='app.busca_ao_vivo')
+
+# Exporta o que a tabela mostra (filtro e ordenação do cabeçalho), em lotes direto do banco
+exportar = BotaoExportar(lambda: tabela.fonte, 'usuarios')
+
+# Correções em várias linhas direto na tabela, gravadas num único commit.
+# Sem linha nova: Senha (NOT NULL) não vai para a tabela; usuário novo entra pelo formulário.
+edicao = EdicaoEmLote(tabela, usuarios, {
+    'cpf': 'CPF', 'nome': 'Nome', 'email': 'Email',
+    'endereco': 'Endereco', 'telefone': 'Telefone',
+}, inserir=False)
 
 # --- Layout ---
 layout = pn.Row(
@@ -183,14 +186,19 @@ layout = pn.Row(
         telefone,
         pn.layout.Divider(),
         pn.Row(btn_consultar, btn_inserir),
+        busca_viva,
         pn.Row(btn_atualizar, btn_excluir),
         width=400
     ),
     pn.Column(
         pn.pane.Markdown("### 📋 Lista de Usuários"),
-        tabela_resultado,
+        exportar,
+        edicao,
+        tabela,
         sizing_mode='stretch_width'
     )
 )
 
-layout.servable()
\ No newline at end of file
+# `panel serve app.py` serve a tela sozinha; em principal.py ela entra como uma das rotas
+if __name__.startswith('bokeh_app_'):
+    layout.servable()
@@ -0,0 +1,151 @@
+import atexit
+import csv
+import datetime
+import io
+import json
+import logging
+import queue
+import threading
+
+import panel as pn
+
+from conexao import apos_commit, transacao
+from metricas import operacao_atual
+
+# Trilha de auditoria das escritas (migracoes/0008_auditoria.sql).
+# O Repositorio já recebe as imagens da linha no próprio comando de escrita (RETURNING com
+# to_jsonb da linha antes/depois), então auditar não custa nenhuma ida extra ao banco.
+# Depois do commit (conexao.apos_commit) cada registro entra numa fila em memória; um thread
+# em segundo plano junta o que chegou e grava em lote, com COPY, na tabela Auditoria
+# (só aceita INSERT). Escrita desfeita (rollback) não é auditada.
+#
+# - Se o banco estiver fora, o lote fica retido e é tentado de novo; ao encerrar o processo
+#   o que estiver na fila é gravado (atexit).
+# - Fila cheia (banco fora por muito tempo): o registro é descartado e contado em `descartados`,
+#   com um erro no log. A escrita do usuário nunca espera pela auditoria.
+
+TAMANHO_LOTE = 1000        # registros por COPY
+ESPERA_AGRUPAR = 1.0       # segundos juntando registros antes de gravar
+ESPERA_RECONEXAO = 5       # segundos entre tentativas quando a gravação falha
+MAX_FILA = 100_000
+
+# Colunas que nunca vão para as imagens (o Repositorio as remove já no SQL)
+COLUNAS_OCULTAS = ('senha',)
+
+COLUNAS = ('Momento', 'Tabela', 'Operacao', 'Chave', 'Antes', 'Depois', 'Usuario', 'Origem')
+
+log = logging.getLogger(__name__)
+
+
+def imagem(linha):
+    """Expressão SQL com a linha `linha` (nome ou apelido da tabela) em JSON, sem COLUNAS_OCULTAS."""
+    return f"(to_jsonb({linha}) - '{{{','.join(COLUNAS_OCULTAS)}}}'::text[])::text"
+
+
+class Auditoria:
+    """Fila de registros e o thread que os grava em lote."""
+
+    def __init__(self):
+        self._fila = queue.Queue(maxsize=MAX_FILA)
+        self._lock = threading.Lock()
+        self._thread = None
+        self._parar = threading.Event()
+        self._lote = []  # retirado da fila e ainda não gravado
+        self.descartados = 0
+
+    def registrar(self, tabela, operacao, chave, antes=None, depois=None):
+        """
+        Audita uma linha gravada: `antes`/`depois` são o JSON (texto) das imagens, `chave` o dict
+        da chave primária. Dentro de transacao() só entra na fila depois do commit.
+        """
+        registro = (
+            datetime.datetime.now(datetime.timezone.utc), tabela, operacao,
+            json.dumps(chave, default=str), antes, depois, pn.state.user, operacao_atual.get(),
+        )
+        if not apos_commit(lambda: self._enfileirar(registro)):
+            # Cursor fora de transacao() (ex: benchmark, sempre desfeito): sem commit, sem auditoria
+            log.debug('Escrita em %s fora de transacao(): não auditada', tabela)
+
+    def _enfileirar(self, registro):
+        self.iniciar()
+        try:
+            self._fila.put_nowait(registro)
+        except queue.Full:
+            self.descartados += 1
+            log.error('Fila da auditoria cheia: registro de %s descartado', registro[1])
+
+    # --- Gravação ---
+
+    def iniciar(self):
+        """Sobe o thread de gravação (uma vez por processo)."""
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._laco, name='bolsas-auditoria', daemon=True)
+                self._thread.start()
+                atexit.register(self.encerrar)
+
+    def _retirar(self, lote):
+        """Completa `lote` com o que houver na fila, até TAMANHO_LOTE."""
+        while len(lote) < TAMANHO_LOTE:
+            try:
+                lote.append(self._fila.get_nowait())
+            except queue.Empty:
+                break
+
+    def _laco(self):
+        lote = self._lote
+        while not self._parar.is_set():
+            if not lote:
+                try:
+                    lote.append(self._fila.get(timeout=ESPERA_AGRUPAR))
+                except queue.Empty:
+                    continue
+                # Junta a rajada (ex: edição em lote) num COPY só
+                self._parar.wait(ESPERA_AGRUPAR)
+            self._retirar(lote)
+            try:
+                gravar(lote)
+            except Exception as e:
+                log.warning('Falha ao gravar %d registros de auditoria (nova tentativa em %ss): %s',
+                            len(lote), ESPERA_RECONEXAO, e)
+                self._parar.wait(ESPERA_RECONEXAO)
+                continue
+            lote.clear()
+
+    def encerrar(self, espera=10.0):
+        """Para o thread e grava o que ainda estiver na fila (chamado no atexit)."""
+        if self._thread is None:
+            return
+        self._parar.set()
+        self._thread.join(espera)
+        if self._thread.is_alive():
+            # Ainda preso numa gravação: gravar o mesmo lote aqui o duplicaria
+            log.error('Auditoria: thread não terminou; %d registros na fila não gravados', self._fila.qsize())
+            return
+        lote = self._lote
+        while True:
+            self._retirar(lote)
+            if not lote:
+                break
+            try:
+                gravar(lote)
+            except Exception as e:
+                log.error('Auditoria: %d registros não gravados ao encerrar: %s',
+                          len(lote) + self._fila.qsize(), e)
+                break
+            lote.clear()
+
+    def pendentes(self):
+        return self._fila.qsize()
+
+
+def gravar(registros):
+    """COPY dos registros para Auditoria, numa transação."""
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(registros)
+    buffer.seek(0)
+    with transacao() as con, con.cursor() as cursor:
+        cursor.copy_expert(f"COPY Auditoria ({', '.join(COLUNAS)}) FROM STDIN WITH (FORMAT csv)", buffer)
+
+
+auditoria = Auditoria()
@@ -0,0 +1,313 @@
+import argparse
+import datetime
+import json
+import os
+import platform
+import time
+
+import numpy as np
+import pandas as pd
+
+import folha
+import indicadores
+import selecao
+from busca import buscar_estudantes, buscar_inscricoes, buscar_servidores, buscar_usuarios, filtro_nome
+from cache import invalidar_tabelas
+from conexao import engine, engine_leitura
+from fontes import fonte_bolsistas, fonte_editais, fonte_programas, fonte_usuarios
+from repositorio import bolsistas, pagamentos, usuarios
+
+# Benchmark das consultas e escritas de cada tela, para rodar contra um banco gerado com
+# gerar_dados.py. Cada cenário roda algumas vezes para aquecer e depois N vezes medindo;
+# o resultado (p50/p99/média em ms) vai para um JSON em resultados_benchmark/.
+# As escritas rodam numa transação desfeita ao fim de cada repetição (o banco não muda).
+# Os caches de leitura são esvaziados antes de cada repetição: mede-se o caminho até o banco.
+#
+# As fontes paginadas são as mesmas das telas (fontes.py); os filtros de cada cenário reproduzem
+# os de fonte_consulta da tela correspondente.
+#
+# Uso:
+#   python benchmark.py [--repeticoes 50] [--filtro usuarios] [--comparar resultados_benchmark/anterior.json]
+# Com --comparar, cenários com p50 acima de (1 + tolerância) vezes o anterior são listados
+# como regressão e o processo termina com código 1.
+
+PASTA_RESULTADOS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'resultados_benchmark')
+AQUECIMENTO = 3
+TOLERANCIA = 0.2  # 20% acima do p50 anterior conta como regressão
+TERMO_NOME = 'silva'
+LINHAS_LOTE = 100
+
+# nome -> (função, escrita?). Funções de escrita recebem o cursor da transação desfeita.
+CENARIOS = {}
+
+# Valores reais do banco usados pelos cenários (preenchido por preparar())
+amostra = {}
+
+
+def cenario(nome, escrita=False):
+    def registrar(funcao):
+        CENARIOS[nome] = (funcao, escrita)
+        return funcao
+    return registrar
+
+
+def preparar():
+    """Busca no banco os IDs usados pelos cenários (linhas que existem em qualquer escala)."""
+    with engine_leitura.connect() as con:
+        def valor(sql):
+            return con.exec_driver_sql(sql).scalar()
+        amostra['usuario'] = valor("SELECT Id_usuario FROM Usuario ORDER BY Id_usuario DESC LIMIT 1")
+        amostra['usuarios'] = [r[0] for r in con.exec_driver_sql(
+            f"SELECT Id_usuario FROM Usuario ORDER BY Id_usuario DESC LIMIT {LINHAS_LOTE}")]
+        amostra['bolsista'] = valor("SELECT Id_inscricao FROM Bolsista ORDER BY Id_inscricao DESC LIMIT 1")
+        amostra['inscricoes'] = [r[0] for r in con.exec_driver_sql(
+            f"SELECT Id_inscricao FROM Inscricao ORDER BY Id_inscricao DESC LIMIT {LINHAS_LOTE}")]
+        # Edital com mais inscrições: o pior caso da seleção
+        amostra['edital'] = valor(
+            "SELECT Id_edital FROM Inscricao GROUP BY Id_edital ORDER BY count(*) DESC LIMIT 1")
+        amostra['linhas'] = {
+            tabela: valor(f"SELECT count(*) FROM {tabela}")
+            for tabela in ('Usuario', 'Estudante', 'Edital', 'Inscricao', 'Bolsista', 'Pagamento')
+        }
+    hoje = datetime.date.today()
+    amostra['competencia'] = (hoje.year, hoje.month)
+
+
+# --- Leituras ---
+
+@cenario('usuarios.pagina_1')
+def _():
+    fonte_usuarios().pagina(1)
+
+@cenario('usuarios.pagina_meio')
+def _():
+    # Sem marcador da página anterior: cai no OFFSET (pior caso de um salto pelo número)
+    fonte = fonte_usuarios()
+    fonte.pagina(fonte.total_paginas() // 2)
+
+@cenario('usuarios.pagina_ultima')
+def _():
+    fonte = fonte_usuarios()
+    fonte.pagina(fonte.total_paginas())
+
+@cenario('usuarios.pagina_seguinte')
+def _():
+    fonte = fonte_usuarios()
+    fonte.pagina(1)
+    fonte.pagina(2)
+
+@cenario('usuarios.contagem')
+def _():
+    fonte = fonte_usuarios()
+    fonte.descartar_contagem()
+    fonte.total()
+
+@cenario('usuarios.consulta_nome')
+def _():
+    condicao, params, relevancia = filtro_nome('Nome', TERMO_NOME)
+    fonte = fonte_usuarios(relevancia)
+    fonte.filtrar(condicao, params)
+    fonte.descartar_contagem()
+    fonte.pagina(1)
+
+@cenario('programas.pagina_1')
+def _():
+    fonte_programas().pagina(1)
+
+@cenario('programas.lista_dropdown')
+def _():
+    # Mesmo SELECT de get_lista_programas (ed.py), sem o cache do catálogo
+    df = pd.read_sql("SELECT Id_programa, Nome_Programa FROM Programa_Auxilio", engine_leitura)
+    dict(zip(df['nome_programa'] + ' (ID: ' + df['id_programa'].astype(str) + ')', df['id_programa']))
+
+@cenario('editais.pagina_1')
+def _():
+    fonte_editais().pagina(1)
+
+@cenario('editais.consulta_status')
+def _():
+    fonte = fonte_editais()
+    fonte.filtrar("E.Status = %(status)s", {'status': 'Aberto'})
+    fonte.descartar_contagem()
+    fonte.pagina(1)
+
+@cenario('bolsistas.pagina_1')
+def _():
+    fonte_bolsistas().pagina(1)
+
+@cenario('bolsistas.contagem')
+def _():
+    fonte = fonte_bolsistas()
+    fonte.descartar_contagem()
+    fonte.total()
+
+@cenario('busca.usuarios')
+def _():
+    buscar_usuarios(TERMO_NOME)
+
+@cenario('busca.estudantes')
+def _():
+    buscar_estudantes(TERMO_NOME)
+
+@cenario('busca.servidores')
+def _():
+    buscar_servidores(TERMO_NOME)
+
+@cenario('busca.inscricoes_nome')
+def _():
+    buscar_inscricoes(TERMO_NOME)
+
+@cenario('busca.inscricoes_id')
+def _():
+    buscar_inscricoes(str(amostra['inscricoes'][0]))
+
+@cenario('indicadores.resumo_programas')
+def _():
+    indicadores._resumo_programas()
+
+@cenario('indicadores.pagamentos_mes')
+def _():
+    indicadores._pagamentos_mes()
+
+@cenario('folha.simular')
+def _():
+    folha.gerar_folha(*amostra['competencia'], simular=True)
+
+@cenario('selecao.simular')
+def _():
+    selecao.selecionar(amostra['edital'], simular=True)
+
+
+# --- Escritas (desfeitas) ---
+
+@cenario('usuarios.inserir', escrita=True)
+def _(cursor):
+    usuarios.inserir(cursor, {
+        'CPF': 'BENCH-00001', 'Nome': 'Benchmark', 'Email': 'benchmark@exemplo.edu.br',
+        'Senha': 'x', 'Endereco': '', 'Telefone': '',
+    })
+
+@cenario('usuarios.atualizar', escrita=True)
+def _(cursor):
+    usuarios.atualizar(cursor, amostra['usuario'], {'Endereco': 'Rua do Benchmark, 1'})
+
+@cenario('usuarios.lote_atualizar', escrita=True)
+def _(cursor):
+    usuarios.aplicar_lote(cursor, atualizar={i: {'Endereco': 'Rua do Benchmark, 1'} for i in amostra['usuarios']})
+
+@cenario('bolsistas.atualizar', escrita=True)
+def _(cursor):
+    # Inclui o gatilho que atualiza Quadro_Bolsista
+    bolsistas.atualizar(cursor, amostra['bolsista'], {'Frequencia': 'Semestral'})
+
+@cenario('pagamentos.inserir_varios', escrita=True)
+def _(cursor):
+    pagamentos.inserir_varios(cursor, [
+        # Partição do ano corrente, como a folha; a folha e o gerador pagam no dia 5, sem conflito
+        {'Valor_pago': 1, 'Data_Pagamento': datetime.date.today().replace(day=1), 'Id_inscricao': i}
+        for i in amostra['inscricoes']
+    ])
+
+
+# --- Execução ---
+
+def medir(funcao, escrita, repeticoes):
+    """Tempos (ms) de `repeticoes` execuções, depois de AQUECIMENTO execuções descartadas."""
+    tempos = []
+    con = engine.raw_connection() if escrita else None
+    try:
+        for i in range(AQUECIMENTO + repeticoes):
+            invalidar_tabelas()
+            inicio = time.perf_counter()
+            if escrita:
+                with con.cursor() as cursor:
+                    funcao(cursor)
+            else:
+                funcao()
+            decorrido = (time.perf_counter() - inicio) * 1000
+            if escrita:
+                con.rollback()
+            if i >= AQUECIMENTO:
+                tempos.append(decorrido)
+    finally:
+        if con is not None:
+            con.rollback()
+            con.close()
+    return np.array(tempos)
+
+
+def executar(repeticoes, filtro=None):
+    resultados = {}
+    for nome, (funcao, escrita) in CENARIOS.items():
+        if filtro and filtro not in nome:
+            continue
+        try:
+            tempos = medir(funcao, escrita, repeticoes)
+        except Exception as e:
+            print(f"{nome:32} ERRO: {e}")
+            resultados[nome] = {'erro': str(e)}
+            continue
+        resultados[nome] = {
+            'p50': round(float(np.percentile(tempos, 50)), 3),
+            'p99': round(float(np.percentile(tempos, 99)), 3),
+            'media': round(float(tempos.mean()), 3),
+            'n': len(tempos),
+        }
+        print(f"{nome:32} p50 {resultados[nome]['p50']:9.2f} ms   p99 {resultados[nome]['p99']:9.2f} ms")
+    return resultados
+
+
+def salvar(resultados, repeticoes):
+    os.makedirs(PASTA_RESULTADOS, exist_ok=True)
+    agora = datetime.datetime.now()
+    caminho = os.path.join(PASTA_RESULTADOS, f"{agora:%Y%m%d-%H%M%S}.json")
+    with open(caminho, 'w', encoding='utf-8') as f:
+        json.dump({
+            'data': agora.isoformat(timespec='seconds'),
+            'maquina': platform.node(),
+            'linhas': amostra['linhas'],
+            'repeticoes': repeticoes,
+            'cenarios': resultados,
+        }, f, indent=2, ensure_ascii=False)
+    return caminho
+
+
+def comparar(resultados, caminho_anterior, tolerancia=TOLERANCIA):
+    """Imprime a variação de p50 por cenário e devolve os nomes dos que pioraram além da tolerância."""
+    with open(caminho_anterior, encoding='utf-8') as f:
+        anterior = json.load(f)
+    if anterior.get('linhas') != amostra['linhas']:
+        print(f"Atenção: volumes diferentes ({anterior.get('linhas')} -> {amostra['linhas']})")
+    regressoes = []
+    for nome, atual in resultados.items():
+        antes = anterior['cenarios'].get(nome)
+        if not antes or 'p50' not in antes or 'p50' not in atual:
+            continue
+        razao = atual['p50'] / antes['p50'] if antes['p50'] else 1.0
+        marca = ''
+        if razao > 1 + tolerancia:
+            regressoes.append(nome)
+            marca = '  <-- REGRESSÃO'
+        print(f"{nome:32} {antes['p50']:9.2f} -> {atual['p50']:9.2f} ms ({razao - 1:+.0%}){marca}")
+    return regressoes
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Mede as consultas e escritas das telas (p50/p99)')
+    parser.add_argument('--repeticoes', type=int, default=50, help='execuções medidas por cenário')
+    parser.add_argument('--filtro', help='roda só os cenários cujo nome contém o texto')
+    parser.add_argument('--comparar', help='JSON de uma execução anterior para comparar')
+    parser.add_argument('--tolerancia', type=float, default=TOLERANCIA,
+                        help='piora do p50 aceita antes de acusar regressão (0.2 = 20%%)')
+    args = parser.parse_args()
+
+    preparar()
+    print("Linhas: " + ', '.join(f"{t} {n:,}" for t, n in amostra['linhas'].items()))
+    resultados = executar(args.repeticoes, args.filtro)
+    print(f"Resultado salvo em {salvar(resultados, args.repeticoes)}")
+
+    if args.comparar:
+        regressoes = comparar(resultados, args.comparar, args.tolerancia)
+        if regressoes:
+            print(f"{len(regressoes)} cenário(s) com regressão: {', '.join(regressoes)}")
+            raise SystemExit(1)
@@ -1,79 +1,26 @@
-import os
-from dotenv import load_dotenv
-import pandas as pd
-import psycopg2 as pg
-import sqlalchemy
 import panel as pn
 import datetime
 
-# --- Configurações Iniciais ---
-load_dotenv()
-pn.extension()
-pn.extension('tabulator')
-pn.extension(notifications=True)
-
-# --- Conexão Banco de Dados ---
-DB_HOST = os.getenv('DB_HOST', 'localhost')
-DB_NAME = os.getenv('DB_NAME', 'fbd-conexao')
-DB_USER = os.getenv('DB_USER', 'postgres')
-DB_PASS = os.getenv('DB_PASS', 'root')
-
-str_conn = f'postgresql://{DB_USER}:{DB_PASS}@{DB_HOST}/{DB_NAME}'
-engine = sqlalchemy.create_engine(str_conn)
-
-try:
-    con = pg.connect(host=DB_HOST, dbname=DB_NAME, user=DB_USER, password=DB_PASS)
-except Exception as e:
-    pn.pane.Alert(f"Erro de conexão: {e}", alert_type='danger').servable()
-
-# --- Funções Auxiliares (Preencher Dropdowns) ---
+from conexao import transacao
+from exportacao import BotaoExportar
+from busca import SeletorBusca, buscar_estudantes, buscar_inscricoes, buscar_servidores
+from fontes import fonte_bolsistas as nova_fonte
+from metricas import cronometrado
+from paginacao import TabelaPaginada
+from repositorio import bolsistas
+from tarefas import em_segundo_plano
 
-def get_inscricoes_disponiveis():
-    """Busca inscrições para vincular. Mostra ID e Nome do Aluno."""
-    try:
-        sql = """
-            SELECT I.Id_inscricao, U.Nome 
-            FROM Inscricao I
-            JOIN Estudante E ON I.Id_Estudante = E.Id_Estudante
-            JOIN Usuario U ON E.Id_Estudante = U.Id_usuario
-        """
-        df = pd.read_sql(sql, engine)
-        return {f"Inscrição #{row['id_inscricao']} - {row['nome']}": row['id_inscricao'] for _, row in df.iterrows()}
-    except:
-        return {}
-
-def get_servidores():
-    """Busca lista de servidores (orientadores)."""
-    try:
-        sql = """
-            SELECT S.Id_Servidor, U.Nome, S.Cargo 
-            FROM Servidor S
-            JOIN Usuario U ON S.Id_Servidor = U.Id_usuario
-        """
-        df = pd.read_sql(sql, engine)
-        return {f"{row['nome']} ({row['cargo']})": row['id_servidor'] for _, row in df.iterrows()}
-    except:
-        return {}
-
-def get_estudantes():
-    """Busca lista de estudantes para garantir a integridade do vínculo."""
-    try:
-        sql = """
-            SELECT E.Id_Estudante, U.Nome, E.Matricula 
-            FROM Estudante E
-            JOIN Usuario U ON E.Id_Estudante = U.Id_usuario
-        """
-        df = pd.read_sql(sql, engine)
-        return {f"{row['nome']} (Mat: {row['matricula']})": row['id_estudante'] for _, row in df.iterrows()}
-    except:
-        return {}
+# --- Configurações Iniciais ---
+pn.extension('tabulator', notifications=True)
 
 # --- Widgets ---
 
 # PK: Seleção da Inscrição (Serve como ID)
-select_inscricao = pn.widgets.Select(
+# Autocompletar no servidor: digite o número da inscrição ou o nome do aluno
+select_inscricao = SeletorBusca(
+    buscar_inscricoes,
     name='Vincular à Inscrição (ID)',
-    options=get_inscricoes_disponiveis(),
+    min_caracteres=1,
     description='Selecione a inscrição que se tornará bolsista. O ID da inscrição será o ID do Bolsista.'
 )
 
@@ -94,17 +41,9 @@ frequencia = pn.widgets.Select(
     value='Mensal'
 )
 
-# Foreign Keys
-select_orientador = pn.widgets.Select(name='Orientador (Servidor)', options=get_servidores())
-select_estudante  = pn.widgets.Select(name='Estudante Vinculado', options=get_estudantes())
-
-# Botão Refresh (útil se cadastrarem novos usuários em outra tela)
-btn_refresh = pn.widgets.Button(name='🔄 Atualizar Listas', width=100)
-def refresh_lists(event=None):
-    select_inscricao.options = get_inscricoes_disponiveis()
-    select_orientador.options = get_servidores()
-    select_estudante.options = get_estudantes()
-btn_refresh.on_click(refresh_lists)
+# Foreign Keys (buscados no banco conforme o usuário digita, no máximo 20 sugestões por vez)
+select_orientador = SeletorBusca(buscar_servidores, name='Orientador (Servidor)')
+select_estudante  = SeletorBusca(buscar_estudantes, name='Estudante Vinculado')
 
 # Botões CRUD
 btn_consultar = pn.widgets.Button(name='🔍 Consultar', button_type='primary')
@@ -115,136 +54,130 @@ btn_excluir   = pn.widgets.Button(name='🗑️ Excluir', button_type='danger')
 
 # --- Funções CRUD ---
 
-def carregar_tabela():
+# Tabela da sessão (uma só, colunas em fontes.py): as consultas trocam a fonte e as escritas mandam só a linha alterada
+tabela = TabelaPaginada(nova_fonte())
+
+@cronometrado('bs.on_consultar')
+async def on_consultar(event=None):
+    # Lê do quadro pronto (Quadro_Bolsista), página a página
     try:
-        # Query complexa para trazer nomes legíveis em vez de IDs
-        sql = """
-        SELECT 
-            B.Id_inscricao AS "ID/Inscrição",
-            U_Aluno.Nome AS "Estudante",
-            U_Prof.Nome AS "Orientador",
-            B.Data_inicio,
-            B.Data_fim,
-            B.Frequencia
-        FROM Bolsista B
-        JOIN Estudante E ON B.Id_Estudante = E.Id_Estudante
-        JOIN Usuario U_Aluno ON E.Id_Estudante = U_Aluno.Id_usuario
-        JOIN Servidor S ON B.Id_Orientador = S.Id_Servidor
-        JOIN Usuario U_Prof ON S.Id_Servidor = U_Prof.Id_usuario
-        ORDER BY B.Data_inicio DESC
-        """
-        df = pd.read_sql_query(sql, engine)
-        return pn.widgets.Tabulator(df, pagination='remote', page_size=10, sizing_mode='stretch_width')
+        await tabela.trocar_fonte(nova_fonte())
     except Exception as e:
-        return pn.pane.Alert(f'Erro: {str(e)}', alert_type='danger')
-
-def on_consultar(event=None):
-    # Por simplicidade, recarrega a tabela completa com os joins
-    return carregar_tabela()
-
+        pn.state.notifications.error(f'Erro na consulta: {str(e)}')
+
+def dados_formulario():
+    """
+    Valores dos campos no formato do repositório ({coluna: valor}), sem a chave.
+    Orientador e estudante só entram se escolhidos nesta sessão: os seletores começam vazios,
+    e gravar NULL neles tiraria o bolsista do Quadro_Bolsista (o gatilho junta pelas duas chaves).
+    """
+    dados = {
+        'Data_inicio': data_inicio.value,
+        'Data_fim': data_fim.value,
+        # Trata data de desligamento vazia
+        'Data_desligamento': data_desligamento.value if check_desligar.value else None,
+        'Frequencia': frequencia.value,
+    }
+    if select_orientador.value is not None:
+        dados['Id_Orientador'] = select_orientador.value
+    if select_estudante.value is not None:
+        dados['Id_Estudante'] = select_estudante.value
+    return dados
+
+@cronometrado('bs.on_inserir')
 def on_inserir(event=None):
+    """Cadastra o bolsista. Devolve a linha para a tabela (ou None)."""
     try:
         if not select_inscricao.value:
             pn.state.notifications.error('Selecione uma Inscrição!')
-            return
-
-        with con.cursor() as cursor:
-            # Verifica se já existe bolsista para essa inscrição
-            cursor.execute("SELECT 1 FROM Bolsista WHERE Id_inscricao = %s", (select_inscricao.value,))
-            if cursor.fetchone():
+            return None
+        if select_estudante.value is None or select_orientador.value is None:
+            pn.state.notifications.error('Selecione o Estudante e o Orientador!')
+            return None
+
+        with transacao() as con, con.cursor() as cursor:
+            # ON CONFLICT DO NOTHING: se a inscrição já tem bolsista, nada é gravado e não volta linha
+            novo = bolsistas.inserir_se_novo(cursor, {'Id_inscricao': select_inscricao.value, **dados_formulario()})
+            if novo is None:
                 pn.state.notifications.error('Erro: Esta inscrição JÁ possui cadastro de bolsista.')
-                return on_consultar()
-
-            sql = """
-                INSERT INTO Bolsista (Id_inscricao, Data_inicio, Data_fim, Data_desligamento, Frequencia, Id_Orientador, Id_Estudante)
-                VALUES (%s, %s, %s, %s, %s, %s, %s)
-            """
-            # Trata data de desligamento vazia
-            dt_deslig = data_desligamento.value if check_desligar.value else None
-            
-            cursor.execute(sql, (
-                select_inscricao.value, 
-                data_inicio.value, 
-                data_fim.value, 
-                dt_deslig, 
-                frequencia.value, 
-                select_orientador.value, 
-                select_estudante.value
-            ))
-            con.commit()
+                return None
+            # O trigger já gravou a linha em Quadro_Bolsista nesta mesma transação
+            linha = tabela.fonte.linha(select_inscricao.value, cursor)
         
         pn.state.notifications.success('Bolsista cadastrado com sucesso!')
-        return carregar_tabela()
+        return linha
     except Exception as e:
-        con.rollback()
         pn.state.notifications.error(f'Erro ao inserir: {str(e)}')
-        return on_consultar()
+        return None
 
+@cronometrado('bs.on_atualizar')
 def on_atualizar(event=None):
-    """Atualiza dados do bolsista (Datas, Orientador, Frequência)."""
+    """Atualiza dados do bolsista (Datas, Orientador, Frequência). Devolve a linha para a tabela (ou None)."""
     try:
         pk_id = select_inscricao.value
         if not pk_id:
             pn.state.notifications.warning('Selecione a inscrição (ID) para atualizar.')
-            return
+            return None
 
-        with con.cursor() as cursor:
-            dt_deslig = data_desligamento.value if check_desligar.value else None
-            
-            sql = """
-                UPDATE Bolsista 
-                SET Data_inicio=%s, Data_fim=%s, Data_desligamento=%s, Frequencia=%s, Id_Orientador=%s, Id_Estudante=%s
-                WHERE Id_inscricao=%s
-            """
-            cursor.execute(sql, (
-                data_inicio.value, data_fim.value, dt_deslig, frequencia.value, 
-                select_orientador.value, select_estudante.value, pk_id
-            ))
-            
-            if cursor.rowcount == 0:
+        with transacao() as con, con.cursor() as cursor:
+            if bolsistas.atualizar(cursor, pk_id, dados_formulario()) is None:
                 pn.state.notifications.warning('Registro não encontrado para atualização.')
-            else:
-                con.commit()
-                pn.state.notifications.success(f'Bolsista {pk_id} atualizado!')
+                return None
+            linha = tabela.fonte.linha(pk_id, cursor)
 
-        return carregar_tabela()
+        pn.state.notifications.success(f'Bolsista {pk_id} atualizado!')
+        return linha
     except Exception as e:
-        con.rollback()
         pn.state.notifications.error(f'Erro: {str(e)}')
-        return on_consultar()
+        return None
 
+@cronometrado('bs.on_excluir')
 def on_excluir(event=None):
-    """Remove o registro de Bolsista (não apaga a inscrição, apenas o vínculo de bolsa)."""
+    """Remove o registro de Bolsista (não apaga a inscrição, apenas o vínculo de bolsa). Devolve True se excluiu."""
     try:
         pk_id = select_inscricao.value
         if not pk_id:
             pn.state.notifications.warning('Selecione a inscrição (ID) para excluir.')
-            return
+            return False
 
-        with con.cursor() as cursor:
-            sql = "DELETE FROM Bolsista WHERE Id_inscricao = %s"
-            cursor.execute(sql, (pk_id,))
-            
-            if cursor.rowcount == 0:
+        with transacao() as con, con.cursor() as cursor:
+            excluiu = bolsistas.excluir(cursor, pk_id) is not None
+            if not excluiu:
                 pn.state.notifications.warning('Registro não encontrado.')
             else:
-                con.commit()
                 pn.state.notifications.success('Registro de bolsista removido!')
         
-        return carregar_tabela()
+        return excluiu
     except Exception as e:
-        con.rollback()
         pn.state.notifications.error(f'Erro ao excluir: {str(e)}')
-        return on_consultar()
+        return False
 
 # --- Lógica de UI ---
-def painel_reativo(consultar, inserir, atualizar, excluir):
-    if inserir: return on_inserir()
-    if atualizar: return on_atualizar()
-    if excluir: return on_excluir()
-    return on_consultar()
-
-tabela_resultado = pn.bind(painel_reativo, btn_consultar, btn_inserir, btn_atualizar, btn_excluir)
+# O acesso ao banco roda num thread do executor; o IOLoop segue livre para as outras sessões.
+# Depois de gravar, a tabela recebe só a linha afetada.
+async def clique_inserir(event):
+    linha = await em_segundo_plano(on_inserir)
+    if linha is not None:
+        await tabela.inserir(linha)
+
+async def clique_atualizar(event):
+    pk_id = select_inscricao.value
+    linha = await em_segundo_plano(on_atualizar)
+    if linha is not None:
+        await tabela.atualizar(pk_id, linha)
+
+async def clique_excluir(event):
+    pk_id = select_inscricao.value
+    if await em_segundo_plano(on_excluir):
+        await tabela.remover(pk_id)
+
+btn_consultar.on_click(on_consultar)
+btn_inserir.on_click(clique_inserir)
+btn_atualizar.on_click(clique_atualizar)
+btn_excluir.on_click(clique_excluir)
+
+# Exporta o que a tabela mostra (filtro e ordenação do cabeçalho), em lotes direto do banco
+exportar = BotaoExportar(lambda: tabela.fonte, 'bolsistas')
 
 # --- Template ---
 template = pn.template.FastListTemplate(
@@ -255,7 +188,6 @@ template = pn.template.FastListTemplate(
         select_inscricao,
         select_estudante,
         select_orientador,
-        btn_refresh,
         pn.layout.Divider(),
         pn.pane.Markdown("### Detalhes"),
         data_inicio,
@@ -267,10 +199,13 @@ template = pn.template.FastListTemplate(
     ],
     main=[
         pn.pane.Markdown("### Quadro de Bolsistas Ativos"),
-        tabela_resultado
+        exportar,
+        tabela
     ],
     accent_base_color="#E91E63", # Cor rosa/avermelhada para diferenciar
     header_background="#C2185B",
 )
 
-template.servable()
\ No newline at end of file
+# `panel serve bs.py` serve a tela sozinha; em principal.py ela entra como uma das rotas
+if __name__.startswith('bokeh_app_'):
+    template.servable()
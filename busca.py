@@ -0,0 +1,260 @@
+import asyncio
+
+import panel as pn
+
+from conexao import engine_leitura
+from metricas import medir
+from preparados import Cancelamento, ConsultaCancelada, cancelamento_atual, consultar
+from tarefas import em_segundo_plano
+
+# Buscas por nome que aproveitam os índices GIN de trigramas (migracoes/0002_busca_por_nome.sql).
+# A coluna é comparada na forma normalizada lower(f_unaccent(...)), igual à do índice:
+# "jose" encontra "José", e o resultado vem ordenado por relevância (word_similarity).
+#
+# Buscas do tipo "autocompletar" devolvem no máximo LIMITE_SUGESTOES linhas por tecla,
+# então o tamanho da página e do tráfego pelo websocket não depende de quantos alunos existem.
+# O SQL de cada busca é sempre o mesmo (só o termo muda): vai como comando preparado (preparados.py),
+# e o resultado fica no cache de leituras até as tabelas consultadas mudarem.
+
+LIMITE_SUGESTOES = 20
+ESPERA_DIGITACAO = 0.3  # segundos sem digitar antes de a busca ao vivo consultar o banco
+
+
+def _escapar(termo):
+    """Escapa curingas do LIKE digitados pelo usuário."""
+    return termo.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def _faixa_prefixo(prefixo):
+    """
+    (de, ate) tais que todo texto que começa com `prefixo` fica em de <= texto < ate, comparando
+    byte a byte (ordem do UTF-8, a mesma dos pontos de código).
+    """
+    if not prefixo:
+        return '', '\U0010ffff'
+    seguinte = ord(prefixo[-1]) + 1
+    if 0xD800 <= seguinte <= 0xDFFF:  # surrogates não existem em UTF-8
+        seguinte = 0xE000
+    return prefixo, prefixo[:-1] + chr(min(seguinte, 0x10FFFF))
+
+
+def normalizado(coluna):
+    """Expressão indexada da coluna: minúsculas e sem acentos."""
+    return f"lower(f_unaccent({coluna}))"
+
+
+def filtro_nome(coluna, termo, parametro='nome'):
+    """
+    Filtro "nome contém termo" (sem diferenciar maiúsculas/acentos) no formato que usa o índice trigram.
+    Devolve (condicao, params, relevancia), onde `relevancia` é uma expressão SQL para ORDER BY ... DESC.
+    """
+    expr = normalizado(coluna)
+    condicao = f"{expr} LIKE lower(f_unaccent(%({parametro})s))"
+    relevancia = f"word_similarity(lower(f_unaccent(%({parametro}_termo)s)), {expr})"
+    params = {parametro: f"%{_escapar(termo.strip())}%", f"{parametro}_termo": termo.strip()}
+    return condicao, params, relevancia
+
+
+def _opcoes(df, rotulo, coluna_id):
+    """Monta {rótulo: id} sem iterrows (concatenação vetorizada do pandas)."""
+    return dict(zip(rotulo, df[coluna_id].tolist()))
+
+
+# --- Busca de Registros ---
+
+def buscar_usuarios(termo, limite=50):
+    """Usuários cujo nome contém `termo`, do mais para o menos relevante."""
+    condicao, params, relevancia = filtro_nome('Nome', termo)
+    sql = f"""
+        SELECT Id_usuario, Nome, Email, {relevancia} AS relevancia
+        FROM Usuario
+        WHERE {condicao}
+        ORDER BY relevancia DESC, Nome
+        LIMIT %(limite)s
+    """
+    return consultar(engine_leitura, sql, {**params, 'limite': limite}, ['Usuario'])
+
+
+def buscar_programas(termo, limite=50):
+    """Programas de auxílio cujo nome contém `termo`, do mais para o menos relevante."""
+    condicao, params, relevancia = filtro_nome('Nome_Programa', termo)
+    sql = f"""
+        SELECT Id_programa, Nome_Programa, Tipo, {relevancia} AS relevancia
+        FROM Programa_Auxilio
+        WHERE {condicao}
+        ORDER BY relevancia DESC, Nome_Programa
+        LIMIT %(limite)s
+    """
+    return consultar(engine_leitura, sql, {**params, 'limite': limite}, ['Programa_Auxilio'])
+
+
+# --- Sugestões para os Seletores ---
+
+def buscar_estudantes(termo, limite=LIMITE_SUGESTOES):
+    """Estudantes cujo nome contém `termo` (ou cuja matrícula começa com ele)."""
+    condicao, params, relevancia = filtro_nome('U.Nome', termo)
+    # Um OR entre colunas de tabelas diferentes do JOIN não usa índice nenhum: são duas buscas,
+    # cada uma no seu índice (trigram do nome, text_pattern_ops da matrícula) e com o seu LIMIT.
+    # A relevância é a mesma expressão nas duas, então o UNION junta o aluno achado pelas duas.
+    # O prefixo da matrícula vai como faixa (~>=~ e ~<~, os operadores de text_pattern_ops) e não
+    # como LIKE: no plano genérico do comando preparado o padrão do LIKE é um parâmetro, e o
+    # Postgres só transforma em range scan um padrão constante.
+    sql = f"""
+        SELECT Id_Estudante, Nome, Matricula
+        FROM (
+            (SELECT E.Id_Estudante, U.Nome, E.Matricula, {relevancia} AS relevancia
+             FROM Usuario U
+             JOIN Estudante E ON E.Id_Estudante = U.Id_usuario
+             WHERE {condicao}
+             ORDER BY relevancia DESC, U.Nome
+             LIMIT %(limite)s)
+            UNION
+            (SELECT E.Id_Estudante, U.Nome, E.Matricula, {relevancia} AS relevancia
+             FROM Estudante E
+             JOIN Usuario U ON E.Id_Estudante = U.Id_usuario
+             WHERE E.Matricula ~>=~ %(matricula_de)s AND E.Matricula ~<~ %(matricula_ate)s
+             ORDER BY E.Matricula
+             LIMIT %(limite)s)
+        ) R
+        ORDER BY relevancia DESC, Nome
+        LIMIT %(limite)s
+    """
+    matricula_de, matricula_ate = _faixa_prefixo(termo.strip())
+    params.update(matricula_de=matricula_de, matricula_ate=matricula_ate, limite=limite)
+    df = consultar(engine_leitura, sql, params, ['Estudante', 'Usuario'])
+    rotulo = df['nome'] + ' (Mat: ' + df['matricula'].astype(str) + ')'
+    return _opcoes(df, rotulo, 'id_estudante')
+
+
+def buscar_servidores(termo, limite=LIMITE_SUGESTOES):
+    """Servidores (orientadores) cujo nome contém `termo`."""
+    condicao, params, relevancia = filtro_nome('U.Nome', termo)
+    sql = f"""
+        SELECT S.Id_Servidor, U.Nome, S.Cargo
+        FROM Servidor S
+        JOIN Usuario U ON S.Id_Servidor = U.Id_usuario
+        WHERE {condicao}
+        ORDER BY {relevancia} DESC, U.Nome
+        LIMIT %(limite)s
+    """
+    df = consultar(engine_leitura, sql, {**params, 'limite': limite}, ['Servidor', 'Usuario'])
+    rotulo = df['nome'] + ' (' + df['cargo'].fillna('').astype(str) + ')'
+    return _opcoes(df, rotulo, 'id_servidor')
+
+
+def buscar_inscricoes(termo, limite=LIMITE_SUGESTOES):
+    """Inscrições pelo número (se `termo` for numérico) ou pelo nome do aluno."""
+    if termo.isdigit():
+        filtro, ordem = "I.Id_inscricao = %(id)s", "I.Id_inscricao DESC"
+        params = {'id': int(termo)}
+    else:
+        filtro, params, relevancia = filtro_nome('U.Nome', termo)
+        ordem = f"{relevancia} DESC, I.Id_inscricao DESC"
+    sql = f"""
+        SELECT I.Id_inscricao, U.Nome
+        FROM Inscricao I
+        JOIN Estudante E ON I.Id_Estudante = E.Id_Estudante
+        JOIN Usuario U ON E.Id_Estudante = U.Id_usuario
+        WHERE {filtro}
+        ORDER BY {ordem}
+        LIMIT %(limite)s
+    """
+    df = consultar(engine_leitura, sql, {**params, 'limite': limite}, ['Inscricao', 'Estudante', 'Usuario'])
+    rotulo = 'Inscrição #' + df['id_inscricao'].astype(str) + ' - ' + df['nome']
+    return _opcoes(df, rotulo, 'id_inscricao')
+
+
+class SeletorBusca:
+    """
+    Campo de busca que consulta o banco enquanto o usuário digita, com a lista do que foi achado.
+    `value` devolve o ID da opção escolhida (ou None), como um pn.widgets.Select com dict.
+
+    A lista mostra o resultado do banco como veio. Um AutocompleteInput filtraria as opções de novo
+    no navegador, diferenciando acentos: "jose" buscaria "José da Silva" e o navegador o esconderia.
+    """
+
+    def __init__(self, buscar, name, min_caracteres=2, **kwargs):
+        self.buscar = buscar
+        self.min_caracteres = min_caracteres
+        self.termo = pn.widgets.TextInput(name=name, placeholder='Digite para buscar...', **kwargs)
+        # Primeira opção vazia: nada é escolhido sozinho quando chegam as sugestões
+        self.widget = pn.widgets.Select(options={'': None}, value=None)
+        self.termo.param.watch(self._on_digitar, 'value_input')
+
+    @property
+    def value(self):
+        return self.widget.value
+
+    async def _on_digitar(self, event):
+        termo = (event.new or '').strip()
+        if len(termo) < self.min_caracteres:
+            return
+        try:
+            opcoes = await em_segundo_plano(self.buscar, termo)
+        except Exception as e:
+            pn.state.notifications.error(f'Erro na busca: {str(e)}')
+            return
+        # Se o usuário continuou digitando, esta resposta já ficou velha
+        if self.termo.value_input != event.new:
+            return
+        # Mantém a opção já escolhida, mesmo que a busca nova não a traga
+        escolhida = self.value
+        if escolhida is not None:
+            rotulo = next(r for r, v in self.widget.options.items() if v == escolhida)
+            opcoes = {rotulo: escolhida, **opcoes}
+        self.widget.options = {'': None, **opcoes}
+
+    def __panel__(self):
+        return pn.Column(self.termo, self.widget, margin=0)
+
+
+class BuscaAoVivo:
+    """
+    Modo "buscar enquanto digita" para uma TabelaPaginada.
+    Com a chave ligada, cada tecla nos `campos` agenda a consulta `fonte_consulta()`; ela só roda
+    depois de ESPERA_DIGITACAO sem novas teclas (debounce). Se uma busca mais nova começa, a que
+    ainda está no banco é cancelada (Cancelamento), e só o resultado da mais nova chega à tabela.
+    """
+
+    def __init__(self, tabela, campos, fonte_consulta, nome_metrica='busca_ao_vivo', espera=ESPERA_DIGITACAO):
+        self.tabela = tabela
+        self.fonte_consulta = fonte_consulta
+        self.nome_metrica = nome_metrica
+        self.espera = espera
+        self.ligado = pn.widgets.Switch(value=False, width=40)
+        self._teclas = 0           # cada tecla incrementa; só a última espera até o fim
+        self._em_andamento = None  # Cancelamento da busca que está no banco
+        for campo in campos:
+            campo.param.watch(self._on_digitar, 'value_input')
+
+    async def _on_digitar(self, event):
+        if not self.ligado.value:
+            return
+        self._teclas += 1
+        tecla = self._teclas
+        await asyncio.sleep(self.espera)
+        if tecla != self._teclas:
+            return  # continuou digitando
+
+        anterior, self._em_andamento = self._em_andamento, None
+        if anterior is not None:
+            # connection.cancel() (PQcancel) abre outra conexão e espera o servidor: fora do IOLoop
+            await em_segundo_plano(anterior.cancelar)
+            if tecla != self._teclas:
+                return  # chegou tecla nova enquanto cancelava: ela segue daqui
+        cancelamento = self._em_andamento = Cancelamento()
+        token = cancelamento_atual.set(cancelamento)
+        try:
+            with medir(self.nome_metrica):
+                await self.tabela.trocar_fonte(self.fonte_consulta())
+        except ConsultaCancelada:
+            pass  # uma busca mais nova já está no lugar desta
+        except Exception as e:
+            pn.state.notifications.error(f'Erro na busca: {str(e)}')
+        finally:
+            cancelamento_atual.reset(token)
+            if self._em_andamento is cancelamento:
+                self._em_andamento = None
+
+    def __panel__(self):
+        return pn.Row(self.ligado, pn.pane.Markdown('Buscar enquanto digito', margin=(8, 5)))
@@ -0,0 +1,136 @@
+import threading
+import time
+import weakref
+from collections import OrderedDict
+
+# Cache em memória compartilhado pelo processo.
+# Sob `panel serve` os scripts rodam de novo a cada sessão, mas módulos importados
+# (como este) ficam em sys.modules, então todas as sessões enxergam a mesma instância.
+
+_AUSENTE = object()
+
+# Todos os CachePorTabela do processo, para invalidar_tabelas()
+_caches_por_tabela = weakref.WeakSet()
+
+
+class CacheTTL:
+    """Cache LRU com tempo de expiração (TTL) por entrada. Seguro entre threads."""
+
+    def __init__(self, max_itens=256, ttl=30.0):
+        self.max_itens = max_itens
+        self.ttl = ttl
+        self._dados = OrderedDict()  # chave -> (expira_em, valor)
+        self._lock = threading.RLock()
+        self._calculando = {}  # chave -> Lock de quem está calculando o valor agora
+
+    def get(self, chave, padrao=None):
+        with self._lock:
+            item = self._dados.get(chave, _AUSENTE)
+            if item is _AUSENTE:
+                return padrao
+            expira_em, valor = item
+            if expira_em < time.monotonic():
+                del self._dados[chave]
+                return padrao
+            self._dados.move_to_end(chave)
+            return valor
+
+    def set(self, chave, valor, ttl=None):
+        with self._lock:
+            self._dados[chave] = (time.monotonic() + (ttl or self.ttl), valor)
+            self._dados.move_to_end(chave)
+            while len(self._dados) > self.max_itens:
+                self._dados.popitem(last=False)
+
+    def get_or_set(self, chave, fabrica, ttl=None):
+        """
+        Devolve o valor em cache ou calcula com `fabrica()` e guarda.
+        Se vários threads pedem a mesma chave ausente ao mesmo tempo, só um calcula;
+        os outros esperam e recebem o mesmo resultado.
+        """
+        valor = self.get(chave, _AUSENTE)
+        if valor is not _AUSENTE:
+            return valor
+        with self._lock:
+            trava = self._calculando.setdefault(chave, threading.Lock())
+        try:
+            with trava:
+                # Quem esperou encontra o valor que o primeiro acabou de guardar
+                valor = self.get(chave, _AUSENTE)
+                if valor is _AUSENTE:
+                    valor = fabrica()
+                    self.set(chave, valor, ttl)
+                return valor
+        finally:
+            with self._lock:
+                if self._calculando.get(chave) is trava:
+                    del self._calculando[chave]
+
+    def invalidar(self, chave):
+        with self._lock:
+            self._dados.pop(chave, None)
+
+    def limpar(self):
+        with self._lock:
+            self._dados.clear()
+
+
+class CachePorTabela(CacheTTL):
+    """
+    CacheTTL de resultados de consultas: cada entrada declara as tabelas que leu, e
+    `invalidar_tabelas` descarta só as entradas que dependem das tabelas alteradas.
+    """
+
+    def __init__(self, max_itens=256, ttl=30.0):
+        super().__init__(max_itens, ttl)
+        self._por_tabela = {}  # tabela (minúsculas) -> conjunto de chaves
+        self._versoes = {}     # tabela -> quantas vezes foi invalidada
+        self._limpezas = 0
+        _caches_por_tabela.add(self)
+
+    def _versao(self, tabelas):
+        return (self._limpezas, *(self._versoes.get(t, 0) for t in tabelas))
+
+    def get_or_set(self, chave, fabrica, tabelas=(), ttl=None):
+        valor = self.get(chave, _AUSENTE)
+        if valor is not _AUSENTE:
+            return valor
+        tabelas = sorted({t.lower() for t in tabelas})
+        with self._lock:
+            versao = self._versao(tabelas)
+        valor = super().get_or_set(chave, fabrica, ttl)
+        with self._lock:
+            if self._versao(tabelas) != versao:
+                # Uma escrita invalidou as tabelas enquanto a consulta rodava: o valor pode ser
+                # anterior a ela, então serve a quem pediu mas não fica no cache
+                self._dados.pop(chave, None)
+            else:
+                for tabela in tabelas:
+                    self._por_tabela.setdefault(tabela, set()).add(chave)
+        return valor
+
+    def invalidar_tabelas(self, tabelas):
+        with self._lock:
+            for tabela in {t.lower() for t in tabelas}:
+                self._versoes[tabela] = self._versoes.get(tabela, 0) + 1
+                for chave in self._por_tabela.pop(tabela, ()):
+                    self._dados.pop(chave, None)
+
+    def limpar(self):
+        with self._lock:
+            self._dados.clear()
+            self._por_tabela.clear()
+            self._limpezas += 1
+
+
+def invalidar_tabelas(tabelas=None):
+    """
+    Descarta, em todos os CachePorTabela do processo, as entradas que leram alguma das `tabelas`
+    (todas as entradas, se None). Chamado pelas escritas (repositorio.py) e pelos avisos
+    LISTEN/NOTIFY de alterações feitas por outros processos (notificacoes.py).
+    """
+    for cache in list(_caches_por_tabela):
+        if tabelas is None:
+            cache.limpar()
+        else:
+            cache.invalidar_tabelas(tabelas)
@@ -0,0 +1,169 @@
+import contextvars
+import os
+from contextlib import contextmanager
+
+from dotenv import load_dotenv
+import sqlalchemy
+
+from cache import invalidar_tabelas
+from metricas import CursorMedido, instrumentar_engine
+
+# Acesso ao banco compartilhado pelas telas (app.py, PA.py, ed.py, bs.py).
+# Sob `panel serve` cada sessão reexecuta o script da tela, mas este módulo é importado
+# uma única vez por processo: todas as sessões dividem o mesmo pool limitado de conexões.
+
+load_dotenv()
+
+# --- Configuração do Banco de Dados ---
+DB_HOST = os.getenv('DB_HOST', 'localhost')
+DB_NAME = os.getenv('DB_NAME', 'fbd-conexao')
+DB_USER = os.getenv('DB_USER', 'postgres')
+DB_PASS = os.getenv('DB_PASS', 'root')
+
+# Réplica opcional só para leitura; sem ela, leituras usam o mesmo servidor
+DB_HOST_LEITURA = os.getenv('DB_HOST_LEITURA', DB_HOST)
+
+# --- Limites do Pool (por processo) ---
+# Máximo de conexões abertas = POOL_SIZE + POOL_MAX_OVERFLOW, para cada engine
+POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '5'))
+POOL_MAX_OVERFLOW = int(os.getenv('DB_POOL_MAX_OVERFLOW', '5'))
+POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', '10'))        # segundos esperando uma conexão livre
+POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', '1800'))        # recicla conexões com mais de 30 min
+CONNECT_TIMEOUT = int(os.getenv('DB_CONNECT_TIMEOUT', '5'))      # segundos para abrir conexão
+STATEMENT_TIMEOUT_MS = int(os.getenv('DB_STATEMENT_TIMEOUT_MS', '30000'))
+
+
+def _criar_engine(host):
+    str_conn = f'postgresql+psycopg2://{DB_USER}:{DB_PASS}@{host}/{DB_NAME}'
+    return sqlalchemy.create_engine(
+        str_conn,
+        pool_size=POOL_SIZE,
+        max_overflow=POOL_MAX_OVERFLOW,
+        pool_timeout=POOL_TIMEOUT,
+        pool_recycle=POOL_RECYCLE,
+        pool_pre_ping=True,  # health-check: testa a conexão antes de entregá-la
+        connect_args={
+            'connect_timeout': CONNECT_TIMEOUT,
+            'application_name': 'bolsas-auxilios',
+            # Nenhuma consulta ou transação esquecida segura o backend para sempre
+            'options': f'-c statement_timeout={STATEMENT_TIMEOUT_MS} '
+                       f'-c idle_in_transaction_session_timeout={STATEMENT_TIMEOUT_MS * 2}',
+        },
+    )
+
+
+# Engine para Escritas (INSERT, UPDATE, DELETE)
+engine = _criar_engine(DB_HOST)
+
+# Engine para Consultas (Pandas). Mesmo objeto quando não há réplica configurada.
+engine_leitura = engine if DB_HOST_LEITURA == DB_HOST else _criar_engine(DB_HOST_LEITURA)
+
+# Latência de cada comando executado pelo SQLAlchemy (pd.read_sql etc.), ver metricas.py
+instrumentar_engine(engine)
+if engine_leitura is not engine:
+    instrumentar_engine(engine_leitura)
+
+
+def _cursores_medidos(con, ligado):
+    """
+    Liga/desliga o CursorMedido na conexão psycopg2 emprestada. Só durante o bloco de
+    transacao()/leitura(): os cursores do próprio SQLAlchemy já são medidos pelos eventos.
+    """
+    driver = con.driver_connection
+    if driver is not None and not driver.closed:
+        driver.cursor_factory = CursorMedido if ligado else None
+
+
+# Tabelas gravadas na transação em andamento (ver tabela_alterada)
+_alteradas = contextvars.ContextVar('tabelas_alteradas', default=None)
+
+
+def tabela_alterada(tabela):
+    """
+    Invalida as leituras em cache que dependem de `tabela` (cache.invalidar_tabelas).
+    Dentro de transacao(), invalida de novo depois do commit: uma leitura de outra sessão
+    entre a escrita e o commit ainda veria (e guardaria) os dados antigos.
+    """
+    invalidar_tabelas([tabela])
+    pendentes = _alteradas.get()
+    if pendentes is not None:
+        pendentes.add(tabela)
+
+
+# Funções a executar depois do commit da transação em andamento (ver apos_commit)
+_apos_commit = contextvars.ContextVar('apos_commit', default=None)
+
+
+def apos_commit(funcao):
+    """
+    Agenda `funcao()` para depois do commit da transacao() em andamento (ex: auditoria.py).
+    Com rollback ela é descartada. Fora de transacao() não há commit a esperar: devolve False.
+    """
+    pendentes = _apos_commit.get()
+    if pendentes is None:
+        return False
+    pendentes.append(funcao)
+    return True
+
+
+@contextmanager
+def transacao():
+    """
+    Empresta uma conexão psycopg2 do pool para escrita.
+    Faz commit ao sair do bloco, rollback em caso de erro, e sempre devolve a conexão ao pool.
+    """
+    con = engine.raw_connection()
+    _cursores_medidos(con, True)
+    token = _alteradas.set(set())
+    token_commit = _apos_commit.set([])
+    try:
+        yield con
+        con.commit()
+        invalidar_tabelas(_alteradas.get())
+        for funcao in _apos_commit.get():
+            funcao()
+    except Exception:
+        con.rollback()
+        raise
+    finally:
+        _apos_commit.reset(token_commit)
+        _alteradas.reset(token)
+        _cursores_medidos(con, False)
+        con.close()  # não fecha de verdade: devolve ao pool
+
+
+@contextmanager
+def leitura():
+    """
+    Empresta uma conexão psycopg2 do pool de leitura (ex: cursor nomeado para exportação).
+    Nada é gravado: a transação é sempre desfeita ao sair do bloco.
+    """
+    con = engine_leitura.raw_connection()
+    _cursores_medidos(con, True)
+    try:
+        yield con
+    finally:
+        try:
+            con.rollback()
+        finally:
+            _cursores_medidos(con, False)
+            con.close()
+
+
+def status_pool():
+    """Resumo do pool de escrita (e de leitura, se separado) para diagnóstico."""
+    status = {'escrita': engine.pool.status()}
+    if engine_leitura is not engine:
+        status['leitura'] = engine_leitura.pool.status()
+    return status
+
+
+def verificar_saude():
+    """Executa SELECT 1 em cada engine. Devolve True se o banco respondeu."""
+    try:
+        for eng in {engine, engine_leitura}:
+            with eng.connect() as c:
+                c.exec_driver_sql('SELECT 1')
+        return True
+    except Exception:
+        return False
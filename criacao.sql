@@ -1,3 +1,7 @@
+-- Esquema base. Depois de criar o banco, aplique as alterações posteriores com:
+--   python migrar.py
+-- (scripts em migracoes/, registrados na tabela Schema_Migracao)
+
 -- 1. Tabela Usuário (Usa SERIAL para gerar o ID base)
 CREATE TABLE Usuario (
     Id_usuario SERIAL PRIMARY KEY,
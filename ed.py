@@ -1,41 +1,33 @@
-import os
-from dotenv import load_dotenv
 import pandas as pd
-import psycopg2 as pg
-import sqlalchemy
 import panel as pn
 import datetime
 
-# --- Configurações Iniciais ---
-load_dotenv()
-pn.extension()
-pn.extension('tabulator')
-pn.extension(notifications=True)
-
-# --- Conexão Banco de Dados ---
-DB_HOST = os.getenv('DB_HOST', 'localhost')
-DB_NAME = os.getenv('DB_NAME', 'fbd-conexao')
-DB_USER = os.getenv('DB_USER', 'postgres')
-DB_PASS = os.getenv('DB_PASS', 'root')
+from conexao import engine_leitura, transacao
+from edicao import EdicaoEmLote
+from exportacao import BotaoExportar
+from fontes import fonte_editais as nova_fonte
+from metricas import cronometrado
+from notificacoes import catalogo
+from paginacao import TabelaPaginada
+from repositorio import editais
+from tarefas import em_segundo_plano
 
-str_conn = f'postgresql://{DB_USER}:{DB_PASS}@{DB_HOST}/{DB_NAME}'
-engine = sqlalchemy.create_engine(str_conn)
-
-try:
-    con = pg.connect(host=DB_HOST, dbname=DB_NAME, user=DB_USER, password=DB_PASS)
-except Exception as e:
-    pn.pane.Alert(f"Erro de conexão: {e}", alert_type='danger').servable()
+# --- Configurações Iniciais ---
+pn.extension('tabulator', notifications=True)
 
 # --- Função Auxiliar: Carregar Programas para o Dropdown ---
 def get_lista_programas():
     """Busca os programas existentes para preencher o seletor."""
     try:
-        df = pd.read_sql("SELECT Id_programa, Nome_Programa FROM Programa_Auxilio", engine)
+        df = pd.read_sql("SELECT Id_programa, Nome_Programa FROM Programa_Auxilio", engine_leitura)
         # Cria um dicionário: {'Nome do Programa (ID: 1)': 1, ...}
         return {f"{row['nome_programa']} (ID: {row['id_programa']})": row['id_programa'] for _, row in df.iterrows()}
     except:
         return {}
 
+# Lista compartilhada entre sessões, recarregada por LISTEN/NOTIFY quando Programa_Auxilio muda
+catalogo.registrar('programas', get_lista_programas, tabelas=['Programa_Auxilio'])
+
 # --- Widgets ---
 
 # ID do Edital (Controle)
@@ -63,18 +55,12 @@ status = pn.widgets.Select(
 )
 
 # Seletor de Programa (Chave Estrangeira)
-# Carrega dinamicamente os programas disponíveis
+# Atualiza sozinho quando alguém insere um novo programa enquanto esta tela está aberta
 select_programa = pn.widgets.Select(
     name='Programa Vinculado',
-    options=get_lista_programas()
+    options=catalogo.obter('programas')
 )
-
-# Botão para atualizar a lista de programas (caso alguém insira um novo programa enquanto usa esta tela)
-btn_refresh_progs = pn.widgets.Button(name='🔄', width=40, align='end')
-
-def refresh_programas(event=None):
-    select_programa.options = get_lista_programas()
-btn_refresh_progs.on_click(refresh_programas)
+catalogo.assinar('programas', select_programa)
 
 
 # Botões de Ação CRUD
@@ -86,132 +72,130 @@ btn_excluir   = pn.widgets.Button(name='🗑️ Excluir', button_type='danger')
 
 # --- Funções CRUD ---
 
-def carregar_tabela():
-    """Carrega a tabela unindo com o nome do programa para ficar legível."""
-    try:
-        sql = """
-        SELECT 
-            E.Id_edital, 
-            E.Data_inicio, 
-            E.Data_fim, 
-            E.Status, 
-            P.Nome_Programa 
-        FROM Edital E
-        LEFT JOIN Programa_Auxilio P ON E.Id_programa = P.Id_programa
-        ORDER BY E.Id_edital DESC
-        """
-        df = pd.read_sql_query(sql, engine)
-        return pn.widgets.Tabulator(df, pagination='remote', page_size=10, sizing_mode='stretch_width')
-    except Exception as e:
-        return pn.pane.Alert(f'Erro: {str(e)}', alert_type='danger')
+# Tabela da sessão (uma só, colunas em fontes.py): as consultas trocam a fonte e as escritas mandam só a linha alterada
+tabela = TabelaPaginada(nova_fonte())
 
-def on_consultar(event=None):
+def fonte_consulta():
     """Busca filtrada por ID ou Status."""
+    fonte = nova_fonte()
+
+    if id_edital.value > 0:
+        fonte.filtrar("E.Id_edital = %(id)s", {'id': id_edital.value})
+    
+    # Se não filtrou por ID, considera o status selecionado se o usuário quiser (opcional)
+    # Aqui vamos fazer uma busca simples: Se ID=0, traz tudo.
+    return fonte
+
+@cronometrado('ed.on_consultar')
+async def on_consultar(event=None):
+    """Mostra na tabela o resultado dos filtros atuais (ver fonte_consulta)."""
     try:
-        query = """
-            SELECT E.*, P.Nome_Programa 
-            FROM Edital E
-            LEFT JOIN Programa_Auxilio P ON E.Id_programa = P.Id_programa
-            WHERE 1=1
-        """
-        params = {}
-
-        if id_edital.value > 0:
-            query += " AND E.Id_edital = %(id)s"
-            params['id'] = id_edital.value
-        
-        # Se não filtrou por ID, considera o status selecionado se o usuário quiser (opcional)
-        # Aqui vamos fazer uma busca simples: Se ID=0, traz tudo.
-        
-        query += " ORDER BY E.Id_edital DESC"
-        
-        df = pd.read_sql_query(query, engine, params=params)
-        return pn.widgets.Tabulator(df, pagination='remote', page_size=10, sizing_mode='stretch_width')
+        await tabela.trocar_fonte(fonte_consulta())
     except Exception as e:
         pn.state.notifications.error(f'Erro na consulta: {str(e)}')
-        return pn.pane.Alert(f'Erro: {str(e)}')
 
+def dados_formulario():
+    """Valores dos campos no formato do repositório ({coluna: valor})."""
+    return {
+        'Data_inicio': data_inicio.value, 'Data_fim': data_fim.value,
+        'Status': status.value, 'Id_programa': select_programa.value,
+    }
+
+@cronometrado('ed.on_inserir')
 def on_inserir(event=None):
+    """Cria o edital. Devolve a linha para a tabela (ou None)."""
     try:
         if not select_programa.value:
             pn.state.notifications.error('Selecione um Programa!')
-            return on_consultar()
-
-        with con.cursor() as cursor:
-            sql = """
-                INSERT INTO Edital (Data_inicio, Data_fim, Status, Id_programa)
-                VALUES (%s, %s, %s, %s)
-            """
-            cursor.execute(sql, (data_inicio.value, data_fim.value, status.value, select_programa.value))
-            con.commit()
+            return None
+
+        with transacao() as con, con.cursor() as cursor:
+            novo = editais.inserir(cursor, dados_formulario())
+            linha = tabela.fonte.linha(novo['id_edital'], cursor)
         
         pn.state.notifications.success('Edital criado com sucesso!')
-        return carregar_tabela()
+        return linha
     except Exception as e:
-        con.rollback()
         pn.state.notifications.error(f'Erro ao inserir: {str(e)}')
-        return on_consultar()
+        return None
 
+@cronometrado('ed.on_atualizar')
 def on_atualizar(event=None):
+    """Atualiza o edital do ID informado. Devolve a linha para a tabela (ou None)."""
     try:
         if id_edital.value <= 0:
             pn.state.notifications.warning('ID inválido.')
-            return on_consultar()
+            return None
 
-        with con.cursor() as cursor:
-            # Verifica se existe
-            cursor.execute("SELECT 1 FROM Edital WHERE Id_edital = %s", (id_edital.value,))
-            if not cursor.fetchone():
+        with transacao() as con, con.cursor() as cursor:
+            # UPDATE ... RETURNING: se o ID não existe, não volta linha nenhuma
+            if editais.atualizar(cursor, id_edital.value, dados_formulario()) is None:
                 pn.state.notifications.warning('Edital não encontrado.')
-                return on_consultar()
-
-            sql = """
-                UPDATE Edital 
-                SET Data_inicio=%s, Data_fim=%s, Status=%s, Id_programa=%s
-                WHERE Id_edital=%s
-            """
-            cursor.execute(sql, (data_inicio.value, data_fim.value, status.value, select_programa.value, id_edital.value))
-            con.commit()
+                return None
+            linha = tabela.fonte.linha(id_edital.value, cursor)
 
         pn.state.notifications.success(f'Edital {id_edital.value} atualizado!')
-        return carregar_tabela()
+        return linha
     except Exception as e:
-        con.rollback()
         pn.state.notifications.error(f'Erro: {str(e)}')
-        return on_consultar()
+        return None
 
+@cronometrado('ed.on_excluir')
 def on_excluir(event=None):
+    """Exclui o edital do ID informado. Devolve True se excluiu."""
     try:
         if id_edital.value <= 0:
             pn.state.notifications.warning('ID inválido.')
-            return on_consultar()
+            return False
 
-        with con.cursor() as cursor:
-            sql = "DELETE FROM Edital WHERE Id_edital = %s"
-            cursor.execute(sql, (id_edital.value,))
-            if cursor.rowcount == 0:
+        with transacao() as con, con.cursor() as cursor:
+            excluiu = editais.excluir(cursor, id_edital.value) is not None
+            if not excluiu:
                 pn.state.notifications.warning('ID não encontrado.')
             else:
-                con.commit()
                 pn.state.notifications.success('Edital excluído!')
         
-        return carregar_tabela()
+        return excluiu
     except Exception as e:
-        con.rollback()
         if 'foreign key' in str(e).lower():
             pn.state.notifications.error('Impossível excluir: Existem Inscrições vinculadas a este Edital.')
         else:
             pn.state.notifications.error(f'Erro: {str(e)}')
-        return on_consultar()
+        return False
 
 # --- Painel Reativo ---
-def painel_reativo(consultar, inserir, atualizar, excluir):
-    if inserir: return on_inserir()
-    if atualizar: return on_atualizar()
-    if excluir: return on_excluir()
-    return on_consultar()
-
-tabela_resultado = pn.bind(painel_reativo, btn_consultar, btn_inserir, btn_atualizar, btn_excluir)
+# O acesso ao banco roda num thread do executor; o IOLoop segue livre para as outras sessões.
+# Depois de gravar, a tabela recebe só a linha afetada.
+async def clique_inserir(event):
+    linha = await em_segundo_plano(on_inserir)
+    if linha is not None:
+        await tabela.inserir(linha)
+
+async def clique_atualizar(event):
+    pk_id = id_edital.value
+    linha = await em_segundo_plano(on_atualizar)
+    if linha is not None:
+        await tabela.atualizar(pk_id, linha)
+
+async def clique_excluir(event):
+    pk_id = id_edital.value
+    if await em_segundo_plano(on_excluir):
+        await tabela.remover(pk_id)
+
+btn_consultar.on_click(on_consultar)
+btn_inserir.on_click(clique_inserir)
+btn_atualizar.on_click(clique_atualizar)
+btn_excluir.on_click(clique_excluir)
+
+# Exporta o que a tabela mostra (filtro e ordenação do cabeçalho), em lotes direto do banco
+exportar = BotaoExportar(lambda: tabela.fonte, 'editais')
+
+# Correções em várias linhas direto na tabela, gravadas num único commit
+# (nome_programa vem do JOIN e fica só para leitura)
+edicao = EdicaoEmLote(tabela, editais, {
+    'data_inicio': 'Data_inicio', 'data_fim': 'Data_fim',
+    'status': 'Status', 'id_programa': 'Id_programa',
+})
 
 # --- Layout (Template Profissional) ---
 template = pn.template.FastListTemplate(
@@ -225,7 +209,7 @@ template = pn.template.FastListTemplate(
         data_fim,
         status,
         pn.pane.Markdown("**Vincular Programa**"),
-        pn.Row(select_programa, btn_refresh_progs),
+        select_programa,
         pn.layout.Divider(),
         btn_consultar,
         btn_inserir,
@@ -234,10 +218,14 @@ template = pn.template.FastListTemplate(
     ],
     main=[
         pn.pane.Markdown("### Editais Cadastrados"),
-        tabela_resultado
+        exportar,
+        edicao,
+        tabela
     ],
     accent_base_color="#2F4F4F",
     header_background="#2F4F4F",
 )
 
-template.servable()
\ No newline at end of file
+# `panel serve ed.py` serve a tela sozinha; em principal.py ela entra como uma das rotas
+if __name__.startswith('bokeh_app_'):
+    template.servable()
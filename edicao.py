@@ -0,0 +1,190 @@
+import pandas as pd
+import panel as pn
+
+from conexao import transacao
+from metricas import medir
+from paginacao import _valor_python
+from tarefas import em_segundo_plano
+
+# Edição direto na tabela (várias linhas de uma vez).
+# Com o modo de edição ligado, as células editadas, as linhas novas e as marcadas para excluir
+# vão se acumulando num conjunto de alterações, que só vai ao banco ao clicar em Salvar:
+# tudo numa única transação, em lote (Repositorio.aplicar_lote). Se qualquer linha falhar,
+# nada é gravado e as alterações continuam pendentes para correção.
+
+
+class EdicaoEmLote:
+    """
+    Liga uma TabelaPaginada a um Repositorio para edição em lote.
+
+    - colunas: {coluna exibida: coluna da tabela no banco} das colunas editáveis.
+      As demais (chave, nomes vindos de JOIN, relevância) ficam só para leitura.
+    - inserir: False esconde o botão de linha nova (ex: tabela com coluna NOT NULL que não
+      aparece na tela, que faria o INSERT falhar e desfazer o lote inteiro).
+    A chave exibida da fonte precisa ser a chave primária da tabela do repositório.
+    """
+
+    def __init__(self, tabela, repositorio, colunas, inserir=True):
+        self.tabela = tabela
+        self.repositorio = repositorio
+        self.colunas = dict(colunas)
+
+        self.novas = {}        # chave provisória (negativa) -> {coluna exibida: valor}
+        self.alteradas = {}    # chave -> {coluna exibida: valor}
+        self.excluidas = set()
+        self._provisoria = 0
+
+        grid = tabela.tabela
+        grid.disabled = True  # fora do modo de edição a tabela é só leitura
+        grid.on_edit(self._on_editar)
+        tabela.sobrepor = self._sobrepor
+
+        self.modo = pn.widgets.Toggle(name='✏️ Editar na tabela', button_type='light')
+        self.btn_nova = pn.widgets.Button(name='➕ Linha', button_type='light', visible=inserir)
+        self.btn_excluir = pn.widgets.Button(name='🗑️ Excluir marcadas', button_type='light')
+        self.btn_salvar = pn.widgets.Button(name='💾 Salvar', button_type='success')
+        self.btn_descartar = pn.widgets.Button(name='↩️ Descartar', button_type='light')
+        self.resumo = pn.pane.Markdown(margin=(5, 10))
+        self.acoes = pn.Row(self.btn_nova, self.btn_excluir, self.btn_salvar, self.btn_descartar,
+                            self.resumo, visible=False)
+
+        self.modo.param.watch(self._on_modo, 'value')
+        self.btn_nova.on_click(self._on_nova)
+        self.btn_excluir.on_click(self._on_excluir)
+        self.btn_salvar.on_click(self._on_salvar)
+        self.btn_descartar.on_click(self._on_descartar)
+        self._atualizar_resumo()
+
+    # --- Conjunto de alterações ---
+
+    @property
+    def pendentes(self):
+        return len(self.novas) + len(self.alteradas) + len(self.excluidas)
+
+    def _atualizar_resumo(self):
+        self.resumo.object = (
+            f"{len(self.alteradas)} alterada(s), {len(self.novas)} nova(s), "
+            f"{len(self.excluidas)} a excluir"
+        )
+        self.btn_salvar.disabled = self.btn_descartar.disabled = self.pendentes == 0
+
+    def _limpar(self):
+        self.novas.clear()
+        self.alteradas.clear()
+        self.excluidas.clear()
+        self._atualizar_resumo()
+
+    def _chave_da_linha(self, indice):
+        return _valor_python(self.tabela.tabela.value.at[indice, self.tabela.fonte.chave])
+
+    # --- Eventos da tabela ---
+
+    def _sem_categorias(self, pagina):
+        """
+        Colunas editáveis que vieram como category passam a object: o Tabulator grava a célula
+        editada com `value.loc[...] = valor`, e o pandas recusa valor fora das categorias da página.
+        """
+        return pagina.astype({c: object for c in pagina.columns
+                              if c in self.colunas and isinstance(pagina[c].dtype, pd.CategoricalDtype)})
+
+    def _on_modo(self, event):
+        grid = self.tabela.tabela
+        if event.new:
+            # Só as colunas mapeadas para o banco aceitam edição
+            grid.editors = {c: None for c in self.tabela.fonte.colunas if c not in self.colunas}
+            grid.selectable = 'checkbox'
+            grid.value = self._sem_categorias(grid.value)
+        else:
+            grid.selectable = True
+            grid.selection = []
+        grid.disabled = not event.new
+        self.acoes.visible = event.new
+
+    def _on_editar(self, event):
+        if event.column not in self.colunas:
+            return
+        chave = self._chave_da_linha(event.row)
+        destino = self.novas if chave in self.novas else self.alteradas
+        destino.setdefault(chave, {})[event.column] = _valor_python(event.value)
+        self._atualizar_resumo()
+
+    def _sobrepor(self, pagina):
+        """
+        Página vinda do banco com o que ainda não foi salvo por cima (TabelaPaginada.sobrepor):
+        sem as linhas marcadas para excluir, com as células editadas e com as linhas novas no fim.
+        No modo de edição (ou com alterações pendentes), as colunas editáveis chegam sem category.
+        """
+        if not (self.modo.value or self.pendentes):
+            return pagina
+        pagina = self._sem_categorias(pagina)
+        if not self.pendentes:
+            return pagina
+        chave = self.tabela.fonte.chave
+        pagina = pagina[~pagina[chave].map(_valor_python).isin(self.excluidas)].reset_index(drop=True)
+        for indice, valor_chave in pagina[chave].items():
+            for coluna, valor in self.alteradas.get(_valor_python(valor_chave), {}).items():
+                pagina.at[indice, coluna] = valor
+        if self.novas:
+            novas = [{**valores, chave: provisoria} for provisoria, valores in self.novas.items()]
+            pagina = pd.DataFrame.from_records(pagina.to_dict('records') + novas, columns=pagina.columns)
+        return pagina
+
+    def _on_nova(self, event):
+        # Chave provisória negativa identifica a linha até o banco gerar o ID
+        self._provisoria -= 1
+        colunas = list(self.tabela.tabela.value.columns)
+        linha = {c: None for c in colunas}
+        linha[self.tabela.fonte.chave] = self._provisoria
+        self.novas[self._provisoria] = {}
+        self.tabela.tabela.stream(pd.DataFrame([linha], columns=colunas), follow=True)
+        self._atualizar_resumo()
+
+    def _on_excluir(self, event):
+        grid = self.tabela.tabela
+        indices = list(grid.selection)
+        if not indices:
+            pn.state.notifications.warning('Marque as linhas a excluir.')
+            return
+        for indice in indices:
+            chave = self._chave_da_linha(indice)
+            if chave in self.novas:
+                del self.novas[chave]
+            else:
+                self.alteradas.pop(chave, None)
+                self.excluidas.add(chave)
+        grid.selection = []
+        grid.value = grid.value.drop(indices).reset_index(drop=True)
+        self._atualizar_resumo()
+
+    # --- Gravação ---
+
+    def _para_banco(self, valores):
+        return {self.colunas[c]: v for c, v in valores.items() if c in self.colunas}
+
+    def _gravar(self):
+        inserir = [self._para_banco(v) for v in self.novas.values() if v]
+        atualizar = {k: self._para_banco(v) for k, v in self.alteradas.items()}
+        with medir(f'edicao.{self.repositorio.tabela.lower()}.salvar'), transacao() as con, con.cursor() as cursor:
+            return self.repositorio.aplicar_lote(cursor, inserir, atualizar, sorted(self.excluidas))
+
+    async def _on_salvar(self, event):
+        try:
+            resultado = await em_segundo_plano(self._gravar)
+        except Exception as e:
+            # Rollback: nada foi gravado, as alterações continuam pendentes
+            pn.state.notifications.error(f'Nada foi salvo: {str(e)}')
+            return
+        self._limpar()
+        pn.state.notifications.success(
+            f"Salvo: {resultado['atualizadas']} alterada(s), {resultado['inseridas']} nova(s), "
+            f"{resultado['excluidas']} excluída(s)."
+        )
+        self.tabela.fonte.descartar_contagem()
+        await self.tabela.navegar(self.tabela.numero)
+
+    async def _on_descartar(self, event):
+        self._limpar()
+        await self.tabela.navegar(self.tabela.numero)
+
+    def __panel__(self):
+        return pn.Row(self.modo, self.acoes)
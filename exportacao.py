@@ -0,0 +1,203 @@
+import asyncio
+import io
+import secrets
+
+import pandas as pd
+import panel as pn
+from tornado.web import HTTPError, RequestHandler
+
+# Parquet usa o pyarrow (requirements.txt); se ele faltar, a exportação oferece só CSV
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+from cache import CacheTTL
+from conexao import leitura
+from tarefas import executor
+
+# Exportação das tabelas em CSV/Parquet sem montar o resultado inteiro na memória.
+# As linhas saem de um cursor nomeado (server-side) em lotes e vão direto para a resposta HTTP,
+# lote a lote: a memória fica no tamanho de um lote, qualquer que seja o total exportado.
+#
+# A rota de download precisa ser registrada no servidor (principal.py já registra):
+#   panel serve app.py PA.py ed.py bs.py --plugins exportacao
+
+TAMANHO_LOTE = 5000
+PREFIXO_ROTA = '/exportar'
+
+# Pedidos de exportação: token -> (sql, params, formato, nome do arquivo).
+# Só a sessão que gerou o link conhece o token, que expira em 10 minutos.
+_pedidos = CacheTTL(max_itens=1000, ttl=600)
+
+
+class LeitorLotes:
+    """Itera um SELECT em DataFrames de até `tamanho` linhas, via cursor nomeado."""
+
+    def __init__(self, sql, params=None, tamanho=TAMANHO_LOTE):
+        self.sql = sql
+        self.params = params
+        self.tamanho = tamanho
+        self.descricao = None  # cursor.description, disponível depois do primeiro lote
+
+    def __iter__(self):
+        # Cursor nomeado exige transação; leitura() sempre faz rollback e devolve a conexão ao pool
+        with leitura() as con, con.cursor(name=f'exportacao_{secrets.token_hex(6)}') as cursor:
+            cursor.itersize = self.tamanho
+            cursor.execute(self.sql, self.params)
+            linhas = cursor.fetchmany(self.tamanho)
+            self.descricao = cursor.description
+            colunas = [d.name for d in self.descricao]
+            # O primeiro lote sai mesmo vazio, para o arquivo ter pelo menos o cabeçalho
+            yield pd.DataFrame.from_records(linhas, columns=colunas)
+            while linhas:
+                linhas = cursor.fetchmany(self.tamanho)
+                if linhas:
+                    yield pd.DataFrame.from_records(linhas, columns=colunas)
+
+
+# --- Formatos ---
+
+def gerar_csv(leitor):
+    """Bytes do CSV, um pedaço por lote (BOM no início para o Excel reconhecer UTF-8)."""
+    for i, df in enumerate(leitor):
+        yield df.to_csv(index=False, header=(i == 0)).encode('utf-8-sig' if i == 0 else 'utf-8')
+
+
+class _SaidaContinua(io.RawIOBase):
+    """Destino de escrita que só acumula bytes até serem drenados, mantendo a posição total."""
+
+    def __init__(self):
+        self._partes = []
+        self._posicao = 0
+
+    def writable(self):
+        return True
+
+    def write(self, dados):
+        self._partes.append(bytes(dados))
+        self._posicao += len(dados)
+        return len(dados)
+
+    def tell(self):
+        return self._posicao
+
+    def drenar(self):
+        dados = b''.join(self._partes)
+        self._partes.clear()
+        return dados
+
+
+# OIDs dos tipos do Postgres -> tipos Arrow (o resto vira texto)
+_TIPOS_ARROW = {
+    16: lambda d: pa.bool_(),
+    20: lambda d: pa.int64(),
+    21: lambda d: pa.int16(),
+    23: lambda d: pa.int32(),
+    700: lambda d: pa.float32(),
+    701: lambda d: pa.float64(),
+    1700: lambda d: pa.decimal128(d.precision or 38, d.scale or 0) if d.precision else pa.float64(),
+    1082: lambda d: pa.date32(),
+    1114: lambda d: pa.timestamp('us'),
+    1184: lambda d: pa.timestamp('us', tz='UTC'),
+}
+
+
+def _esquema_arrow(descricao):
+    # O esquema vem dos tipos das colunas no banco, não do primeiro lote: uma coluna
+    # toda nula no primeiro lote não pode travar o tipo dos lotes seguintes
+    return pa.schema([
+        (d.name, _TIPOS_ARROW.get(d.type_code, lambda d: pa.string())(d)) for d in descricao
+    ])
+
+
+def gerar_parquet(leitor):
+    """Bytes do Parquet, um row group por lote."""
+    saida = _SaidaContinua()
+    escritor = None
+    for df in leitor:
+        if escritor is None:
+            esquema = _esquema_arrow(leitor.descricao)
+            escritor = pq.ParquetWriter(saida, esquema, compression='snappy')
+        # Numeric sem precisão declarada chega como Decimal; o esquema pede float
+        for campo in esquema:
+            if pa.types.is_floating(campo.type):
+                df[campo.name] = pd.to_numeric(df[campo.name], errors='coerce')
+        escritor.write_table(pa.Table.from_pandas(df, schema=esquema, preserve_index=False))
+        yield saida.drenar()
+    escritor.close()
+    yield saida.drenar()
+
+
+FORMATOS = {'CSV': ('csv', 'text/csv; charset=utf-8', gerar_csv)}
+if pq is not None:
+    FORMATOS['Parquet'] = ('parquet', 'application/vnd.apache.parquet', gerar_parquet)
+
+
+# --- Rota HTTP ---
+
+def registrar_exportacao(sql, params, formato, nome):
+    """Guarda o pedido e devolve a URL de download (válida por 10 minutos)."""
+    token = secrets.token_urlsafe(16)
+    _pedidos.set(token, (sql, params, formato, nome))
+    return f'{PREFIXO_ROTA}/{token}'
+
+
+class ExportacaoHandler(RequestHandler):
+    """Envia a exportação em pedaços (chunked), lendo o banco fora do IOLoop."""
+
+    async def get(self, token):
+        pedido = _pedidos.get(token)
+        if pedido is None:
+            raise HTTPError(404, 'Link de exportação expirado ou inválido.')
+        sql, params, formato, nome = pedido
+        extensao, tipo, gerar = FORMATOS[formato]
+
+        self.set_header('Content-Type', tipo)
+        self.set_header('Content-Disposition', f'attachment; filename="{nome}.{extensao}"')
+
+        partes = gerar(LeitorLotes(sql, params))
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                dados = await loop.run_in_executor(executor, next, partes, None)
+                if dados is None:
+                    break
+                self.write(dados)
+                await self.flush()
+        finally:
+            # Fecha o cursor e devolve a conexão mesmo se o navegador desistir no meio
+            await loop.run_in_executor(executor, partes.close)
+
+
+ROUTES = [(rf'{PREFIXO_ROTA}/([\w-]+)', ExportacaoHandler, {})]
+
+
+# --- Widget ---
+
+class BotaoExportar:
+    """Botão que gera o link de download da consulta atual de uma tela."""
+
+    def __init__(self, obter_fonte, nome):
+        """obter_fonte: função que devolve a FonteKeyset exibida na tela (ex: `lambda: tabela.fonte`)."""
+        self.obter_fonte = obter_fonte
+        self.nome = nome
+        # Com um formato só (sem pyarrow) não há o que escolher
+        self.formato = pn.widgets.RadioButtonGroup(options=list(FORMATOS), value='CSV', button_type='light',
+                                                   visible=len(FORMATOS) > 1)
+        self.botao = pn.widgets.Button(name='⬇️ Exportar', button_type='light')
+        self.link = pn.pane.HTML('', margin=(10, 10))
+        self.botao.on_click(self._on_exportar)
+
+    def _on_exportar(self, event=None):
+        try:
+            sql, params = self.obter_fonte().consulta_completa()
+        except Exception as e:
+            pn.state.notifications.error(f'Erro ao exportar: {str(e)}')
+            return
+        url = registrar_exportacao(sql, params, self.formato.value, self.nome)
+        self.link.object = f'<a href="{url}" target="_blank">📥 Baixar {self.nome} ({self.formato.value})</a>'
+
+    def __panel__(self):
+        return pn.Row(self.formato, self.botao, self.link)
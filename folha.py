@@ -0,0 +1,151 @@
+import argparse
+import calendar
+import datetime
+import io
+
+import numpy as np
+import pandas as pd
+
+from conexao import transacao
+from particoes import garantir
+
+# Folha de pagamento mensal dos bolsistas (grava em Pagamento).
+# Os bolsistas ativos no mês vêm numa consulta só; quem recebe no mês é calculado de uma vez,
+# em colunas (pandas/NumPy), e os pagamentos entram num único INSERT ... SELECT a partir de
+# um COPY. Rodar de novo o mesmo mês não duplica: ON CONFLICT (Id_inscricao, Data_Pagamento)
+# (migracoes/0005_folha_pagamento.sql) ignora o que já foi gravado. Pagamento é particionada
+# por ano (0007): a partição do ano da folha é criada aqui se o particoes.py ainda não a criou.
+# Id_pagamento vem da sequence, acertada depois da carga de povoamente.sql pela 0010.
+#
+# Uso:
+#   python folha.py 2025-04 [--simular]
+
+# Dia do mês em que a folha é paga (Data_Pagamento de todos os pagamentos do mês)
+DIA_PAGAMENTO = 5
+
+# Frequencia -> intervalo em meses entre parcelas, contado a partir do mês de Data_inicio.
+# Parcela Única (0) paga só no mês de início. Cada parcela vale Programa_Auxilio.Valor.
+INTERVALO_MESES = {
+    'Mensal': 1,
+    'Semestral': 6,
+    'Anual': 12,
+    'Parcela Única': 0,
+}
+
+# Ativo no mês: começou até o fim do mês, não terminou antes do início e não foi desligado até o fim
+SQL_BOLSISTAS_ATIVOS = """
+    SELECT B.Id_inscricao, B.Data_inicio, B.Frequencia, P.Valor
+    FROM Bolsista B
+    JOIN Inscricao I ON I.Id_inscricao = B.Id_inscricao
+    JOIN Edital E ON E.Id_edital = I.Id_edital
+    JOIN Programa_Auxilio P ON P.Id_programa = E.Id_programa
+    WHERE B.Data_inicio <= %(fim)s
+      AND (B.Data_fim IS NULL OR B.Data_fim >= %(inicio)s)
+      AND (B.Data_desligamento IS NULL OR B.Data_desligamento > %(fim)s)
+"""
+
+SQL_PREPARACAO = """
+    CREATE TEMP TABLE Stg_Folha (
+        Id_inscricao INTEGER,
+        Valor_pago DECIMAL(10, 2)
+    ) ON COMMIT DROP
+"""
+
+SQL_GRAVAR = """
+    INSERT INTO Pagamento (Valor_pago, Data_Pagamento, Id_inscricao)
+    SELECT Valor_pago, %(data)s, Id_inscricao FROM Stg_Folha
+    ON CONFLICT (Id_inscricao, Data_Pagamento) DO NOTHING
+"""
+
+
+def periodo(ano, mes):
+    """(primeiro dia, último dia, data de pagamento) do mês."""
+    ultimo = calendar.monthrange(ano, mes)[1]
+    return (datetime.date(ano, mes, 1), datetime.date(ano, mes, ultimo),
+            datetime.date(ano, mes, min(DIA_PAGAMENTO, ultimo)))
+
+
+def calcular_folha(bolsistas, ano, mes):
+    """
+    Recebe os bolsistas ativos (colunas id_inscricao, data_inicio, frequencia, valor) e devolve
+    (pagamentos, ignorados): os pagamentos devidos no mês (id_inscricao, valor_pago) e as linhas
+    com Frequencia desconhecida, que ficam de fora para conferência.
+    """
+    inicio = pd.to_datetime(bolsistas['data_inicio'])
+    decorridos = (ano * 12 + mes) - (inicio.dt.year * 12 + inicio.dt.month).to_numpy()
+    intervalo = bolsistas['frequencia'].map(INTERVALO_MESES)
+    conhecida = intervalo.notna().to_numpy()
+    intervalo = intervalo.fillna(1).to_numpy(dtype=np.int64)
+    valor = pd.to_numeric(bolsistas['valor'], errors='coerce').fillna(0).to_numpy()
+
+    # Parcela Única: só no mês de início; demais: a cada `intervalo` meses desde o início
+    devido = np.where(intervalo == 0, decorridos == 0, decorridos % np.maximum(intervalo, 1) == 0)
+    devido &= conhecida & (decorridos >= 0) & (valor > 0)
+
+    pagamentos = pd.DataFrame({
+        'id_inscricao': bolsistas['id_inscricao'].to_numpy()[devido],
+        'valor_pago': valor[devido],
+    })
+    return pagamentos, bolsistas[~conhecida]
+
+
+def gerar_folha(ano, mes, simular=False):
+    """
+    Calcula e grava a folha do mês numa transação.
+    Devolve {'ativos', 'devidos', 'gravados', 'total', 'ignorados': DataFrame}.
+    Com simular=True calcula tudo e desfaz a transação (nada é gravado).
+    """
+    inicio, fim, data_pagamento = periodo(ano, mes)
+    with transacao() as con, con.cursor() as cursor:
+        cursor.execute(SQL_BOLSISTAS_ATIVOS, {'inicio': inicio, 'fim': fim})
+        bolsistas = pd.DataFrame.from_records(cursor.fetchall(), columns=[d.name for d in cursor.description])
+        pagamentos, ignorados = calcular_folha(bolsistas, ano, mes)
+
+        garantir(cursor, ano)
+        cursor.execute(SQL_PREPARACAO)
+        buffer = io.StringIO()
+        pagamentos.to_csv(buffer, index=False, header=False)
+        buffer.seek(0)
+        cursor.copy_expert("COPY Stg_Folha (Id_inscricao, Valor_pago) FROM STDIN WITH (FORMAT csv)", buffer)
+        cursor.execute(SQL_GRAVAR, {'data': data_pagamento})
+        gravados = cursor.rowcount
+
+        if simular:
+            con.rollback()
+
+    return {
+        'ativos': len(bolsistas),
+        'devidos': len(pagamentos),
+        'gravados': gravados,
+        'total': float(pagamentos['valor_pago'].sum()),
+        'ignorados': ignorados,
+    }
+
+
+def _competencia(texto):
+    try:
+        data = datetime.datetime.strptime(texto, '%Y-%m')
+    except ValueError:
+        raise argparse.ArgumentTypeError(f'competência inválida: {texto!r} (use AAAA-MM)')
+    return data.year, data.month
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Gera a folha de pagamento dos bolsistas de um mês')
+    parser.add_argument('competencia', type=_competencia, help='mês da folha, no formato AAAA-MM')
+    parser.add_argument('--simular', action='store_true', help='calcula e mostra o resultado sem gravar')
+    args = parser.parse_args()
+
+    ano, mes = args.competencia
+    resultado = gerar_folha(ano, mes, simular=args.simular)
+
+    print(f"Bolsistas ativos: {resultado['ativos']}")
+    print(f"Pagamentos devidos: {resultado['devidos']} (R$ {resultado['total']:,.2f})")
+    if args.simular:
+        print("Simulação: nada foi gravado.")
+    else:
+        print(f"Gravados agora: {resultado['gravados']} (os demais já estavam na folha)")
+    if len(resultado['ignorados']):
+        print(f"Frequência desconhecida (fora da folha): {len(resultado['ignorados'])}")
+        for _, linha in resultado['ignorados'].head(20).iterrows():
+            print(f"  inscrição {linha['id_inscricao']}: {linha['frequencia']!r}")
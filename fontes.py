@@ -0,0 +1,98 @@
+from conexao import engine_leitura
+from paginacao import FonteKeyset
+
+# Fontes paginadas das telas (colunas, origem e ordem de cada tabela).
+# As telas (app.py, PA.py, ed.py, bs.py) e o benchmark.py usam as mesmas funções: o que o
+# benchmark mede é exatamente a consulta que a tela faz. Os filtros de cada busca ficam na tela
+# (fonte_consulta), aplicados com fonte.filtrar() sobre a fonte devolvida aqui.
+
+# --- Usuários (app.py) ---
+
+# Colunas exibidas na tabela (nome na tela -> expressão SQL).
+# Senha fica de fora: não é lida do banco para a tabela nem para a exportação.
+COLUNAS_USUARIO = {
+    'id_usuario': 'Id_usuario',
+    'cpf': 'CPF',
+    'nome': 'Nome',
+    'email': 'Email',
+    'endereco': 'Endereco',
+    'telefone': 'Telefone',
+}
+
+def fonte_usuarios(relevancia=None):
+    """Fonte paginada no banco (keyset por Id_usuario): só a página visível é buscada."""
+    if relevancia:
+        # Busca por nome: mostra a relevância e ordena pelos mais parecidos primeiro
+        colunas = {**COLUNAS_USUARIO, 'relevancia': relevancia}
+        return FonteKeyset(engine_leitura, colunas, 'Usuario', chave='id_usuario', ordem=('relevancia', 'desc'))
+    return FonteKeyset(engine_leitura, COLUNAS_USUARIO, 'Usuario', chave='id_usuario')
+
+# --- Programas de auxílio (PA.py) ---
+
+COLUNAS_PROGRAMA = {
+    'id_programa': 'Id_programa',
+    'nome_programa': 'Nome_Programa',
+    'descricao': 'Descricao',
+    'valor': 'Valor',
+    'tipo': 'Tipo',
+    'vagas': 'Vagas',
+}
+# Poucos valores distintos: vão para o navegador como category
+CATEGORIAS_PROGRAMA = ('tipo',)
+
+def fonte_programas(relevancia=None):
+    """Fonte paginada no banco (keyset por Id_programa)."""
+    if relevancia:
+        # Busca por nome: mostra a relevância e ordena pelos mais parecidos primeiro
+        colunas = {**COLUNAS_PROGRAMA, 'relevancia': relevancia}
+        return FonteKeyset(engine_leitura, colunas, 'Programa_Auxilio', chave='id_programa',
+                           ordem=('relevancia', 'desc'), categorias=CATEGORIAS_PROGRAMA)
+    return FonteKeyset(engine_leitura, COLUNAS_PROGRAMA, 'Programa_Auxilio', chave='id_programa',
+                       categorias=CATEGORIAS_PROGRAMA)
+
+# --- Editais (ed.py) ---
+
+# Já unindo com o nome do programa para ficar legível
+COLUNAS_EDITAL = {
+    'id_edital': 'E.Id_edital',
+    'data_inicio': 'E.Data_inicio',
+    'data_fim': 'E.Data_fim',
+    'status': 'E.Status',
+    'id_programa': 'E.Id_programa',
+    'nome_programa': 'P.Nome_Programa',
+}
+
+ORIGEM_EDITAL = "Edital E LEFT JOIN Programa_Auxilio P ON E.Id_programa = P.Id_programa"
+
+def fonte_editais():
+    """Fonte paginada no banco (keyset por Id_edital, mais recentes primeiro)."""
+    return FonteKeyset(
+        engine_leitura, COLUNAS_EDITAL, ORIGEM_EDITAL,
+        chave='id_edital', ordem=('id_edital', 'desc'), categorias=('status',)
+    )
+
+# --- Bolsistas (bs.py) ---
+
+# Nomes legíveis em vez de IDs.
+# Quadro_Bolsista já traz os nomes do aluno e do orientador (migracoes/0004_quadro_bolsistas.sql),
+# mantidos por triggers: a consulta do quadro não faz mais JOIN nenhum
+COLUNAS_BOLSISTA = {
+    'ID/Inscrição': 'Q.Id_inscricao',
+    'Estudante': 'Q.Nome_Estudante',
+    'Orientador': 'Q.Nome_Orientador',
+    'data_inicio': 'Q.Data_inicio',
+    'data_fim': 'Q.Data_fim',
+    'frequencia': 'Q.Frequencia',
+}
+
+ORIGEM_BOLSISTA = "Quadro_Bolsista Q"
+
+def fonte_bolsistas():
+    """Keyset por (Data_inicio, Id_inscricao), na ordem do índice IDX_Quadro_Bolsista_Ordem."""
+    return FonteKeyset(
+        engine_leitura, COLUNAS_BOLSISTA, ORIGEM_BOLSISTA,
+        chave='ID/Inscrição', ordem=('data_inicio', 'desc'),
+        # O quadro é mantido por gatilhos de Bolsista e Usuario: escritas nelas invalidam o cache
+        tabelas=['Quadro_Bolsista', 'Bolsista', 'Usuario'],
+        categorias=('frequencia',)
+    )
@@ -0,0 +1,250 @@
+import argparse
+import datetime
+import io
+import time
+
+import numpy as np
+import pandas as pd
+
+from conexao import transacao
+from particoes import garantir
+
+# Gerador de dados sintéticos para testar as telas com volume real (banco local!).
+# Tudo é gerado em colunas com NumPy e carregado com COPY, em blocos, numa única transação.
+# Os IDs continuam a partir do maior existente e as sequences são ajustadas no fim, então dá
+# para rodar em cima do povoamente.sql ou de uma geração anterior.
+#
+# Escala 1 = 10 mil usuários (~1 mil servidores, ~9 mil estudantes), 18 mil inscrições,
+# ~3,6 mil bolsistas e ~30 mil pagamentos. Escala 100 = 1 milhão de usuários.
+#
+# Uso:
+#   python gerar_dados.py --escala 10 [--semente 42]
+
+USUARIOS_POR_ESCALA = 10_000
+FRACAO_SERVIDORES = 0.1
+INSCRICOES_POR_ESTUDANTE = 2
+PROGRAMAS = 20
+EDITAIS_POR_ESCALA = 100
+FRACAO_APROVADOS = 0.2
+LINHAS_POR_COPY = 100_000
+
+NOMES = np.array([
+    'Ana', 'João', 'Maria', 'José', 'Antônio', 'Francisca', 'Carlos', 'Márcia', 'Paulo', 'Luíza',
+    'Pedro', 'Adriana', 'Lucas', 'Juliana', 'Luiz', 'Fernanda', 'Marcos', 'Patrícia', 'Gabriel', 'Aline',
+    'Rafael', 'Sandra', 'Daniel', 'Camila', 'Mateus', 'Beatriz', 'Tiago', 'Letícia', 'Vinícius', 'Débora',
+])
+SOBRENOMES = np.array([
+    'Silva', 'Santos', 'Oliveira', 'Souza', 'Rodrigues', 'Ferreira', 'Alves', 'Pereira', 'Lima', 'Gomes',
+    'Costa', 'Ribeiro', 'Martins', 'Carvalho', 'Araújo', 'Melo', 'Barbosa', 'Cardoso', 'Rocha', 'Dias',
+    'Nascimento', 'Andrade', 'Moreira', 'Nunes', 'Marques', 'Machado', 'Mendes', 'Freitas', 'Conceição', 'Brandão',
+])
+CARGOS = np.array(['Professor', 'Técnico Administrativo', 'Assistente Social', 'Psicólogo', 'Coordenador'])
+SETORES = np.array(['PRAE', 'PROPESQ', 'PROEX', 'Departamento de Computação', 'Departamento de Física'])
+CURSOS = np.array(['Ciência da Computação', 'Engenharia Civil', 'Medicina', 'Direito', 'Pedagogia',
+                   'Física', 'Matemática', 'Letras', 'Arquitetura', 'Enfermagem'])
+BANCOS = np.array(['Banco do Brasil', 'Caixa', 'Itaú', 'Bradesco', 'Santander', 'Nubank'])
+TIPOS = np.array(['Assistência', 'Pesquisa', 'Extensão', 'Alimentação', 'Transporte'])
+FREQUENCIAS = np.array(['Mensal', 'Semestral', 'Anual', 'Parcela Única'])
+
+# (tabela, coluna SERIAL) cujas sequences são ajustadas depois do COPY com IDs explícitos
+SEQUENCES = [
+    ('usuario', 'id_usuario'), ('formulariosocioeconomico', 'id_form'),
+    ('programa_auxilio', 'id_programa'), ('edital', 'id_edital'),
+    ('inscricao', 'id_inscricao'), ('pagamento', 'id_pagamento'),
+]
+
+
+def _copiar(cursor, tabela, df):
+    """COPY do DataFrame para a tabela, em blocos de LINHAS_POR_COPY (memória limitada ao bloco)."""
+    colunas = ', '.join(df.columns)
+    for inicio in range(0, len(df), LINHAS_POR_COPY):
+        buffer = io.StringIO()
+        df.iloc[inicio:inicio + LINHAS_POR_COPY].to_csv(buffer, index=False, header=False)
+        buffer.seek(0)
+        cursor.copy_expert(f"COPY {tabela} ({colunas}) FROM STDIN WITH (FORMAT csv)", buffer)
+
+
+def _proximo_id(cursor, tabela, coluna):
+    cursor.execute(f"SELECT coalesce(max({coluna}), 0) + 1 FROM {tabela}")
+    return cursor.fetchone()[0]
+
+
+def _datas(rng, inicio, dias, n):
+    """n datas aleatórias entre `inicio` e `inicio + dias`."""
+    return np.datetime64(inicio) + rng.integers(0, dias, n).astype('timedelta64[D]')
+
+
+def gerar_tabelas(escala, ids, rng, hoje=None):
+    """
+    Monta os DataFrames de todas as tabelas (sem tocar no banco).
+    `ids`: {tabela: primeiro ID livre}. Devolve uma lista [(tabela, DataFrame)] na ordem das FKs.
+    """
+    hoje = np.datetime64(hoje or datetime.date.today())
+    n_usuarios = max(int(USUARIOS_POR_ESCALA * escala), 20)
+    n_servidores = max(int(n_usuarios * FRACAO_SERVIDORES), 1)
+    n_estudantes = n_usuarios - n_servidores
+
+    # Usuario
+    id_usuario = ids['usuario'] + np.arange(n_usuarios)
+    nomes = pd.Series(rng.choice(NOMES, n_usuarios)) + ' ' + rng.choice(SOBRENOMES, n_usuarios) + ' ' \
+        + rng.choice(SOBRENOMES, n_usuarios)
+    usuarios = pd.DataFrame({
+        'Id_usuario': id_usuario,
+        'CPF': pd.Series(id_usuario).map('{:011d}'.format),
+        'Nome': nomes,
+        'Email': 'usuario' + pd.Series(id_usuario).astype(str) + '@exemplo.edu.br',
+        'Senha': 'senha-gerada',
+        'Endereco': 'Rua ' + pd.Series(rng.choice(SOBRENOMES, n_usuarios)) + ', '
+                    + pd.Series(rng.integers(1, 2000, n_usuarios)).astype(str),
+        'Telefone': pd.Series(rng.integers(10**10, 10**11 - 1, n_usuarios)).astype(str),
+    })
+
+    # Servidor (primeiros usuários) e Estudante (restantes), cada estudante com seu formulário
+    id_servidor = id_usuario[:n_servidores]
+    servidores = pd.DataFrame({
+        'Id_Servidor': id_servidor,
+        'Cargo': rng.choice(CARGOS, n_servidores),
+        'Setor': rng.choice(SETORES, n_servidores),
+    })
+    id_estudante = id_usuario[n_servidores:]
+    id_form = ids['formulariosocioeconomico'] + np.arange(n_estudantes)
+    renda = np.round(rng.gamma(2.0, 450.0, n_estudantes), 2)
+    formularios = pd.DataFrame({
+        'Id_Form': id_form,
+        'Banco': rng.choice(BANCOS, n_estudantes),
+        'Agencia': pd.Series(rng.integers(1000, 9999, n_estudantes)).astype(str),
+        'Conta': pd.Series(rng.integers(10**5, 10**6, n_estudantes)).astype(str),
+        # ~10% sem renda informada
+        'RendaPerCapita': np.where(rng.random(n_estudantes) < 0.1, np.nan, renda),
+    })
+    estudantes = pd.DataFrame({
+        'Id_Estudante': id_estudante,
+        'Matricula': 'G' + pd.Series(id_estudante).astype(str),
+        'Curso': rng.choice(CURSOS, n_estudantes),
+        'Id_Form': id_form,
+    })
+
+    # Programa_Auxilio e Edital (editais nos últimos 2 anos, cada um com 30 a 60 dias)
+    id_programa = ids['programa_auxilio'] + np.arange(PROGRAMAS)
+    programas = pd.DataFrame({
+        'Id_programa': id_programa,
+        'Nome_Programa': [f'Programa Sintético {i}' for i in id_programa],
+        'Descricao': 'Gerado por gerar_dados.py',
+        'Valor': rng.choice([300.0, 400.0, 500.0, 700.0, 1000.0], PROGRAMAS),
+        'Tipo': rng.choice(TIPOS, PROGRAMAS),
+        'Vagas': rng.integers(10, 500, PROGRAMAS) * max(int(escala), 1),
+    })
+    n_editais = max(int(EDITAIS_POR_ESCALA * escala), 1)
+    id_edital = ids['edital'] + np.arange(n_editais)
+    edital_inicio = _datas(rng, hoje - 730, 700, n_editais)
+    edital_fim = edital_inicio + rng.integers(30, 60, n_editais).astype('timedelta64[D]')
+    editais = pd.DataFrame({
+        'Id_edital': id_edital,
+        'Data_inicio': edital_inicio,
+        'Data_fim': edital_fim,
+        'Status': np.where(edital_fim >= hoje, 'Aberto', rng.choice(['Fechado', 'Em Análise'], n_editais)),
+        'Id_programa': rng.choice(id_programa, n_editais),
+    })
+
+    # Inscricao: data dentro do período do edital
+    n_inscricoes = n_estudantes * INSCRICOES_POR_ESTUDANTE
+    id_inscricao = ids['inscricao'] + np.arange(n_inscricoes)
+    pos_edital = rng.integers(0, n_editais, n_inscricoes)
+    duracao = (edital_fim - edital_inicio).astype(np.int64)[pos_edital]
+    sorteio = rng.random(n_inscricoes)
+    status = np.select([sorteio < FRACAO_APROVADOS, sorteio < FRACAO_APROVADOS + 0.2],
+                       ['Aprovado', 'Reprovado'], 'Em Análise')
+    inscricao_estudante = rng.choice(id_estudante, n_inscricoes)
+    inscricoes = pd.DataFrame({
+        'Id_inscricao': id_inscricao,
+        'Data': edital_inicio[pos_edital] + (rng.random(n_inscricoes) * duracao).astype('timedelta64[D]'),
+        'Status': status,
+        'Justificativa': 'Gerada automaticamente',
+        'Id_edital': id_edital[pos_edital],
+        'Id_Estudante': inscricao_estudante,
+    })
+
+    # Bolsista: inscrições aprovadas, bolsa de 12 meses a partir do mês seguinte ao fim do edital
+    aprovadas = status == 'Aprovado'
+    n_bolsistas = int(aprovadas.sum())
+    bolsa_inicio = (edital_fim[pos_edital][aprovadas].astype('datetime64[M]') + 1).astype('datetime64[D]')
+    bolsa_fim = (bolsa_inicio.astype('datetime64[M]') + 12).astype('datetime64[D]') - 1
+    desligado = rng.random(n_bolsistas) < 0.1
+    frequencia = rng.choice(FREQUENCIAS, n_bolsistas, p=[0.85, 0.07, 0.05, 0.03])
+    bolsistas = pd.DataFrame({
+        'Id_inscricao': id_inscricao[aprovadas],
+        'Data_inicio': bolsa_inicio,
+        'Data_fim': bolsa_fim,
+        'Data_desligamento': np.where(
+            desligado, bolsa_inicio + rng.integers(30, 300, n_bolsistas).astype('timedelta64[D]'),
+            np.datetime64('NaT')
+        ),
+        'Frequencia': frequencia,
+        'Id_Orientador': rng.choice(id_servidor, n_bolsistas),
+        'Id_Estudante': inscricao_estudante[aprovadas],
+    })
+
+    # Pagamento: bolsistas mensais, um por mês do início até hoje (ou o fim/desligamento)
+    mensais = frequencia == 'Mensal'
+    ultimo = np.minimum(bolsa_fim, hoje)
+    ultimo = np.where(desligado, np.minimum(ultimo, bolsistas['Data_desligamento'].to_numpy()), ultimo)
+    meses = (ultimo.astype('datetime64[M]') - bolsa_inicio.astype('datetime64[M]')).astype(np.int64) + 1
+    meses = np.where(mensais, np.clip(meses, 0, 12), 0)
+    valor = programas.set_index('Id_programa')['Valor'].reindex(editais['Id_programa']).to_numpy()
+    valor_bolsista = valor[pos_edital][aprovadas]
+    repetido = np.repeat(np.arange(n_bolsistas), meses)
+    ordem_mes = np.arange(len(repetido)) - np.repeat(np.cumsum(meses) - meses, meses)
+    pagamentos = pd.DataFrame({
+        'Id_pagamento': ids['pagamento'] + np.arange(len(repetido)),
+        'Valor_pago': valor_bolsista[repetido],
+        'Data_Pagamento': (bolsa_inicio[repetido].astype('datetime64[M]') + ordem_mes).astype('datetime64[D]') + 4,
+        'Id_inscricao': id_inscricao[aprovadas][repetido],
+    })
+
+    return [
+        ('Usuario', usuarios), ('FormularioSocioeconomico', formularios),
+        ('Servidor', servidores), ('Estudante', estudantes),
+        ('Programa_Auxilio', programas), ('Edital', editais),
+        ('Inscricao', inscricoes), ('Bolsista', bolsistas), ('Pagamento', pagamentos),
+    ]
+
+
+def gerar(escala=1.0, semente=42):
+    """Gera e grava os dados. Devolve {tabela: linhas inseridas}."""
+    rng = np.random.default_rng(semente)
+    contagens = {}
+    with transacao() as con, con.cursor() as cursor:
+        # A carga pode passar do statement_timeout padrão das conexões do pool
+        cursor.execute("SET LOCAL statement_timeout = 0")
+        ids = {tabela: _proximo_id(cursor, tabela, coluna) for tabela, coluna in SEQUENCES}
+        for tabela, df in gerar_tabelas(escala, ids, rng):
+            inicio = time.perf_counter()
+            if tabela == 'Pagamento' and len(df):
+                # Sem a partição do ano, as linhas iriam para Pagamento_Fora
+                anos = df['Data_Pagamento'].dt.year
+                garantir(cursor, int(anos.max()), int(anos.min()))
+            _copiar(cursor, tabela, df)
+            contagens[tabela] = len(df)
+            print(f"  {tabela}: {len(df):,} linhas em {time.perf_counter() - inicio:.1f}s")
+        for tabela, coluna in SEQUENCES:
+            cursor.execute(
+                f"SELECT setval(pg_get_serial_sequence('{tabela}', '{coluna}'), (SELECT max({coluna}) FROM {tabela}))"
+            )
+    # Estatísticas novas para o planejador (fora da transação da carga)
+    with transacao() as con, con.cursor() as cursor:
+        cursor.execute("SET LOCAL statement_timeout = 0")
+        cursor.execute("ANALYZE")
+    return contagens
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Gera dados sintéticos consistentes em todas as tabelas (banco local)')
+    parser.add_argument('--escala', type=float, default=1.0,
+                        help=f'multiplicador de volume (1 = {USUARIOS_POR_ESCALA:,} usuários)')
+    parser.add_argument('--semente', type=int, default=42, help='semente do gerador aleatório')
+    args = parser.parse_args()
+
+    print(f"Gerando escala {args.escala} (semente {args.semente})...")
+    inicio = time.perf_counter()
+    contagens = gerar(args.escala, args.semente)
+    print(f"Total: {sum(contagens.values()):,} linhas em {time.perf_counter() - inicio:.1f}s")
@@ -0,0 +1,206 @@
+import argparse
+import csv
+import sys
+
+from conexao import transacao
+
+# Importação em lote de calouros (Usuario + Estudante + FormularioSocioeconomico).
+# O CSV vai inteiro para uma tabela de preparação via COPY FROM STDIN (streaming, sem INSERT
+# linha a linha); validação e gravação acontecem em SQL, por conjunto, numa única transação.
+#
+# Uso:
+#   python importacao.py calouros.csv [--separador ';'] [--rejeitados rejeitados.csv]
+#
+# Colunas esperadas (cabeçalho obrigatório, nesta ordem):
+COLUNAS_CSV = [
+    'cpf', 'nome', 'email', 'senha', 'endereco', 'telefone',
+    'matricula', 'curso',
+    'banco', 'agencia', 'conta', 'renda_per_capita',
+]
+
+SQL_PREPARACAO = """
+    CREATE TEMP TABLE Stg_Importacao (
+        Linha BIGINT GENERATED ALWAYS AS IDENTITY,
+        cpf TEXT, nome TEXT, email TEXT, senha TEXT, endereco TEXT, telefone TEXT,
+        matricula TEXT, curso TEXT,
+        banco TEXT, agencia TEXT, conta TEXT, renda_per_capita TEXT,
+        Id_usuario INTEGER,
+        Id_Form INTEGER,
+        Erro TEXT
+    ) ON COMMIT DROP
+"""
+
+# Regras aplicadas a todas as linhas de uma vez; a primeira que falhar vira o motivo da rejeição.
+# Toda coluna VARCHAR de destino tem a sua regra de tamanho (criacao.sql): um valor longo demais
+# rejeita só a linha, em vez de abortar a importação inteira com "value too long".
+SQL_VALIDAR = r"""
+    UPDATE Stg_Importacao s SET Erro = CASE
+        WHEN coalesce(trim(s.cpf), '') = '' THEN 'CPF vazio'
+        WHEN length(trim(s.cpf)) > 14 THEN 'CPF com mais de 14 caracteres'
+        WHEN coalesce(trim(s.nome), '') = '' THEN 'Nome vazio'
+        WHEN length(trim(s.nome)) > 255 THEN 'Nome com mais de 255 caracteres'
+        WHEN coalesce(trim(s.email), '') = '' THEN 'E-mail vazio'
+        WHEN length(trim(s.email)) > 255 THEN 'E-mail com mais de 255 caracteres'
+        WHEN length(trim(s.senha)) > 255 THEN 'Senha com mais de 255 caracteres'
+        WHEN length(trim(s.endereco)) > 255 THEN 'Endereço com mais de 255 caracteres'
+        WHEN length(trim(s.telefone)) > 20 THEN 'Telefone com mais de 20 caracteres'
+        WHEN coalesce(trim(s.matricula), '') = '' THEN 'Matrícula vazia'
+        WHEN length(trim(s.matricula)) > 50 THEN 'Matrícula com mais de 50 caracteres'
+        WHEN length(trim(s.curso)) > 100 THEN 'Curso com mais de 100 caracteres'
+        WHEN length(trim(s.banco)) > 100 THEN 'Banco com mais de 100 caracteres'
+        WHEN length(trim(s.agencia)) > 20 THEN 'Agência com mais de 20 caracteres'
+        WHEN length(trim(s.conta)) > 20 THEN 'Conta com mais de 20 caracteres'
+        WHEN coalesce(trim(s.senha), '') = ''
+             AND NOT EXISTS (SELECT 1 FROM Usuario U WHERE U.CPF = trim(s.cpf))
+            THEN 'Senha vazia para usuário novo'
+        WHEN coalesce(trim(s.renda_per_capita), '') <> ''
+             AND trim(s.renda_per_capita) !~ '^\d{1,8}([.,]\d{1,2})?$'
+            THEN 'Renda per capita inválida'
+    END
+"""
+
+# CPF repetido no arquivo: vale a última ocorrência
+SQL_CPF_REPETIDO = """
+    UPDATE Stg_Importacao s SET Erro = 'CPF repetido no arquivo (vale a linha ' || d.ultima || ')'
+    FROM (
+        SELECT trim(cpf) AS cpf, max(Linha) AS ultima
+        FROM Stg_Importacao WHERE Erro IS NULL
+        GROUP BY trim(cpf) HAVING count(*) > 1
+    ) d
+    WHERE trim(s.cpf) = d.cpf AND s.Linha <> d.ultima AND s.Erro IS NULL
+"""
+
+# Matrícula repetida no arquivo (para CPFs diferentes) ou já usada por outro estudante
+SQL_MATRICULA_EM_USO = """
+    UPDATE Stg_Importacao s SET Erro = 'Matrícula repetida no arquivo (linha ' || d.primeira || ')'
+    FROM (
+        SELECT trim(matricula) AS matricula, min(Linha) AS primeira
+        FROM Stg_Importacao WHERE Erro IS NULL
+        GROUP BY trim(matricula) HAVING count(*) > 1
+    ) d
+    WHERE trim(s.matricula) = d.matricula AND s.Linha <> d.primeira AND s.Erro IS NULL;
+
+    UPDATE Stg_Importacao s SET Erro = 'Matrícula já pertence a outro estudante'
+    FROM Estudante E
+    JOIN Usuario U ON E.Id_Estudante = U.Id_usuario
+    WHERE E.Matricula = trim(s.matricula) AND U.CPF <> trim(s.cpf) AND s.Erro IS NULL;
+"""
+
+SQL_UPSERT_USUARIO = """
+    WITH gravados AS (
+        INSERT INTO Usuario (CPF, Nome, Email, Senha, Endereco, Telefone)
+        SELECT trim(cpf), trim(nome), trim(email), coalesce(nullif(trim(senha), ''), ''),
+               nullif(trim(endereco), ''), nullif(trim(telefone), '')
+        FROM Stg_Importacao WHERE Erro IS NULL
+        ON CONFLICT (CPF) DO UPDATE SET
+            Nome = EXCLUDED.Nome,
+            Email = EXCLUDED.Email,
+            Senha = coalesce(nullif(EXCLUDED.Senha, ''), Usuario.Senha),
+            Endereco = coalesce(EXCLUDED.Endereco, Usuario.Endereco),
+            Telefone = coalesce(EXCLUDED.Telefone, Usuario.Telefone)
+        RETURNING (xmax = 0) AS novo
+    )
+    SELECT count(*) FILTER (WHERE novo), count(*) FILTER (WHERE NOT novo) FROM gravados
+"""
+
+# Estudante herda o ID do Usuario: resolve pelo CPF (UNIQUE) depois do upsert
+SQL_LIGAR_IDS = """
+    UPDATE Stg_Importacao s SET Id_usuario = U.Id_usuario, Id_Form = E.Id_Form
+    FROM Usuario U
+    LEFT JOIN Estudante E ON E.Id_Estudante = U.Id_usuario
+    WHERE U.CPF = trim(s.cpf) AND s.Erro IS NULL
+"""
+
+# Formulário: atualiza o já vinculado ao estudante ou reserva um ID novo na sequence
+SQL_UPSERT_FORMULARIO = """
+    UPDATE Stg_Importacao
+    SET Id_Form = nextval(pg_get_serial_sequence('formulariosocioeconomico', 'id_form'))
+    WHERE Erro IS NULL AND Id_Form IS NULL
+      AND coalesce(banco, agencia, conta, renda_per_capita) IS NOT NULL;
+
+    INSERT INTO FormularioSocioeconomico (Id_Form, Banco, Agencia, Conta, RendaPerCapita)
+    SELECT Id_Form, nullif(trim(banco), ''), nullif(trim(agencia), ''), nullif(trim(conta), ''),
+           replace(nullif(trim(renda_per_capita), ''), ',', '.')::DECIMAL(10, 2)
+    FROM Stg_Importacao
+    WHERE Erro IS NULL AND Id_Form IS NOT NULL
+      AND coalesce(banco, agencia, conta, renda_per_capita) IS NOT NULL
+    ON CONFLICT (Id_Form) DO UPDATE SET
+        Banco = EXCLUDED.Banco,
+        Agencia = EXCLUDED.Agencia,
+        Conta = EXCLUDED.Conta,
+        RendaPerCapita = EXCLUDED.RendaPerCapita;
+"""
+
+SQL_UPSERT_ESTUDANTE = """
+    INSERT INTO Estudante (Id_Estudante, Matricula, Curso, Id_Form)
+    SELECT Id_usuario, trim(matricula), nullif(trim(curso), ''), Id_Form
+    FROM Stg_Importacao WHERE Erro IS NULL
+    ON CONFLICT (Id_Estudante) DO UPDATE SET
+        Matricula = EXCLUDED.Matricula,
+        Curso = coalesce(EXCLUDED.Curso, Estudante.Curso),
+        Id_Form = coalesce(EXCLUDED.Id_Form, Estudante.Id_Form)
+"""
+
+
+def importar_estudantes(arquivo, separador=','):
+    """
+    Importa um CSV aberto (modo texto) numa transação só.
+    Devolve {'lidas', 'inseridos', 'atualizados', 'rejeitadas': [(linha, cpf, motivo), ...]}.
+    A linha informada é a do registro no arquivo, sem contar o cabeçalho.
+    """
+    if len(separador) != 1 or separador in "'\\":
+        raise ValueError(f'Separador inválido: {separador!r}')
+
+    with transacao() as con, con.cursor() as cursor:
+        cursor.execute(SQL_PREPARACAO)
+        cursor.copy_expert(
+            f"COPY Stg_Importacao ({', '.join(COLUNAS_CSV)}) FROM STDIN "
+            f"WITH (FORMAT csv, HEADER true, DELIMITER '{separador}')",
+            arquivo
+        )
+        cursor.execute("CREATE INDEX ON Stg_Importacao (trim(cpf))")
+        cursor.execute("ANALYZE Stg_Importacao")
+
+        cursor.execute(SQL_VALIDAR)
+        lidas = cursor.rowcount
+        cursor.execute(SQL_CPF_REPETIDO)
+        cursor.execute(SQL_MATRICULA_EM_USO)
+
+        cursor.execute(SQL_UPSERT_USUARIO)
+        inseridos, atualizados = cursor.fetchone()
+        cursor.execute(SQL_LIGAR_IDS)
+        cursor.execute(SQL_UPSERT_FORMULARIO)
+        cursor.execute(SQL_UPSERT_ESTUDANTE)
+
+        cursor.execute("SELECT Linha, cpf, Erro FROM Stg_Importacao WHERE Erro IS NOT NULL ORDER BY Linha")
+        rejeitadas = cursor.fetchall()
+
+    return {'lidas': lidas, 'inseridos': inseridos, 'atualizados': atualizados, 'rejeitadas': rejeitadas}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Importa calouros (Usuario/Estudante/Formulário) de um CSV')
+    parser.add_argument('arquivo', help=f"CSV com cabeçalho: {','.join(COLUNAS_CSV)}")
+    parser.add_argument('--separador', default=',', help="separador do CSV (padrão ',')")
+    parser.add_argument('--rejeitados', help='grava as linhas rejeitadas e o motivo neste CSV')
+    args = parser.parse_args()
+
+    # utf-8-sig: aceita o BOM que o Excel coloca no início do arquivo
+    with open(args.arquivo, encoding='utf-8-sig', newline='') as f:
+        resultado = importar_estudantes(f, args.separador)
+
+    print(f"Linhas lidas: {resultado['lidas']}")
+    print(f"Usuários novos: {resultado['inseridos']} | atualizados: {resultado['atualizados']}")
+    print(f"Rejeitadas: {len(resultado['rejeitadas'])}")
+
+    if resultado['rejeitadas']:
+        if args.rejeitados:
+            with open(args.rejeitados, 'w', encoding='utf-8', newline='') as f:
+                escritor = csv.writer(f, delimiter=args.separador)
+                escritor.writerow(['linha', 'cpf', 'motivo'])
+                escritor.writerows(resultado['rejeitadas'])
+            print(f"Detalhes em {args.rejeitados}")
+        else:
+            for linha, cpf, motivo in resultado['rejeitadas'][:20]:
+                print(f"  linha {linha} ({cpf}): {motivo}")
+        sys.exit(1)
@@ -0,0 +1,94 @@
+import datetime
+
+import pandas as pd
+
+from cache import CacheTTL
+from conexao import engine_leitura
+
+# Indicadores da visão geral por programa de auxílio (tela visao_geral.py).
+# Tudo é somado no banco (GROUP BY): só o resultado agregado, uma linha por programa
+# (ou por programa e mês), chega ao pandas. O resultado fica num cache do processo por
+# TEMPO_CACHE segundos: quantos gestores tiverem a tela aberta, o banco calcula uma vez.
+
+TEMPO_CACHE = 300  # segundos
+MESES_PAGAMENTOS = 12
+
+_cache_painel = CacheTTL(max_itens=8, ttl=TEMPO_CACHE)
+
+SQL_RESUMO_PROGRAMAS = """
+    WITH editais AS (
+        SELECT Id_programa, count(*) FILTER (WHERE Status = 'Aberto') AS editais_abertos
+        FROM Edital
+        GROUP BY Id_programa
+    ),
+    inscricoes AS (
+        SELECT E.Id_programa, count(*) AS inscricoes
+        FROM Inscricao I
+        JOIN Edital E ON E.Id_edital = I.Id_edital
+        GROUP BY E.Id_programa
+    ),
+    ocupadas AS (
+        SELECT E.Id_programa, count(*) AS vagas_ocupadas
+        FROM Bolsista B
+        JOIN Inscricao I ON I.Id_inscricao = B.Id_inscricao
+        JOIN Edital E ON E.Id_edital = I.Id_edital
+        WHERE B.Data_desligamento IS NULL
+          AND (B.Data_fim IS NULL OR B.Data_fim >= CURRENT_DATE)
+        GROUP BY E.Id_programa
+    )
+    SELECT P.Id_programa, P.Nome_Programa,
+           coalesce(ED.editais_abertos, 0) AS editais_abertos,
+           coalesce(IN_.inscricoes, 0) AS inscricoes,
+           coalesce(OC.vagas_ocupadas, 0) AS vagas_ocupadas,
+           coalesce(P.Vagas, 0) AS vagas
+    FROM Programa_Auxilio P
+    LEFT JOIN editais ED ON ED.Id_programa = P.Id_programa
+    LEFT JOIN inscricoes IN_ ON IN_.Id_programa = P.Id_programa
+    LEFT JOIN ocupadas OC ON OC.Id_programa = P.Id_programa
+    ORDER BY P.Nome_Programa
+"""
+
+SQL_PAGAMENTOS_MES = """
+    SELECT P.Id_programa, P.Nome_Programa, date_trunc('month', Pg.Data_Pagamento)::date AS mes,
+           sum(Pg.Valor_pago) AS total
+    FROM Pagamento Pg
+    JOIN Inscricao I ON I.Id_inscricao = Pg.Id_inscricao
+    JOIN Edital E ON E.Id_edital = I.Id_edital
+    JOIN Programa_Auxilio P ON P.Id_programa = E.Id_programa
+    WHERE Pg.Data_Pagamento >= date_trunc('month', CURRENT_DATE) - make_interval(months => %(meses)s - 1)
+    GROUP BY P.Id_programa, P.Nome_Programa, date_trunc('month', Pg.Data_Pagamento)
+"""
+
+
+def _resumo_programas():
+    df = pd.read_sql_query(SQL_RESUMO_PROGRAMAS, engine_leitura)
+    df['vagas_livres'] = (df['vagas'] - df['vagas_ocupadas']).clip(lower=0)
+    return df
+
+
+def _pagamentos_mes():
+    df = pd.read_sql_query(SQL_PAGAMENTOS_MES, engine_leitura, params={'meses': MESES_PAGAMENTOS})
+    if df.empty:
+        return pd.DataFrame(columns=['id_programa', 'nome_programa'])
+    # Uma linha por programa, uma coluna por mês (o pivot é sobre as somas, poucas linhas).
+    # Agrupado pelo ID: dois programas com o mesmo nome continuam em linhas separadas
+    df['mes'] = pd.to_datetime(df['mes']).dt.strftime('%Y-%m')
+    df['total'] = pd.to_numeric(df['total'])
+    tabela = df.pivot_table(index=['id_programa', 'nome_programa'], columns='mes', values='total',
+                            aggfunc='sum', fill_value=0)
+    tabela = tabela.sort_index(axis=1).reset_index().sort_values(['nome_programa', 'id_programa'])
+    tabela.columns.name = None
+    return tabela.reset_index(drop=True)
+
+
+def carregar_painel(recalcular=False):
+    """
+    (resumo por programa, pagamentos por mês, horário do cálculo), do cache se ainda valer.
+    Com `recalcular`, descarta o cache antes (botão Atualizar): o resultado é sempre do banco.
+    """
+    if recalcular:
+        _cache_painel.invalidar('painel')
+
+    def calcular():
+        return _resumo_programas(), _pagamentos_mes(), datetime.datetime.now()
+    return _cache_painel.get_or_set('painel', calcular)
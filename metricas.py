@@ -0,0 +1,297 @@
+import asyncio
+import bisect
+import contextvars
+import functools
+import hashlib
+import os
+import re
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+
+import pandas as pd
+import psycopg2.extensions
+import tornado.web
+from sqlalchemy import event
+
+# Latência por operação (callbacks das telas) e por comando SQL, em histogramas no próprio processo.
+# - Operações: `medir('app.on_inserir')` / `@cronometrado('app.on_inserir')` em volta do callback.
+# - SQL: eventos do SQLAlchemy (pd.read_sql & cia) e o CursorMedido (cursores de transacao()/leitura()).
+# Cada comando é contado junto com a operação em andamento (contextvar, copiado para o thread
+# por em_segundo_plano). Tudo sai em /metricas no formato texto do Prometheus e na tela admin.py.
+#
+# /metricas e o "Zerar métricas" da admin.py pedem o token de BOLSAS_TOKEN_METRICAS (no .env):
+# no Prometheus, `authorization: {credentials: <token>}` (Bearer) ou `params: {token: [<token>]}`.
+# Sem a variável definida, os dois ficam fechados.
+
+# Limites superiores dos baldes, em segundos
+BALDES = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+MAX_COMANDOS = 500        # comandos SQL distintos acompanhados (os demais caem em OUTROS)
+TAMANHO_SQL = 300         # caracteres do SQL guardados para exibição
+SEM_OPERACAO = '-'
+OUTROS = '(outros comandos)'
+
+_EXECUTE = re.compile(r'\s*EXECUTE\s+(\w+)', re.IGNORECASE)
+
+operacao_atual = contextvars.ContextVar('operacao_atual', default=SEM_OPERACAO)
+
+
+class Histograma:
+    """Contagem por balde + soma, máximo, linhas e erros de uma série."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.baldes = [0] * (len(BALDES) + 1)  # o último é +Inf
+        self.contagem = 0
+        self.soma = 0.0
+        self.maximo = 0.0
+        self.linhas = 0
+        self.erros = 0
+
+    def observar(self, segundos, linhas=None, erro=False):
+        with self._lock:
+            self.baldes[bisect.bisect_left(BALDES, segundos)] += 1
+            self.contagem += 1
+            self.soma += segundos
+            self.maximo = max(self.maximo, segundos)
+            if linhas is not None and linhas > 0:
+                self.linhas += linhas
+            if erro:
+                self.erros += 1
+
+    def percentil(self, q):
+        """Estimativa do percentil q (0..1) por interpolação dentro do balde, em segundos."""
+        if not self.contagem:
+            return 0.0
+        alvo = q * self.contagem
+        acumulado = 0
+        for i, n in enumerate(self.baldes):
+            if n and acumulado + n >= alvo:
+                inicio = BALDES[i - 1] if i else 0.0
+                fim = BALDES[i] if i < len(BALDES) else self.maximo
+                return min(inicio + (fim - inicio) * (alvo - acumulado) / n, self.maximo)
+            acumulado += n
+        return self.maximo
+
+
+class Registro:
+    """Histogramas por operação e por (operação, comando SQL)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.operacoes = {}  # nome -> Histograma
+        self.comandos = {}   # (operação, id do SQL) -> Histograma
+        self.textos = {}     # id do SQL -> SQL normalizado
+        self.apelidos = {}   # comando preparado -> SQL original (preparados.py)
+
+    def _serie(self, tabela, chave):
+        serie = tabela.get(chave)
+        if serie is None:
+            with self._lock:
+                serie = tabela.setdefault(chave, Histograma())
+        return serie
+
+    def observar_operacao(self, nome, segundos, erro=False):
+        self._serie(self.operacoes, nome).observar(segundos, erro=erro)
+
+    def apelidar(self, nome, sql):
+        """`EXECUTE nome(...)` passa a ser contado como o SQL original do comando preparado."""
+        self.apelidos[nome] = sql
+
+    def observar_comando(self, sql, segundos, linhas=None, erro=False):
+        preparado = _EXECUTE.match(str(sql))
+        if preparado and preparado.group(1) in self.apelidos:
+            sql = self.apelidos[preparado.group(1)]
+        texto = normalizar_sql(sql)
+        ident = hashlib.sha1(texto.encode()).hexdigest()[:10]
+        if ident not in self.textos:
+            with self._lock:
+                if len(self.textos) >= MAX_COMANDOS:
+                    ident, texto = OUTROS, OUTROS
+                self.textos.setdefault(ident, texto)
+        self._serie(self.comandos, (operacao_atual.get(), ident)).observar(segundos, linhas, erro)
+
+    def limpar(self):
+        with self._lock:
+            self.operacoes.clear()
+            self.comandos.clear()
+            self.textos.clear()
+
+
+registro = Registro()
+
+
+def normalizar_sql(sql):
+    return re.sub(r'\s+', ' ', str(sql)).strip()[:TAMANHO_SQL]
+
+
+# --- Operações (callbacks) ---
+
+@contextmanager
+def medir(nome):
+    """Mede o bloco como a operação `nome`; os comandos SQL executados nele ficam associados a ela."""
+    token = operacao_atual.set(nome)
+    inicio = time.perf_counter()
+    erro = False
+    try:
+        yield
+    except BaseException:
+        erro = True
+        raise
+    finally:
+        registro.observar_operacao(nome, time.perf_counter() - inicio, erro)
+        operacao_atual.reset(token)
+
+
+def cronometrado(nome):
+    """Decorador de `medir` para funções normais e corrotinas (callbacks do Panel)."""
+    def decorar(funcao):
+        if asyncio.iscoroutinefunction(funcao):
+            @functools.wraps(funcao)
+            async def envolvida(*args, **kwargs):
+                with medir(nome):
+                    return await funcao(*args, **kwargs)
+        else:
+            @functools.wraps(funcao)
+            def envolvida(*args, **kwargs):
+                with medir(nome):
+                    return funcao(*args, **kwargs)
+        return envolvida
+    return decorar
+
+
+# --- SQL ---
+
+def instrumentar_engine(engine):
+    """Registra os eventos do SQLAlchemy que medem cada comando executado pela engine."""
+    @event.listens_for(engine, 'before_cursor_execute')
+    def antes(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('inicio_metricas', []).append(time.perf_counter())
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def depois(conn, cursor, statement, parameters, context, executemany):
+        inicio = conn.info['inicio_metricas'].pop()
+        registro.observar_comando(statement, time.perf_counter() - inicio, cursor.rowcount)
+
+    @event.listens_for(engine, 'handle_error')
+    def falhou(contexto):
+        pilha = contexto.connection.info.get('inicio_metricas') if contexto.connection is not None else None
+        if pilha:
+            registro.observar_comando(contexto.statement, time.perf_counter() - pilha.pop(), erro=True)
+
+
+class CursorMedido(psycopg2.extensions.cursor):
+    """Cursor psycopg2 que mede execute/executemany/copy_expert (usado por transacao() e leitura())."""
+
+    def _medido(self, metodo, sql, *args, **kwargs):
+        inicio = time.perf_counter()
+        try:
+            resultado = metodo(sql, *args, **kwargs)
+        except Exception:
+            registro.observar_comando(sql, time.perf_counter() - inicio, erro=True)
+            raise
+        registro.observar_comando(sql, time.perf_counter() - inicio, self.rowcount)
+        return resultado
+
+    def execute(self, query, vars=None):
+        return self._medido(super().execute, query, vars)
+
+    def executemany(self, query, vars_list):
+        return self._medido(super().executemany, query, vars_list)
+
+    def copy_expert(self, sql, file, size=8192):
+        return self._medido(super().copy_expert, sql, file, size)
+
+
+# --- Consulta dos resultados ---
+
+def operacoes():
+    """DataFrame com uma linha por operação (tempos em ms), da mais lenta (p99) para a mais rápida."""
+    linhas = [
+        {'operacao': nome, 'chamadas': h.contagem, 'erros': h.erros,
+         'media_ms': 1000 * h.soma / h.contagem if h.contagem else 0.0,
+         'p50_ms': 1000 * h.percentil(0.5), 'p99_ms': 1000 * h.percentil(0.99), 'max_ms': 1000 * h.maximo}
+        for nome, h in list(registro.operacoes.items())
+    ]
+    df = pd.DataFrame(linhas, columns=['operacao', 'chamadas', 'erros', 'media_ms', 'p50_ms', 'p99_ms', 'max_ms'])
+    return df.sort_values('p99_ms', ascending=False, ignore_index=True).round(2)
+
+
+def comandos_mais_lentos(limite=20):
+    """DataFrame com os comandos SQL de maior tempo total (operação, execuções, linhas, tempos em ms)."""
+    linhas = [
+        {'operacao': operacao, 'sql': registro.textos.get(ident, ident), 'execucoes': h.contagem,
+         'erros': h.erros, 'linhas': h.linhas, 'total_ms': 1000 * h.soma,
+         'media_ms': 1000 * h.soma / h.contagem if h.contagem else 0.0,
+         'p99_ms': 1000 * h.percentil(0.99), 'max_ms': 1000 * h.maximo}
+        for (operacao, ident), h in list(registro.comandos.items())
+    ]
+    df = pd.DataFrame(linhas, columns=['operacao', 'sql', 'execucoes', 'erros', 'linhas',
+                                       'total_ms', 'media_ms', 'p99_ms', 'max_ms'])
+    return df.sort_values('total_ms', ascending=False, ignore_index=True).head(limite).round(2)
+
+
+def _escapar(valor):
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _rotulos(**rotulos):
+    return ','.join(f'{k}="{_escapar(v)}"' for k, v in rotulos.items())
+
+
+def _exportar_histograma(saida, metrica, rotulos, h):
+    acumulado = 0
+    for limite, n in zip((*BALDES, '+Inf'), h.baldes):
+        acumulado += n
+        saida.append(f'{metrica}_bucket{{{rotulos},le="{limite}"}} {acumulado}')
+    saida.append(f'{metrica}_sum{{{rotulos}}} {h.soma}')
+    saida.append(f'{metrica}_count{{{rotulos}}} {h.contagem}')
+
+
+def texto_prometheus():
+    """Todas as séries no formato texto de exposição do Prometheus (0.0.4)."""
+    saida = [
+        '# HELP bolsas_operacao_segundos Latência dos callbacks das telas.',
+        '# TYPE bolsas_operacao_segundos histogram',
+    ]
+    for nome, h in sorted(registro.operacoes.items()):
+        _exportar_histograma(saida, 'bolsas_operacao_segundos', _rotulos(operacao=nome), h)
+    saida += ['# HELP bolsas_operacao_erros_total Callbacks que terminaram com exceção.',
+              '# TYPE bolsas_operacao_erros_total counter']
+    saida += [f'bolsas_operacao_erros_total{{{_rotulos(operacao=nome)}}} {h.erros}'
+              for nome, h in sorted(registro.operacoes.items())]
+
+    # O texto do SQL fica fora dos rótulos (cardinalidade); `comando` é o id mostrado em admin.py
+    saida += ['# HELP bolsas_sql_segundos Latência dos comandos SQL por operação.',
+              '# TYPE bolsas_sql_segundos histogram']
+    comandos = sorted(registro.comandos.items())
+    for (operacao, ident), h in comandos:
+        _exportar_histograma(saida, 'bolsas_sql_segundos', _rotulos(operacao=operacao, comando=ident), h)
+    for metrica, campo, ajuda in (('bolsas_sql_linhas_total', 'linhas', 'Linhas devolvidas/afetadas.'),
+                                  ('bolsas_sql_erros_total', 'erros', 'Comandos SQL que falharam.')):
+        saida += [f'# HELP {metrica} {ajuda}', f'# TYPE {metrica} counter']
+        saida += [f'{metrica}{{{_rotulos(operacao=operacao, comando=ident)}}} {getattr(h, campo)}'
+                  for (operacao, ident), h in comandos]
+    return '\n'.join(saida) + '\n'
+
+
+def token_valido(token):
+    """True se `token` é o BOLSAS_TOKEN_METRICAS configurado (comparação em tempo constante)."""
+    esperado = os.getenv('BOLSAS_TOKEN_METRICAS', '')
+    return bool(esperado) and secrets.compare_digest((token or '').encode(), esperado.encode())
+
+
+class MetricasHandler(tornado.web.RequestHandler):
+    """GET /metricas: texto para o Prometheus (registrado em principal.py), com o token."""
+
+    def get(self):
+        autorizacao = self.request.headers.get('Authorization', '')
+        token = autorizacao[len('Bearer '):] if autorizacao.startswith('Bearer ') else self.get_argument('token', '')
+        if not token_valido(token):
+            raise tornado.web.HTTPError(403, 'Token de métricas ausente ou inválido.')
+        self.set_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.write(texto_prometheus())
+
+
+ROUTES = [(r'/metricas', MetricasHandler, {})]
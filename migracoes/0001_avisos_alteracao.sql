@@ -0,0 +1,30 @@
+-- Avisos de alteração (LISTEN/NOTIFY)
+-- As telas guardam em memória as listas dos seletores (ver notificacoes.py) e só recarregam
+-- quando recebem um aviso no canal 'bolsas_alteracoes' com o nome da tabela alterada.
+-- Trigger por comando (FOR EACH STATEMENT): um INSERT de mil linhas gera um único aviso.
+CREATE OR REPLACE FUNCTION notificar_alteracao() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify('bolsas_alteracoes', TG_TABLE_NAME);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS TRG_Notifica_Usuario ON Usuario;
+CREATE TRIGGER TRG_Notifica_Usuario AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON Usuario
+    FOR EACH STATEMENT EXECUTE FUNCTION notificar_alteracao();
+
+DROP TRIGGER IF EXISTS TRG_Notifica_Servidor ON Servidor;
+CREATE TRIGGER TRG_Notifica_Servidor AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON Servidor
+    FOR EACH STATEMENT EXECUTE FUNCTION notificar_alteracao();
+
+DROP TRIGGER IF EXISTS TRG_Notifica_Estudante ON Estudante;
+CREATE TRIGGER TRG_Notifica_Estudante AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON Estudante
+    FOR EACH STATEMENT EXECUTE FUNCTION notificar_alteracao();
+
+DROP TRIGGER IF EXISTS TRG_Notifica_Inscricao ON Inscricao;
+CREATE TRIGGER TRG_Notifica_Inscricao AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON Inscricao
+    FOR EACH STATEMENT EXECUTE FUNCTION notificar_alteracao();
+
+DROP TRIGGER IF EXISTS TRG_Notifica_Programa ON Programa_Auxilio;
+CREATE TRIGGER TRG_Notifica_Programa AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON Programa_Auxilio
+    FOR EACH STATEMENT EXECUTE FUNCTION notificar_alteracao();
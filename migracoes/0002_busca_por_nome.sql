@@ -0,0 +1,14 @@
+-- Busca por nome (pg_trgm + unaccent)
+-- Índices GIN de trigramas sobre o nome normalizado (minúsculas, sem acento): atendem
+-- "contém" (LIKE '%x%') e ordenação por relevância sem varrer a tabela inteira.
+-- As consultas precisam usar exatamente a mesma expressão: lower(f_unaccent(coluna)) (ver busca.py).
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE EXTENSION IF NOT EXISTS unaccent;
+
+-- unaccent() não é IMMUTABLE (depende do dicionário), então não pode ir direto num índice
+CREATE OR REPLACE FUNCTION f_unaccent(text) RETURNS text AS $$
+    SELECT public.unaccent('public.unaccent'::regdictionary, $1)
+$$ LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT;
+
+CREATE INDEX IF NOT EXISTS IDX_Usuario_Nome_Trgm ON Usuario USING GIN (lower(f_unaccent(Nome)) gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS IDX_Programa_Nome_Trgm ON Programa_Auxilio USING GIN (lower(f_unaccent(Nome_Programa)) gin_trgm_ops);
@@ -0,0 +1,24 @@
+-- Índices nas chaves estrangeiras
+-- O Postgres não cria índice para FK automaticamente. Sem eles, os JOINs de bs.py/ed.py e a
+-- checagem de FK de cada DELETE (ex: excluir um Usuario procura Estudante/Servidor que o
+-- referenciam) viram varredura sequencial da tabela filha.
+-- FKs que já são a PK (ou início de uma PK/UNIQUE) não precisam de índice extra:
+-- Servidor.Id_Servidor, Estudante.Id_Estudante, Bolsista.Id_inscricao e Supervisiona.
+
+CREATE INDEX IF NOT EXISTS IDX_Estudante_Form ON Estudante (Id_Form);
+CREATE INDEX IF NOT EXISTS IDX_Edital_Programa ON Edital (Id_programa);
+-- (Id_edital, Status): atende a FK e a contagem de inscrições por situação num edital
+CREATE INDEX IF NOT EXISTS IDX_Inscricao_Edital ON Inscricao (Id_edital, Status);
+CREATE INDEX IF NOT EXISTS IDX_Inscricao_Estudante ON Inscricao (Id_Estudante);
+CREATE INDEX IF NOT EXISTS IDX_Documento_Inscricao ON Documento (Id_inscricao);
+-- (Id_inscricao, Data_Pagamento): atende a FK e o histórico de pagamentos de um bolsista
+CREATE INDEX IF NOT EXISTS IDX_Pagamento_Inscricao ON Pagamento (Id_inscricao, Data_Pagamento);
+CREATE INDEX IF NOT EXISTS IDX_Bolsista_Orientador ON Bolsista (Id_Orientador);
+CREATE INDEX IF NOT EXISTS IDX_Bolsista_Estudante ON Bolsista (Id_Estudante);
+
+-- Filtros frequentes (índices parciais: só guardam as linhas que as telas consultam)
+CREATE INDEX IF NOT EXISTS IDX_Edital_Abertos ON Edital (Id_programa, Data_fim) WHERE Status = 'Aberto';
+CREATE INDEX IF NOT EXISTS IDX_Bolsista_Ativos ON Bolsista (Data_inicio, Data_fim) WHERE Data_desligamento IS NULL;
+
+-- Ordem do quadro de bolsistas (bs.py): keyset por (Data_inicio, Id_inscricao) decrescente
+CREATE INDEX IF NOT EXISTS IDX_Bolsista_Quadro ON Bolsista (Data_inicio DESC, Id_inscricao DESC);
@@ -0,0 +1,100 @@
+-- Quadro de bolsistas já pronto para exibir (modelo de leitura de bs.py)
+-- A tela fazia Bolsista x Estudante x Usuario x Servidor x Usuario a cada consulta, de cada sessão.
+-- Quadro_Bolsista guarda uma linha por bolsista com os nomes do aluno e do orientador já resolvidos,
+-- mantida por triggers: cada escrita atualiza só as linhas afetadas, sem REFRESH da tabela inteira.
+-- A consulta do quadro vira uma leitura por índice de uma tabela só.
+--
+-- Mesma regra dos JOINs antigos: bolsista sem estudante ou sem orientador não aparece no quadro.
+-- Servidor e Estudante não precisam de trigger: o nome vem de Usuario, e as FKs de Bolsista
+-- impedem apagar um servidor/estudante que ainda tenha bolsa.
+
+CREATE TABLE IF NOT EXISTS Quadro_Bolsista (
+    Id_inscricao INTEGER PRIMARY KEY,
+    Data_inicio DATE,
+    Data_fim DATE,
+    Data_desligamento DATE,
+    Frequencia VARCHAR(50),
+    Id_Estudante INTEGER NOT NULL,
+    Nome_Estudante VARCHAR(255) NOT NULL,
+    Id_Orientador INTEGER NOT NULL,
+    Nome_Orientador VARCHAR(255) NOT NULL
+);
+
+-- Ordem do quadro: keyset por (Data_inicio, Id_inscricao) decrescente
+CREATE INDEX IF NOT EXISTS IDX_Quadro_Bolsista_Ordem ON Quadro_Bolsista (Data_inicio DESC, Id_inscricao DESC);
+-- Propagação de renomeações de Usuario
+CREATE INDEX IF NOT EXISTS IDX_Quadro_Bolsista_Estudante ON Quadro_Bolsista (Id_Estudante);
+CREATE INDEX IF NOT EXISTS IDX_Quadro_Bolsista_Orientador ON Quadro_Bolsista (Id_Orientador);
+
+-- A ordem do quadro agora é atendida por Quadro_Bolsista; o índice antigo só custava escrita
+DROP INDEX IF EXISTS IDX_Bolsista_Quadro;
+
+-- Recalcula a linha de um bolsista (apaga se ele saiu do quadro)
+CREATE OR REPLACE FUNCTION quadro_bolsista_atualizar(p_id INTEGER) RETURNS void AS $$
+BEGIN
+    DELETE FROM Quadro_Bolsista WHERE Id_inscricao = p_id;
+    INSERT INTO Quadro_Bolsista
+    SELECT B.Id_inscricao, B.Data_inicio, B.Data_fim, B.Data_desligamento, B.Frequencia,
+           B.Id_Estudante, U_Aluno.Nome, B.Id_Orientador, U_Prof.Nome
+    FROM Bolsista B
+    JOIN Estudante E ON B.Id_Estudante = E.Id_Estudante
+    JOIN Usuario U_Aluno ON E.Id_Estudante = U_Aluno.Id_usuario
+    JOIN Servidor S ON B.Id_Orientador = S.Id_Servidor
+    JOIN Usuario U_Prof ON S.Id_Servidor = U_Prof.Id_usuario
+    WHERE B.Id_inscricao = p_id;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION quadro_bolsista_por_bolsista() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM quadro_bolsista_atualizar(OLD.Id_inscricao);
+    END IF;
+    IF TG_OP = 'INSERT' OR (TG_OP = 'UPDATE' AND NEW.Id_inscricao <> OLD.Id_inscricao) THEN
+        PERFORM quadro_bolsista_atualizar(NEW.Id_inscricao);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION quadro_bolsista_limpar() RETURNS trigger AS $$
+BEGIN
+    TRUNCATE Quadro_Bolsista;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION quadro_bolsista_por_usuario() RETURNS trigger AS $$
+BEGIN
+    UPDATE Quadro_Bolsista SET Nome_Estudante = NEW.Nome WHERE Id_Estudante = NEW.Id_usuario;
+    UPDATE Quadro_Bolsista SET Nome_Orientador = NEW.Nome WHERE Id_Orientador = NEW.Id_usuario;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS TRG_Quadro_Bolsista ON Bolsista;
+CREATE TRIGGER TRG_Quadro_Bolsista AFTER INSERT OR UPDATE OR DELETE ON Bolsista
+    FOR EACH ROW EXECUTE FUNCTION quadro_bolsista_por_bolsista();
+
+DROP TRIGGER IF EXISTS TRG_Quadro_Bolsista_Truncate ON Bolsista;
+CREATE TRIGGER TRG_Quadro_Bolsista_Truncate AFTER TRUNCATE ON Bolsista
+    FOR EACH STATEMENT EXECUTE FUNCTION quadro_bolsista_limpar();
+
+-- Só renomeações interessam (e-mail, senha etc. não aparecem no quadro)
+DROP TRIGGER IF EXISTS TRG_Quadro_Bolsista_Nome ON Usuario;
+CREATE TRIGGER TRG_Quadro_Bolsista_Nome AFTER UPDATE OF Nome ON Usuario
+    FOR EACH ROW WHEN (OLD.Nome IS DISTINCT FROM NEW.Nome)
+    EXECUTE FUNCTION quadro_bolsista_por_usuario();
+
+-- Carga inicial com os bolsistas existentes
+TRUNCATE Quadro_Bolsista;
+INSERT INTO Quadro_Bolsista
+SELECT B.Id_inscricao, B.Data_inicio, B.Data_fim, B.Data_desligamento, B.Frequencia,
+       B.Id_Estudante, U_Aluno.Nome, B.Id_Orientador, U_Prof.Nome
+FROM Bolsista B
+JOIN Estudante E ON B.Id_Estudante = E.Id_Estudante
+JOIN Usuario U_Aluno ON E.Id_Estudante = U_Aluno.Id_usuario
+JOIN Servidor S ON B.Id_Orientador = S.Id_Servidor
+JOIN Usuario U_Prof ON S.Id_Servidor = U_Prof.Id_usuario;
+
+ANALYZE Quadro_Bolsista;
@@ -0,0 +1,7 @@
+-- Folha de pagamento (folha.py)
+-- Um pagamento por bolsista por data: gerar a folha de um mês de novo não duplica nada,
+-- o INSERT ... ON CONFLICT (Id_inscricao, Data_Pagamento) DO NOTHING só grava o que falta.
+CREATE UNIQUE INDEX IF NOT EXISTS UQ_Pagamento_Inscricao_Data ON Pagamento (Id_inscricao, Data_Pagamento);
+
+-- O índice único tem as mesmas colunas e atende a FK e o histórico; o antigo só custava escrita
+DROP INDEX IF EXISTS IDX_Pagamento_Inscricao;
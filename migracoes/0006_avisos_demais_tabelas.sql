@@ -0,0 +1,32 @@
+-- Avisos de alteração para as tabelas que faltavam (ver 0001_avisos_alteracao.sql)
+-- Além das listas dos seletores, os avisos agora invalidam os caches de consultas por tabela
+-- (cache.invalidar_tabelas): toda tabela lida por uma tela precisa avisar quando muda,
+-- inclusive quando a escrita vem de outro processo (folha.py, selecao.py, importacao.py).
+DROP TRIGGER IF EXISTS TRG_Notifica_Edital ON Edital;
+CREATE TRIGGER TRG_Notifica_Edital AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON Edital
+    FOR EACH STATEMENT EXECUTE FUNCTION notificar_alteracao();
+
+DROP TRIGGER IF EXISTS TRG_Notifica_Bolsista ON Bolsista;
+CREATE TRIGGER TRG_Notifica_Bolsista AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON Bolsista
+    FOR EACH STATEMENT EXECUTE FUNCTION notificar_alteracao();
+
+DROP TRIGGER IF EXISTS TRG_Notifica_Pagamento ON Pagamento;
+CREATE TRIGGER TRG_Notifica_Pagamento AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON Pagamento
+    FOR EACH STATEMENT EXECUTE FUNCTION notificar_alteracao();
+
+DROP TRIGGER IF EXISTS TRG_Notifica_Formulario ON FormularioSocioeconomico;
+CREATE TRIGGER TRG_Notifica_Formulario AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON FormularioSocioeconomico
+    FOR EACH STATEMENT EXECUTE FUNCTION notificar_alteracao();
+
+DROP TRIGGER IF EXISTS TRG_Notifica_Documento ON Documento;
+CREATE TRIGGER TRG_Notifica_Documento AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON Documento
+    FOR EACH STATEMENT EXECUTE FUNCTION notificar_alteracao();
+
+DROP TRIGGER IF EXISTS TRG_Notifica_Supervisiona ON Supervisiona;
+CREATE TRIGGER TRG_Notifica_Supervisiona AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON Supervisiona
+    FOR EACH STATEMENT EXECUTE FUNCTION notificar_alteracao();
+
+-- Mantido pelos gatilhos de Bolsista/Usuario (0004); avisa por si para quem lê só o quadro
+DROP TRIGGER IF EXISTS TRG_Notifica_Quadro_Bolsista ON Quadro_Bolsista;
+CREATE TRIGGER TRG_Notifica_Quadro_Bolsista AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON Quadro_Bolsista
+    FOR EACH STATEMENT EXECUTE FUNCTION notificar_alteracao();
@@ -0,0 +1,84 @@
+-- Pagamento particionado por ano de Data_Pagamento (ver particoes.py)
+-- A tabela cresce um pagamento por bolsista por mês, sem fim. Particionada por faixa de datas,
+-- uma consulta por período só lê a partição do ano (partition pruning), os índices de cada ano
+-- ficam do tamanho de um ano e os anos fechados podem ser desanexados e arquivados sem DELETE.
+--
+-- - Partições anuais Pagamento_AAAA, criadas por criar_particao_pagamento(ano): pela folha.py
+--   (ano da folha) e pelo `python particoes.py` (até o ano que vem).
+-- - Pagamento_Fora (DEFAULT) recebe datas sem partição; criar a partição do ano move essas linhas.
+-- - Chaves únicas precisam conter a coluna de partição: a PK passa a ser (Id_pagamento, Data_Pagamento).
+--   Id_pagamento continua vindo da mesma sequence, então segue único na prática.
+-- - Data_Pagamento passa a ser NOT NULL (faz parte da PK); pagamento sem data faz a migração falhar.
+
+ALTER TABLE Pagamento RENAME TO Pagamento_Antigo;
+DROP TRIGGER IF EXISTS TRG_Notifica_Pagamento ON Pagamento_Antigo;
+ALTER TABLE Pagamento_Antigo DROP CONSTRAINT IF EXISTS pagamento_pkey;
+ALTER TABLE Pagamento_Antigo DROP CONSTRAINT IF EXISTS FK_Pagamento_Inscricao;
+DROP INDEX IF EXISTS UQ_Pagamento_Inscricao_Data;
+-- A sequence do SERIAL sairia junto com a tabela antiga
+ALTER SEQUENCE pagamento_id_pagamento_seq OWNED BY NONE;
+
+CREATE TABLE Pagamento (
+    Id_pagamento INTEGER NOT NULL DEFAULT nextval('pagamento_id_pagamento_seq'),
+    Valor_pago DECIMAL(10, 2),
+    Data_Pagamento DATE NOT NULL,
+    Id_inscricao INTEGER,
+    CONSTRAINT PK_Pagamento PRIMARY KEY (Id_pagamento, Data_Pagamento),
+    CONSTRAINT FK_Pagamento_Inscricao FOREIGN KEY (Id_inscricao) REFERENCES Inscricao(Id_inscricao)
+) PARTITION BY RANGE (Data_Pagamento);
+
+ALTER SEQUENCE pagamento_id_pagamento_seq OWNED BY Pagamento.Id_pagamento;
+
+-- Mesmo nome e colunas de 0005: o ON CONFLICT (Id_inscricao, Data_Pagamento) da folha continua valendo
+CREATE UNIQUE INDEX UQ_Pagamento_Inscricao_Data ON Pagamento (Id_inscricao, Data_Pagamento);
+-- Relatórios por mês dentro da partição do ano (indicadores.py)
+CREATE INDEX IDX_Pagamento_Data ON Pagamento (Data_Pagamento);
+
+CREATE TABLE Pagamento_Fora PARTITION OF Pagamento DEFAULT;
+
+-- Cria Pagamento_<ano> se ainda não existir, trazendo as linhas do ano que estavam em Pagamento_Fora
+-- (com elas lá dentro, o Postgres recusaria a partição nova). Os índices e a FK vêm do pai no ATTACH.
+CREATE OR REPLACE FUNCTION criar_particao_pagamento(ano INTEGER) RETURNS BOOLEAN AS $$
+DECLARE
+    nome TEXT := 'pagamento_' || ano;
+    inicio DATE := make_date(ano, 1, 1);
+    fim DATE := make_date(ano + 1, 1, 1);
+BEGIN
+    IF to_regclass(nome) IS NOT NULL THEN
+        RETURN FALSE;
+    END IF;
+    EXECUTE format('CREATE TABLE %I (LIKE Pagamento INCLUDING DEFAULTS)', nome);
+    EXECUTE format(
+        'WITH movidas AS (DELETE FROM Pagamento_Fora WHERE Data_Pagamento >= %L AND Data_Pagamento < %L RETURNING *)
+         INSERT INTO %I SELECT * FROM movidas', inicio, fim, nome);
+    EXECUTE format('ALTER TABLE Pagamento ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)', nome, inicio, fim);
+    RETURN TRUE;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Um ano por partição, do primeiro pagamento até o ano que vem
+DO $$
+DECLARE
+    ano INTEGER;
+BEGIN
+    FOR ano IN SELECT generate_series(
+        coalesce((SELECT min(extract(year FROM Data_Pagamento))::int FROM Pagamento_Antigo),
+                 extract(year FROM CURRENT_DATE)::int),
+        extract(year FROM CURRENT_DATE)::int + 1)
+    LOOP
+        PERFORM criar_particao_pagamento(ano);
+    END LOOP;
+END;
+$$;
+
+INSERT INTO Pagamento (Id_pagamento, Valor_pago, Data_Pagamento, Id_inscricao)
+SELECT Id_pagamento, Valor_pago, Data_Pagamento, Id_inscricao FROM Pagamento_Antigo;
+
+DROP TABLE Pagamento_Antigo;
+
+-- Gatilho por comando no pai: vale para INSERT/UPDATE/DELETE em qualquer partição via Pagamento
+-- (particoes.py avisa por conta própria ao desanexar um ano, que não dispara gatilho)
+CREATE TRIGGER TRG_Notifica_Pagamento AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON Pagamento
+    FOR EACH STATEMENT EXECUTE FUNCTION notificar_alteracao();
+
+ANALYZE Pagamento;
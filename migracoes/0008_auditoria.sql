@@ -0,0 +1,32 @@
+-- Trilha de auditoria das escritas (auditoria.py)
+-- Gravada em lote por um thread da aplicação (COPY), depois do commit de cada escrita.
+-- Antes/Depois: a linha em JSON como o Postgres a devolveu (sem a Senha); no INSERT só há Depois,
+-- no DELETE só há Antes. Momento é a hora da escrita; Gravado_em, a da chegada do lote.
+CREATE TABLE IF NOT EXISTS Auditoria (
+    Id_auditoria BIGSERIAL PRIMARY KEY,
+    Momento TIMESTAMPTZ NOT NULL,
+    Tabela VARCHAR(64) NOT NULL,
+    Operacao VARCHAR(10) NOT NULL,
+    Chave JSONB NOT NULL,
+    Antes JSONB,
+    Depois JSONB,
+    Usuario VARCHAR(255),
+    Origem VARCHAR(255),
+    Gravado_em TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+-- Histórico de uma linha: WHERE Tabela = 'Bolsista' AND Chave = '{"id_inscricao": 12}'
+CREATE INDEX IF NOT EXISTS IDX_Auditoria_Tabela_Chave ON Auditoria (Tabela, Chave, Momento);
+-- Só cresce, em ordem de chegada: BRIN serve às consultas por período com um índice minúsculo
+CREATE INDEX IF NOT EXISTS IDX_Auditoria_Momento ON Auditoria USING brin (Momento);
+
+-- Só INSERT: a trilha não pode ser corrigida nem apagada pela aplicação
+CREATE OR REPLACE FUNCTION auditoria_somente_insercao() RETURNS trigger AS $$
+BEGIN
+    RAISE EXCEPTION 'Auditoria só aceita INSERT (% recusado)', TG_OP;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS TRG_Auditoria_Somente_Insercao ON Auditoria;
+CREATE TRIGGER TRG_Auditoria_Somente_Insercao BEFORE UPDATE OR DELETE OR TRUNCATE ON Auditoria
+    FOR EACH STATEMENT EXECUTE FUNCTION auditoria_somente_insercao();
@@ -0,0 +1,4 @@
+-- Busca de estudantes por início da matrícula (busca.buscar_estudantes: Matricula LIKE 'x%')
+-- O índice do UNIQUE usa a collation do banco e não serve para LIKE com prefixo fora da
+-- collation C; text_pattern_ops compara byte a byte e atende o prefixo com um range scan.
+CREATE INDEX IF NOT EXISTS IDX_Estudante_Matricula_Prefixo ON Estudante (Matricula text_pattern_ops);
@@ -0,0 +1,15 @@
+-- Sequência de Id_pagamento alinhada com os dados (folha.py)
+-- povoamente.sql grava Pagamento com Id_pagamento explícito, o que não avança a sequence; a folha
+-- é o primeiro a inserir pelo DEFAULT e repetiria Id_pagamento = 1 (chave primária duplicada).
+-- Leva a sequence para depois do maior Id_pagamento, sem nunca a fazer voltar: anos arquivados
+-- por particoes.py não estão mais na tabela, mas os IDs deles continuam usados.
+SELECT setval(
+    pg_get_serial_sequence('pagamento', 'id_pagamento'),
+    greatest(
+        (SELECT coalesce(max(Id_pagamento), 0) FROM Pagamento),
+        (SELECT coalesce(last_value, 0) FROM pg_sequences
+         WHERE format('%I.%I', schemaname, sequencename)::regclass
+             = pg_get_serial_sequence('pagamento', 'id_pagamento')::regclass)
+    ) + 1,
+    false
+);
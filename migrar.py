@@ -0,0 +1,155 @@
+import argparse
+import hashlib
+import os
+import sys
+
+import psycopg2 as pg
+
+from conexao import DB_HOST, DB_NAME, DB_USER, DB_PASS, CONNECT_TIMEOUT
+
+# Migrações versionadas do esquema.
+# criacao.sql é a base (banco novo); cada alteração posterior fica em migracoes/NNNN_nome.sql
+# e é aplicada uma única vez, em ordem, registrada na tabela Schema_Migracao.
+#
+# Uso:
+#   python migrar.py              aplica as migrações pendentes
+#   python migrar.py --status     lista aplicadas e pendentes
+#   python migrar.py --verificar  aponta chaves estrangeiras sem índice
+
+PASTA_MIGRACOES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'migracoes')
+
+# Impede que dois processos migrem ao mesmo tempo (número arbitrário, fixo para o projeto)
+TRAVA_MIGRACAO = 7410021
+
+SQL_TABELA_CONTROLE = """
+    CREATE TABLE IF NOT EXISTS Schema_Migracao (
+        Versao VARCHAR(10) PRIMARY KEY,
+        Nome VARCHAR(255) NOT NULL,
+        Checksum VARCHAR(64) NOT NULL,
+        Aplicada_em TIMESTAMP NOT NULL DEFAULT now()
+    )
+"""
+
+# FKs cujas colunas não são as primeiras colunas de nenhum índice da tabela
+SQL_FK_SEM_INDICE = """
+    SELECT c.conrelid::regclass AS tabela,
+           c.conname AS restricao,
+           string_agg(a.attname, ', ' ORDER BY x.n) AS colunas
+    FROM pg_constraint c
+    CROSS JOIN LATERAL unnest(c.conkey) WITH ORDINALITY AS x(attnum, n)
+    JOIN pg_attribute a ON a.attrelid = c.conrelid AND a.attnum = x.attnum
+    WHERE c.contype = 'f'
+      AND NOT EXISTS (
+          SELECT 1 FROM pg_index i
+          WHERE i.indrelid = c.conrelid
+            AND i.indpred IS NULL  -- índice parcial não cobre todas as linhas
+            AND (i.indkey::smallint[])[0:cardinality(c.conkey) - 1] @> c.conkey
+      )
+    GROUP BY c.conrelid, c.conname
+    ORDER BY 1, 2
+"""
+
+
+def conectar():
+    return pg.connect(host=DB_HOST, dbname=DB_NAME, user=DB_USER, password=DB_PASS,
+                      connect_timeout=CONNECT_TIMEOUT, application_name='bolsas-migracao')
+
+
+def listar_arquivos():
+    """Migrações disponíveis em disco: [(versao, nome, caminho)], em ordem."""
+    arquivos = []
+    for arquivo in sorted(os.listdir(PASTA_MIGRACOES)):
+        if arquivo.endswith('.sql') and arquivo[:4].isdigit():
+            versao, _, nome = arquivo[:-4].partition('_')
+            arquivos.append((versao, nome, os.path.join(PASTA_MIGRACOES, arquivo)))
+    return arquivos
+
+
+def checksum(caminho):
+    with open(caminho, 'rb') as f:
+        return hashlib.sha256(f.read().replace(b'\r\n', b'\n')).hexdigest()
+
+
+def aplicadas(con):
+    """{versao: checksum} das migrações já registradas no banco."""
+    with con.cursor() as cursor:
+        cursor.execute(SQL_TABELA_CONTROLE)
+        cursor.execute("SELECT Versao, Checksum FROM Schema_Migracao")
+        return dict(cursor.fetchall())
+
+
+def migrar(con):
+    """Aplica as migrações pendentes, cada uma na sua própria transação."""
+    with con.cursor() as cursor:
+        cursor.execute("SELECT pg_advisory_lock(%s)", (TRAVA_MIGRACAO,))
+    con.commit()
+    try:
+        feitas = aplicadas(con)
+        con.commit()
+        pendentes = [m for m in listar_arquivos() if m[0] not in feitas]
+        if not pendentes:
+            print('Nenhuma migração pendente.')
+        for versao, nome, caminho in pendentes:
+            print(f'Aplicando {versao}_{nome}...')
+            with open(caminho, encoding='utf-8') as f:
+                sql = f.read()
+            try:
+                with con.cursor() as cursor:
+                    cursor.execute(sql)
+                    cursor.execute(
+                        "INSERT INTO Schema_Migracao (Versao, Nome, Checksum) VALUES (%s, %s, %s)",
+                        (versao, nome, checksum(caminho))
+                    )
+                con.commit()
+            except Exception:
+                con.rollback()
+                print(f'Erro na migração {versao}_{nome}; nada dela foi aplicado.')
+                raise
+    finally:
+        with con.cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_unlock(%s)", (TRAVA_MIGRACAO,))
+        con.commit()
+
+
+def status(con):
+    feitas = aplicadas(con)
+    con.commit()
+    for versao, nome, caminho in listar_arquivos():
+        if versao not in feitas:
+            situacao = 'pendente'
+        elif feitas[versao] != checksum(caminho):
+            situacao = 'aplicada (ARQUIVO ALTERADO depois de aplicado)'
+        else:
+            situacao = 'aplicada'
+        print(f'{versao}_{nome}: {situacao}')
+
+
+def verificar_indices_fk(con):
+    """Lista as chaves estrangeiras sem índice. Devolve a quantidade encontrada."""
+    with con.cursor() as cursor:
+        cursor.execute(SQL_FK_SEM_INDICE)
+        faltando = cursor.fetchall()
+    con.commit()
+    if not faltando:
+        print('Todas as chaves estrangeiras têm índice.')
+    for tabela, restricao, colunas in faltando:
+        print(f'SEM ÍNDICE: {tabela} ({colunas}) - {restricao}')
+    return len(faltando)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Migrações do banco de Bolsas e Auxílios')
+    parser.add_argument('--status', action='store_true', help='lista migrações aplicadas e pendentes')
+    parser.add_argument('--verificar', action='store_true', help='aponta chaves estrangeiras sem índice')
+    args = parser.parse_args()
+
+    con = conectar()
+    try:
+        if args.status:
+            status(con)
+        elif args.verificar:
+            sys.exit(1 if verificar_indices_fk(con) else 0)
+        else:
+            migrar(con)
+    finally:
+        con.close()
@@ -0,0 +1,136 @@
+import logging
+import select
+import threading
+import time
+import weakref
+
+import panel as pn
+import psycopg2 as pg
+
+from cache import invalidar_tabelas
+from conexao import DB_HOST, DB_NAME, DB_USER, DB_PASS, CONNECT_TIMEOUT
+
+# Listas dos seletores (lookups) mantidas em memória, uma cópia por processo.
+# Triggers no banco (migracoes/0001_avisos_alteracao.sql) fazem NOTIFY no canal abaixo com o nome da tabela alterada;
+# um thread em segundo plano escuta o canal, recarrega as listas afetadas e empurra as novas
+# opções para os Select de todas as sessões abertas. Os mesmos avisos invalidam os caches de
+# consultas por tabela (cache.invalidar_tabelas).
+
+CANAL = 'bolsas_alteracoes'
+ESPERA_AGRUPAR = 0.5   # segundos juntando avisos antes de recarregar (rajadas de INSERT)
+ESPERA_RECONEXAO = 5   # segundos entre tentativas de reconectar o listener
+
+log = logging.getLogger(__name__)
+
+
+class Catalogo:
+    """Registro de listas de opções compartilhadas, recarregadas por LISTEN/NOTIFY."""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._carregadores = {}  # nome -> função que devolve o dict de opções
+        self._tabelas = {}       # nome -> conjunto de tabelas (minúsculas) das quais a lista depende
+        self._valores = {}       # nome -> último dict carregado
+        self._assinantes = {}    # nome -> WeakKeyDictionary {widget: documento bokeh}
+        self._thread = None
+
+    def registrar(self, nome, carregador, tabelas):
+        """Registra uma lista. Só o primeiro registro vale: as sessões seguintes reaproveitam."""
+        with self._lock:
+            if nome not in self._carregadores:
+                self._carregadores[nome] = carregador
+                self._tabelas[nome] = {t.lower() for t in tabelas}
+                self._assinantes[nome] = weakref.WeakKeyDictionary()
+
+    def obter(self, nome):
+        """Opções atuais da lista (carrega do banco só na primeira vez no processo)."""
+        with self._lock:
+            if nome not in self._valores:
+                self._valores[nome] = self._carregadores[nome]()
+            return self._valores[nome]
+
+    def assinar(self, nome, widget):
+        """Liga um Select à lista: ele recebe as novas opções sempre que a lista mudar."""
+        with self._lock:
+            self._assinantes[nome][widget] = pn.state.curdoc
+        self.iniciar_escuta()
+
+    # --- Recarga ---
+
+    def recarregar(self, tabelas=None):
+        """Recarrega as listas que dependem de alguma das `tabelas` (todas, se None)."""
+        with self._lock:
+            nomes = [n for n, deps in self._tabelas.items() if tabelas is None or deps & tabelas]
+        for nome in nomes:
+            try:
+                valores = self._carregadores[nome]()
+            except Exception as e:
+                log.warning('Falha ao recarregar a lista %s: %s', nome, e)
+                continue
+            with self._lock:
+                self._valores[nome] = valores
+                assinantes = list(self._assinantes[nome].items())
+            for widget, doc in assinantes:
+                self._empurrar(widget, doc, valores)
+
+    @staticmethod
+    def _empurrar(widget, doc, valores):
+        def aplicar():
+            widget.options = valores
+        if doc is None:
+            aplicar()
+        elif doc.session_context is not None and not doc.session_context.destroyed:
+            # Alterações vindas de outro thread precisam entrar pelo loop do documento
+            doc.add_next_tick_callback(aplicar)
+
+    # --- Listener ---
+
+    def iniciar_escuta(self):
+        """Sobe o thread do LISTEN uma única vez por processo."""
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._escutar, name='bolsas-listen', daemon=True)
+                self._thread.start()
+
+    def _escutar(self):
+        while True:
+            con = None
+            try:
+                con = pg.connect(host=DB_HOST, dbname=DB_NAME, user=DB_USER, password=DB_PASS,
+                                 connect_timeout=CONNECT_TIMEOUT, application_name='bolsas-listen')
+                con.set_session(autocommit=True)
+                with con.cursor() as cursor:
+                    cursor.execute(f'LISTEN {CANAL}')
+                # Pode ter perdido avisos enquanto estava desconectado
+                self._avisar(None)
+                self._loop_avisos(con)
+            except Exception as e:
+                log.warning('Listener de %s caiu (%s); reconectando em %ss', CANAL, e, ESPERA_RECONEXAO)
+            finally:
+                if con is not None:
+                    con.close()
+            time.sleep(ESPERA_RECONEXAO)
+
+    def _loop_avisos(self, con):
+        while True:
+            if select.select([con], [], [], 60) == ([], [], []):
+                continue
+            con.poll()
+            tabelas = set()
+            while con.notifies:
+                tabelas.add(con.notifies.pop(0).payload.lower())
+            if not tabelas:
+                continue
+            # Junta uma rajada de avisos num único recarregamento
+            time.sleep(ESPERA_AGRUPAR)
+            con.poll()
+            while con.notifies:
+                tabelas.add(con.notifies.pop(0).payload.lower())
+            self._avisar(tabelas)
+
+    def _avisar(self, tabelas):
+        invalidar_tabelas(tabelas)
+        self.recarregar(tabelas)
+
+
+catalogo = Catalogo()
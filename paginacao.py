@@ -0,0 +1,406 @@
+import re
+
+import pandas as pd
+import panel as pn
+from bokeh.models import StringFormatter
+
+from cache import CachePorTabela
+from metricas import medir
+from preparados import consultar, executar
+from tarefas import em_segundo_plano
+
+# Contagens (SELECT count(*)) ficam em cache por processo: todas as sessões que
+# abrem a mesma tela com o mesmo filtro reaproveitam o resultado. As páginas ficam no cache
+# de leituras (preparados.consultar); os dois caem quando uma tabela da origem é alterada.
+_cache_contagem = CachePorTabela(max_itens=512, ttl=30.0)
+
+_TABELAS_ORIGEM = re.compile(r'(?:^\s*|\bJOIN\s+)(\w+)', re.IGNORECASE)
+
+
+def _valor_python(v):
+    """Converte escalares do pandas/numpy para tipos que o psycopg2 entende."""
+    if v is None or v is pd.NaT:
+        return None
+    if isinstance(v, pd.Timestamp):
+        return v.to_pydatetime()
+    if hasattr(v, 'item'):
+        v = v.item()  # numpy.float64('nan') vira float nan: cai na verificação abaixo
+    if isinstance(v, float) and v != v:
+        return None
+    return v
+
+
+class FonteKeyset:
+    """
+    Fonte de dados paginada direto no Postgres.
+
+    Em vez de carregar a tabela inteira num DataFrame, busca apenas a página visível
+    usando paginação por chave (keyset/seek): `WHERE (ordem, chave) > (...) LIMIT n`.
+    A coluna `chave` precisa ser única (e não nula) e serve de desempate para qualquer ordenação.
+    A coluna de ordenação pode ter NULL: eles ficam por último em ASC e primeiro em DESC
+    (o padrão do Postgres, escrito explicitamente) e são buscados numa consulta à parte (_seek).
+
+    - colunas: dict {nome exibido: expressão SQL}, na ordem de exibição.
+    - origem: trecho FROM/JOIN da consulta.
+    - chave: nome exibido da coluna única (ex: 'id_usuario').
+    - ordem: tupla (nome exibido, 'asc' | 'desc') da ordenação padrão.
+    - tabelas: tabelas cuja alteração invalida as páginas e contagens em cache
+      (padrão: as que aparecem no FROM/JOIN de `origem`).
+    - categorias: colunas exibidas com poucos valores distintos (ex: status), que vêm como
+      dtype category: cada valor é guardado uma vez, e as linhas só carregam o código.
+    """
+
+    def __init__(self, engine, colunas, origem, chave, ordem=None, tamanho_pagina=10, tabelas=None,
+                 categorias=()):
+        self.engine = engine
+        self.colunas = dict(colunas)
+        self.origem = origem
+        self.tabelas = list(tabelas or _TABELAS_ORIGEM.findall(origem))
+        self.categorias = [c for c in categorias if c in self.colunas]
+        self.chave = chave
+        self.ordem_padrao = ordem or (chave, 'asc')
+        self.tamanho_pagina = tamanho_pagina
+        self.condicao = ''
+        self.params = {}
+        self.ordem = self.ordem_padrao
+        self._marcadores = {}  # página -> (primeira linha, última linha) como (valor_ordem, valor_chave)
+
+    # --- Configuração ---
+
+    def filtrar(self, condicao='', params=None):
+        """Define o filtro (trecho WHERE com parâmetros %(nome)s) e volta à página 1."""
+        self.condicao = condicao or ''
+        self.params = dict(params or {})
+        self._marcadores.clear()
+
+    def ordenar(self, coluna=None, direcao='asc'):
+        """Ordena por uma das colunas exibidas. Sem coluna, volta à ordem padrão."""
+        if coluna not in self.colunas:
+            self.ordem = self.ordem_padrao
+        else:
+            self.ordem = (coluna, 'desc' if direcao == 'desc' else 'asc')
+        self._marcadores.clear()
+
+    # --- Consultas ---
+
+    def _where(self, extra=None):
+        partes = [c for c in (self.condicao, extra) if c]
+        return f" WHERE {' AND '.join(f'({p})' for p in partes)}" if partes else ''
+
+    def _sql_contagem(self):
+        sql = f"SELECT count(*) AS total FROM {self.origem}{self._where()}"
+        return sql, (sql, tuple(sorted(self.params.items())))
+
+    def total(self):
+        """Quantidade de linhas do filtro atual (consulta de contagem em cache)."""
+        sql, chave_cache = self._sql_contagem()
+
+        def contar():
+            return int(consultar(self.engine, sql, self.params)['total'].iloc[0])
+
+        return _cache_contagem.get_or_set(chave_cache, contar, self.tabelas)
+
+    def descartar_contagem(self):
+        """Esquece a contagem em cache do filtro atual (depois de inserir/excluir linhas)."""
+        _cache_contagem.invalidar(self._sql_contagem()[1])
+
+    def total_paginas(self):
+        return max(1, -(-self.total() // self.tamanho_pagina))
+
+    def _select(self):
+        return ', '.join(f'{expr} AS "{nome}"' for nome, expr in self.colunas.items())
+
+    def _order_by(self, sentido):
+        col_ordem = self.ordem[0]
+        if col_ordem == self.chave:
+            return f"{self.colunas[self.chave]} {sentido}"
+        nulos = 'NULLS LAST' if sentido == 'ASC' else 'NULLS FIRST'
+        return f"{self.colunas[col_ordem]} {sentido} {nulos}, {self.colunas[self.chave]} {sentido}"
+
+    def _seek(self, op, valor_ordem, params):
+        """
+        Condições das linhas depois (op '>') ou antes (op '<') do marcador na ordem
+        (ordem NULLS LAST, chave) crescente, uma por trecho, na ordem em que aparecem no ORDER BY.
+        Comparação de linha com NULL dá NULL, então os NULL da coluna de ordenação são um trecho
+        à parte: sem OR na comparação de linha, cada trecho segue o índice de (ordem, chave).
+        """
+        expr_ordem = self.colunas[self.ordem[0]]
+        expr_chave = self.colunas[self.chave]
+        if valor_ordem is None:
+            # Marcador entre os NULL: depois dele só NULL de chave maior; antes, NULL de chave
+            # menor (em DESC, NULLS FIRST) e depois todos os não nulos
+            if op == '>':
+                return [f"{expr_ordem} IS NULL AND {expr_chave} > %(_k_chave)s"]
+            return [f"{expr_ordem} IS NULL AND {expr_chave} < %(_k_chave)s", f"{expr_ordem} IS NOT NULL"]
+        params['_k_ordem'] = valor_ordem
+        comparacao = f"({expr_ordem}, {expr_chave}) {op} (%(_k_ordem)s, %(_k_chave)s)"
+        if op == '>':
+            # Os NULL vêm por último (NULLS LAST): só são buscados se a página não se completar antes
+            return [comparacao, f"{expr_ordem} IS NULL"]
+        return [comparacao]
+
+    def consulta_completa(self):
+        """(sql, params) de todas as linhas do filtro e da ordem atuais, sem LIMIT (usado na exportação)."""
+        sentido = 'DESC' if self.ordem[1] == 'desc' else 'ASC'
+        sql = f"SELECT {self._select()} FROM {self.origem}{self._where()} ORDER BY {self._order_by(sentido)}"
+        return sql, dict(self.params)
+
+    def linha(self, valor_chave, cursor):
+        """
+        A linha com `valor_chave`, nas colunas exibidas, como DataFrame de 0 ou 1 linha.
+        Recebe o cursor da transação que acabou de gravar: lê o próprio registro gravado,
+        sem depender do banco de leitura já ter recebido a alteração.
+        Vazio se a linha não existe ou não passa no filtro atual.
+        """
+        params = {**self.params, '_chave': valor_chave}
+        sql = f"SELECT {self._select()} FROM {self.origem}{self._where(f'{self.colunas[self.chave]} = %(_chave)s')}"
+        executar(cursor, sql, params)
+        return self._compactar(pd.DataFrame.from_records(
+            cursor.fetchall(), columns=[d.name for d in cursor.description], coerce_float=True
+        ))
+
+    def _compactar(self, df):
+        for coluna in self.categorias:
+            df[coluna] = df[coluna].astype('category')
+        return df
+
+    def _consultar(self, reverso=False, limite=None, limite_de=None, offset=None):
+        """
+        Monta e executa o SELECT de uma página.
+        - reverso: inverte a ordenação (usado para voltar página / ir à última).
+        - limite_de: ('apos' | 'antes', (valor_ordem, valor_chave)) para o seek.
+        """
+        col_ordem, direcao = self.ordem
+        expr_chave = self.colunas[self.chave]
+        crescente = (direcao == 'asc') != reverso
+        sentido = 'ASC' if crescente else 'DESC'
+
+        params = dict(self.params)
+        trechos = [None]
+        if limite_de is not None:
+            lado, (valor_ordem, valor_chave) = limite_de
+            # 'apos' segue o sentido da ordenação escolhida; 'antes' o contrário
+            maior = (lado == 'apos') == (direcao == 'asc')
+            op = '>' if maior else '<'
+            params['_k_chave'] = valor_chave
+            if col_ordem == self.chave:
+                trechos = [f"{expr_chave} {op} %(_k_chave)s"]
+            else:
+                trechos = self._seek(op, valor_ordem, params)
+
+        # LIMIT/OFFSET como parâmetros: o mesmo comando preparado serve para qualquer página
+        faltam = int(limite or self.tamanho_pagina)
+        partes = []
+        for extra in trechos:
+            sql = f"SELECT {self._select()} FROM {self.origem}{self._where(extra)} ORDER BY {self._order_by(sentido)}"
+            sql += " LIMIT %(_limite)s"
+            params['_limite'] = faltam
+            if offset:
+                sql += " OFFSET %(_offset)s"
+                params['_offset'] = int(offset)
+            partes.append(consultar(self.engine, sql, params, self.tabelas))
+            faltam -= len(partes[-1])
+            if faltam <= 0:
+                break
+
+        df = partes[0] if len(partes) == 1 else pd.concat(partes, ignore_index=True)
+        df = self._compactar(df)
+        if reverso:
+            df = df.iloc[::-1].reset_index(drop=True)
+        return df
+
+    def _marcador(self, df, posicao):
+        # Lê coluna a coluna: df.iloc[linha] converteria tipos mistos (ex: int -> float)
+        return (_valor_python(df[self.ordem[0]].iat[posicao]), _valor_python(df[self.chave].iat[posicao]))
+
+    def _seek_possivel(self, marcador):
+        # NULL na coluna de ordenação tem trecho próprio no seek (_seek); sem chave, usamos OFFSET
+        return marcador is not None and marcador[1] is not None
+
+    def pagina(self, numero):
+        """Busca a página `numero` (1..total_paginas) e devolve um DataFrame."""
+        ultima = self.total_paginas()
+        numero = min(max(1, int(numero)), ultima)
+
+        anterior = self._marcadores.get(numero - 1)
+        seguinte = self._marcadores.get(numero + 1)
+
+        if numero == 1:
+            df = self._consultar()
+        elif anterior and self._seek_possivel(anterior[1]):
+            df = self._consultar(limite_de=('apos', anterior[1]))
+        elif seguinte and self._seek_possivel(seguinte[0]):
+            df = self._consultar(reverso=True, limite_de=('antes', seguinte[0]))
+        elif numero == ultima:
+            resto = self.total() - (ultima - 1) * self.tamanho_pagina
+            df = self._consultar(reverso=True, limite=resto or self.tamanho_pagina)
+        else:
+            df = self._consultar(offset=(numero - 1) * self.tamanho_pagina)
+
+        if len(df):
+            self._marcadores[numero] = (self._marcador(df, 0), self._marcador(df, -1))
+        return df
+
+
+class TabelaPaginada:
+    """
+    Tabulator que mostra só a página atual de uma FonteKeyset, com navegação e ordenação no banco.
+
+    Criada uma vez por sessão: consultas trocam a fonte (`trocar_fonte`) e as escritas chegam
+    linha a linha (`inserir`, `atualizar`, `remover`), sem reconstruir o widget nem reenviar
+    a página inteira pelo websocket. A primeira página é buscada quando a sessão termina de carregar.
+    """
+
+    def __init__(self, fonte, **kwargs):
+        self.fonte = fonte
+        self.numero = 1
+        # Função página -> página aplicada a cada página vinda do banco antes de exibir
+        # (ex: edicao.EdicaoEmLote mostra por cima o que ainda não foi salvo)
+        self.sobrepor = None
+
+        # Valor ausente numa coluna category chega ao navegador como NaN: mostra vazio, como None
+        formatters = {c: StringFormatter(null_format='', nan_format='') for c in fonte.categorias}
+        formatters.update(kwargs.pop('formatters', {}))
+        self.tabela = pn.widgets.Tabulator(
+            pd.DataFrame(columns=list(fonte.colunas)), pagination=None, show_index=False,
+            sizing_mode='stretch_width', formatters=formatters, **kwargs
+        )
+        self.tabela.param.watch(self._on_ordenar, 'sorters')
+
+        self.btn_primeira = pn.widgets.Button(name='⏮', width=45)
+        self.btn_anterior = pn.widgets.Button(name='◀', width=45)
+        self.btn_proxima  = pn.widgets.Button(name='▶', width=45)
+        self.btn_ultima   = pn.widgets.Button(name='⏭', width=45)
+        self.info = pn.pane.Markdown(margin=(5, 10))
+
+        for btn in (self.btn_primeira, self.btn_anterior, self.btn_proxima, self.btn_ultima):
+            btn.on_click(self._on_navegar)
+
+        self.info.object = "Carregando..."
+        pn.state.onload(self._carregar_inicial)
+
+    async def _carregar_inicial(self):
+        try:
+            await self.navegar(1)
+        except Exception as e:
+            self.info.object = f"Erro ao carregar dados: {str(e)}"
+
+    def _atualizar_info(self):
+        total = self.fonte.total()
+        paginas = self.fonte.total_paginas()
+        self.info.object = f"Página **{self.numero}** de **{paginas}** ({total} registros)"
+        self.btn_primeira.disabled = self.btn_anterior.disabled = self.numero <= 1
+        self.btn_proxima.disabled = self.btn_ultima.disabled = self.numero >= paginas
+
+    def ir_para(self, numero):
+        fonte = self.fonte
+        numero = min(max(1, numero), fonte.total_paginas())
+        pagina = fonte.pagina(numero)
+        if fonte is not self.fonte:
+            # Outra consulta trocou a fonte enquanto esta rodava: só a mais nova aparece
+            return
+        if self.sobrepor is not None:
+            pagina = self.sobrepor(pagina)
+        self.tabela.value = pagina
+        self.numero = numero
+        self._atualizar_info()
+
+    def recarregar(self):
+        """Busca de novo a página atual (ex: depois de alterar o filtro)."""
+        self.ir_para(self.numero)
+
+    async def navegar(self, numero):
+        """Versão assíncrona de ir_para: a consulta roda fora do IOLoop, com indicador de carregamento."""
+        self.tabela.loading = True
+        try:
+            # Métrica por tabela de origem (ex: tabela.usuario), ver metricas.py
+            with medir(f"tabela.{self.fonte.origem.split()[0].lower()}"):
+                await em_segundo_plano(self.ir_para, numero)
+        finally:
+            self.tabela.loading = False
+
+    async def trocar_fonte(self, fonte):
+        """Passa a mostrar outra consulta (ex: novo filtro), na ordenação escolhida no cabeçalho."""
+        sorters = self.tabela.sorters or []
+        if sorters:
+            fonte.ordenar(sorters[0]['field'], sorters[0]['dir'])
+        self.fonte = fonte
+        await self.navegar(1)
+
+    # --- Alterações linha a linha ---
+
+    def _posicoes(self, valor_chave):
+        df = self.tabela.value
+        return df.index[df[self.fonte.chave] == valor_chave]
+
+    async def _recontar(self):
+        self.fonte.descartar_contagem()
+        await em_segundo_plano(self.fonte.total)
+        self._atualizar_info()
+
+    async def inserir(self, linha):
+        """Acrescenta ao fim da página atual a linha gravada (DataFrame de FonteKeyset.linha)."""
+        if len(linha):
+            self.tabela.stream(linha, follow=False)
+        await self._recontar()
+
+    async def atualizar(self, valor_chave, linha):
+        """Aplica a linha alterada, se ela estiver na página atual (só as células mudam no navegador)."""
+        posicoes = self._posicoes(valor_chave)
+        if not len(posicoes):
+            return
+        if not len(linha):
+            # Deixou de passar no filtro da consulta
+            await self.remover(valor_chave)
+            return
+        self.aplicar({
+            coluna: [(int(i), _valor_python(linha[coluna].iat[0])) for i in posicoes]
+            for coluna in linha.columns
+        })
+
+    def aplicar(self, patch):
+        """
+        Tabulator.patch que aceita valores novos em colunas category
+        (o pandas recusa atribuir um valor fora das categorias existentes).
+        """
+        df = self.tabela.value
+        for coluna, alteracoes in patch.items():
+            if isinstance(df[coluna].dtype, pd.CategoricalDtype):
+                novos = {v for _, v in alteracoes if v is not None} - set(df[coluna].cat.categories)
+                if novos:
+                    df[coluna] = df[coluna].cat.add_categories(sorted(novos))
+        self.tabela.patch(patch)
+
+    async def remover(self, valor_chave):
+        """Tira a linha excluída da página atual."""
+        posicoes = self._posicoes(valor_chave)
+        if len(posicoes):
+            # O Tabulator não tem remoção parcial; a página tem só `tamanho_pagina` linhas
+            self.tabela.value = self.tabela.value.drop(posicoes).reset_index(drop=True)
+        await self._recontar()
+
+    async def _on_navegar(self, event):
+        if event.obj is self.btn_primeira:
+            destino = 1
+        elif event.obj is self.btn_anterior:
+            destino = self.numero - 1
+        elif event.obj is self.btn_proxima:
+            destino = self.numero + 1
+        else:
+            destino = await em_segundo_plano(self.fonte.total_paginas)
+        await self.navegar(destino)
+
+    async def _on_ordenar(self, event):
+        sorters = event.new or []
+        if sorters:
+            self.fonte.ordenar(sorters[0]['field'], sorters[0]['dir'])
+        else:
+            self.fonte.ordenar()
+        await self.navegar(1)
+
+    def __panel__(self):
+        return pn.Column(
+            self.tabela,
+            pn.Row(self.btn_primeira, self.btn_anterior, self.btn_proxima, self.btn_ultima, self.info),
+            sizing_mode='stretch_width'
+        )
@@ -0,0 +1,141 @@
+import argparse
+import datetime
+import gzip
+import os
+import re
+
+from conexao import transacao
+
+# Manutenção das partições anuais de Pagamento (migracoes/0007_pagamento_particionado.sql).
+# - Cria com antecedência as partições dos próximos anos (a folha também cria a do seu ano,
+#   mas é melhor que o DDL não caia no meio do fechamento do mês). Rodar por cron, ex: mensal.
+# - Arquiva anos fechados: a partição é desanexada, gravada em CSV compactado (gzip) e apagada,
+#   numa transação só. Se algo falhar antes do commit, o ano continua no banco.
+# - Restaura um ano arquivado: recria a partição e carrega o CSV de volta com COPY.
+#
+# DETACH sem CONCURRENTLY (não é permitido com partição DEFAULT) trava Pagamento durante o
+# comando: arquive fora do horário de uso.
+#
+# Uso:
+#   python particoes.py                          cria as partições até ANOS_A_FRENTE anos à frente
+#   python particoes.py --status                 lista as partições, linhas e tamanho
+#   python particoes.py --arquivar [--manter 5]  arquiva os anos fechados além dos últimos N
+#   python particoes.py --restaurar 2019         traz de volta um ano arquivado
+
+ANOS_A_FRENTE = 1
+MANTER_ANOS = 5   # anos fechados que continuam no banco (relatórios, auditoria)
+PASTA_ARQUIVO = os.getenv('BOLSAS_ARQUIVO_PAGAMENTOS', 'arquivo_pagamentos')
+
+_ANO = re.compile(r'pagamento_(\d{4})$')
+
+SQL_PARTICOES = """
+    SELECT c.relname, pg_get_expr(c.relpartbound, c.oid) AS limites,
+           c.reltuples::bigint AS linhas_estimadas, pg_total_relation_size(c.oid) AS bytes
+    FROM pg_inherits i
+    JOIN pg_class c ON c.oid = i.inhrelid
+    WHERE i.inhparent = 'pagamento'::regclass
+    ORDER BY c.relname
+"""
+
+
+def arquivo(ano, pasta=PASTA_ARQUIVO):
+    return os.path.join(pasta, f'pagamento_{ano}.csv.gz')
+
+
+def garantir(cursor, ate_ano, desde_ano=None):
+    """Cria (se faltarem) as partições de `desde_ano` (padrão: o mesmo) até `ate_ano`. Devolve as criadas."""
+    criadas = []
+    for ano in range(desde_ano or ate_ano, ate_ano + 1):
+        cursor.execute("SELECT criar_particao_pagamento(%s)", (ano,))
+        if cursor.fetchone()[0]:
+            criadas.append(ano)
+    return criadas
+
+
+def particoes(cursor):
+    """[(nome, limites, linhas estimadas, bytes)] das partições de Pagamento."""
+    cursor.execute(SQL_PARTICOES)
+    return cursor.fetchall()
+
+
+def anos_no_banco(cursor):
+    return sorted(int(m.group(1)) for nome, *_ in particoes(cursor) if (m := _ANO.match(nome)))
+
+
+def arquivar(ano, pasta=PASTA_ARQUIVO):
+    """Desanexa a partição do ano, grava em pasta/pagamento_<ano>.csv.gz e apaga a tabela. Devolve as linhas."""
+    if ano >= datetime.date.today().year:
+        raise ValueError(f'{ano} ainda não está fechado')
+    nome = f'pagamento_{ano}'
+    destino = arquivo(ano, pasta)
+    os.makedirs(pasta, exist_ok=True)
+    with transacao() as con, con.cursor() as cursor:
+        cursor.execute("SET LOCAL statement_timeout = 0")
+        if ano not in anos_no_banco(cursor):
+            raise ValueError(f'não há partição de {ano} em Pagamento')
+        cursor.execute(f"ALTER TABLE Pagamento DETACH PARTITION {nome}")
+        cursor.execute(f"SELECT count(*) FROM {nome}")
+        linhas = cursor.fetchone()[0]
+        # Grava num arquivo temporário: um .csv.gz pela metade nunca fica com o nome final
+        parcial = destino + '.parcial'
+        with gzip.open(parcial, 'wb') as f:
+            cursor.copy_expert(f"COPY {nome} TO STDOUT WITH (FORMAT csv, HEADER)", f)
+        os.replace(parcial, destino)
+        cursor.execute(f"DROP TABLE {nome}")
+        # DETACH/DROP não disparam o gatilho de Pagamento: avisa os caches das telas
+        cursor.execute("SELECT pg_notify('bolsas_alteracoes', 'pagamento')")
+    return linhas
+
+
+def restaurar(ano, pasta=PASTA_ARQUIVO):
+    """Recria a partição do ano e carrega pasta/pagamento_<ano>.csv.gz. Devolve as linhas."""
+    origem = arquivo(ano, pasta)
+    with transacao() as con, con.cursor() as cursor:
+        cursor.execute("SET LOCAL statement_timeout = 0")
+        if not garantir(cursor, ano):
+            raise ValueError(f'a partição de {ano} já está no banco')
+        with gzip.open(origem, 'rb') as f:
+            # Pelo pai: o gatilho de Pagamento avisa as telas
+            cursor.copy_expert("COPY Pagamento FROM STDIN WITH (FORMAT csv, HEADER)", f)
+        linhas = cursor.rowcount
+        cursor.execute(f"ANALYZE pagamento_{ano}")
+    return linhas
+
+
+def _tamanho(n):
+    for unidade in ('B', 'kB', 'MB', 'GB'):
+        if n < 1024:
+            return f'{n:.0f} {unidade}'
+        n /= 1024
+    return f'{n:.1f} TB'
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Partições anuais de Pagamento')
+    acao = parser.add_mutually_exclusive_group()
+    acao.add_argument('--status', action='store_true', help='lista as partições')
+    acao.add_argument('--arquivar', action='store_true', help='arquiva os anos fechados mais antigos')
+    acao.add_argument('--restaurar', type=int, metavar='ANO', help='recarrega um ano arquivado')
+    parser.add_argument('--manter', type=int, default=MANTER_ANOS,
+                        help=f'anos fechados que ficam no banco ao arquivar (padrão: {MANTER_ANOS})')
+    parser.add_argument('--pasta', default=PASTA_ARQUIVO, help='pasta dos arquivos .csv.gz')
+    args = parser.parse_args()
+
+    hoje = datetime.date.today()
+    if args.status:
+        with transacao() as con, con.cursor() as cursor:
+            for nome, limites, linhas, tamanho in particoes(cursor):
+                print(f'{nome}: {limites} ~{max(linhas, 0):,} linhas, {_tamanho(tamanho)}')
+    elif args.arquivar:
+        with transacao() as con, con.cursor() as cursor:
+            anos = [a for a in anos_no_banco(cursor) if a < hoje.year - args.manter]
+        if not anos:
+            print('Nenhum ano para arquivar.')
+        for ano in anos:
+            print(f'{ano}: {arquivar(ano, args.pasta):,} linhas em {arquivo(ano, args.pasta)}')
+    elif args.restaurar:
+        print(f'{args.restaurar}: {restaurar(args.restaurar, args.pasta):,} linhas restauradas')
+    else:
+        with transacao() as con, con.cursor() as cursor:
+            criadas = garantir(cursor, hoje.year + ANOS_A_FRENTE, hoje.year)
+        print(f"Criadas: {', '.join(map(str, criadas))}" if criadas else 'Todas as partições já existem.')
@@ -0,0 +1,210 @@
+import collections
+import contextvars
+import functools
+import hashlib
+import re
+import threading
+import weakref
+from contextlib import contextmanager
+
+import pandas as pd
+import psycopg2
+
+from cache import CachePorTabela
+from metricas import CursorMedido, registro
+from notificacoes import catalogo
+
+# Comandos preparados no servidor (PREPARE/EXECUTE), um por conexão do pool.
+# O psycopg2 manda o texto do SQL a cada execute e o Postgres faz parse/planejamento toda vez.
+# Aqui o SQL (com parâmetros %(nome)s) vira `PREPARE bolsas_<hash> AS ... $1, $2` na primeira vez
+# que uma conexão o executa; daí em diante só vai `EXECUTE bolsas_<hash>(valores)`.
+#
+# - Cada conexão do pool tem o seu conjunto (comandos preparados vivem na sessão do Postgres);
+#   conexão descartada/reciclada leva o conjunto junto (WeakKeyDictionary).
+# - No máximo MAX_POR_CONEXAO por conexão; o menos usado recentemente sofre DEALLOCATE.
+# - O PREPARE roda num SAVEPOINT: se o Postgres não aceitar (ex: tipo de parâmetro ambíguo),
+#   a transação do chamador não é perdida e o SQL passa a ser executado sem preparar.
+# - Depois de uma mudança de esquema, o EXECUTE de um SELECT */RETURNING * falha com "cached plan
+#   must not change result type": o comando é descartado (DEALLOCATE) e preparado de novo. Se o
+#   EXECUTE abriu a transação, ele é repetido uma vez; no meio de uma transação o erro segue
+#   (a transação já está abortada) e o próximo uso prepara a versão nova.
+# Não use atrás de um pgbouncer em modo transaction (a sessão muda a cada transação).
+#
+# consultar(..., tabelas=[...]) guarda o resultado num cache do processo (chave: SQL + parâmetros),
+# dividido por todas as sessões. A entrada cai quando alguma das tabelas é alterada: na hora, pelas
+# escritas do Repositorio, e depois do commit, pelo aviso LISTEN/NOTIFY (também de outros processos).
+
+MAX_POR_CONEXAO = 200
+PREFIXO = 'bolsas_'
+
+# Resultados de leituras por (SQL, parâmetros); o TTL é só uma rede de segurança
+cache_leituras = CachePorTabela(max_itens=2048, ttl=120.0)
+
+# Cancelamento das leituras do contexto atual (busca.BuscaAoVivo); copiado para o thread por em_segundo_plano
+cancelamento_atual = contextvars.ContextVar('cancelamento_atual', default=None)
+
+_por_conexao = weakref.WeakKeyDictionary()  # conexão psycopg2 -> OrderedDict {nome: None}
+_nao_preparaveis = set()                     # SQLs recusados pelo PREPARE
+_lock = threading.Lock()
+
+_PARAMETRO = re.compile(r'%\((\w+)\)s|%%|%s')
+_PLANO_ALTERADO = 'cached plan must not change result type'
+
+
+@functools.lru_cache(maxsize=1024)
+def converter(sql):
+    """
+    (nome do comando, SQL com $1..$n, nomes dos parâmetros na ordem) para um SQL com %(nome)s.
+    Devolve None se o SQL usar parâmetros posicionais (%s), que não têm nome para reaproveitar.
+    """
+    nomes = []
+
+    def trocar(m):
+        if m.group(0) == '%%':
+            return '%'
+        if m.group(1) is None:
+            raise ValueError('posicional')
+        if m.group(1) not in nomes:
+            nomes.append(m.group(1))
+        return f'${nomes.index(m.group(1)) + 1}'
+
+    try:
+        texto = _PARAMETRO.sub(trocar, sql)
+    except ValueError:
+        return None
+    nome = PREFIXO + hashlib.sha1(sql.encode()).hexdigest()[:16]
+    registro.apelidar(nome, sql)  # as métricas mostram o SQL original, não o EXECUTE
+    return nome, texto, tuple(nomes)
+
+
+def _preparar(cursor, nome, texto):
+    """PREPARE dentro de um SAVEPOINT. Devolve False se o Postgres recusou."""
+    cursor.execute("SAVEPOINT bolsas_preparar")
+    try:
+        cursor.execute(f"PREPARE {nome} AS {texto}")
+    except psycopg2.errors.QueryCanceled:
+        # Cancelamento/timeout não diz nada sobre o SQL: não marca como não preparável
+        raise
+    except psycopg2.errors.DuplicatePreparedStatement:
+        # Sobrou na sessão de um EXECUTE que falhou no meio de uma transação (ver executar)
+        cursor.execute("ROLLBACK TO SAVEPOINT bolsas_preparar")
+        cursor.execute(f"DEALLOCATE {nome}")
+        cursor.execute(f"PREPARE {nome} AS {texto}")
+    except psycopg2.Error:
+        cursor.execute("ROLLBACK TO SAVEPOINT bolsas_preparar")
+        return False
+    cursor.execute("RELEASE SAVEPOINT bolsas_preparar")
+    return True
+
+
+def executar(cursor, sql, params=None):
+    """`cursor.execute(sql, params)` usando o comando preparado da conexão do cursor."""
+    convertido = converter(sql) if sql not in _nao_preparaveis else None
+    if convertido is None:
+        cursor.execute(sql, params)
+        return
+    nome, texto, nomes = convertido
+
+    with _lock:
+        preparados = _por_conexao.setdefault(cursor.connection, collections.OrderedDict())
+    if nome in preparados:
+        preparados.move_to_end(nome)
+    else:
+        if not _preparar(cursor, nome, texto):
+            _nao_preparaveis.add(sql)
+            cursor.execute(sql, params)
+            return
+        preparados[nome] = None
+        if len(preparados) > MAX_POR_CONEXAO:
+            antigo, _ = preparados.popitem(last=False)
+            cursor.execute(f"DEALLOCATE {antigo}")
+
+    argumentos = f"({', '.join(f'%({n})s' for n in nomes)})" if nomes else ''
+    conexao = cursor.connection
+    abre_transacao = conexao.info.transaction_status == psycopg2.extensions.TRANSACTION_STATUS_IDLE
+    try:
+        cursor.execute(f"EXECUTE {nome}{argumentos}", params)
+    except psycopg2.errors.InvalidSqlStatementName:
+        # A sessão perdeu o comando (ex: DISCARD ALL): prepara de novo na próxima vez
+        preparados.pop(nome, None)
+        raise
+    except psycopg2.errors.FeatureNotSupported as e:
+        if _PLANO_ALTERADO not in str(e):
+            raise
+        # O esquema mudou e o resultado do comando preparado mudou de forma
+        preparados.pop(nome, None)
+        if not abre_transacao:
+            raise  # o _preparar da próxima vez descarta o antigo
+        # Nada da transação se perde: desfaz, descarta e repete uma vez (já fora do IDLE, não repete de novo)
+        conexao.rollback()
+        cursor.execute(f"DEALLOCATE {nome}")
+        executar(cursor, sql, params)
+
+
+class ConsultaCancelada(Exception):
+    """A leitura foi cancelada por Cancelamento.cancelar() (ficou velha antes de terminar)."""
+
+
+class Cancelamento:
+    """
+    Permite interromper, de outro thread, a leitura que está rodando com este cancelamento
+    em `cancelamento_atual`: envia o cancel do protocolo (o mesmo de pg_cancel_backend) ao
+    backend que executa a consulta, que para na hora em vez de terminar um scan que ninguém vai ver.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._conexao = None
+        self.cancelado = False
+
+    def cancelar(self):
+        with self._lock:
+            self.cancelado = True
+            if self._conexao is not None:
+                self._conexao.cancel()
+
+    @contextmanager
+    def executando(self, conexao):
+        with self._lock:
+            if self.cancelado:
+                raise ConsultaCancelada()
+            self._conexao = conexao
+        try:
+            yield
+        except psycopg2.errors.QueryCanceled as e:
+            # O mesmo erro vem do statement_timeout: só é "cancelada" se foi pedido
+            if self.cancelado:
+                raise ConsultaCancelada() from e
+            raise
+        finally:
+            with self._lock:
+                self._conexao = None
+
+
+def _ler(engine, sql, params):
+    cancelamento = cancelamento_atual.get()
+    with engine.connect() as conexao:
+        dbapi = conexao.connection.dbapi_connection
+        with dbapi.cursor(cursor_factory=CursorMedido) as cursor:
+            if cancelamento is None:
+                executar(cursor, sql, params)
+            else:
+                with cancelamento.executando(dbapi):
+                    executar(cursor, sql, params)
+            # coerce_float como no read_sql_query: NUMERIC (Decimal) vira float
+            return pd.DataFrame.from_records(cursor.fetchall(), columns=[d.name for d in cursor.description],
+                                             coerce_float=True)
+
+
+def consultar(engine, sql, params=None, tabelas=None):
+    """
+    Como pd.read_sql_query(sql, engine, params), mas com o comando preparado na conexão do pool.
+    Com `tabelas` (as tabelas que o SQL lê), o resultado vem do cache até uma delas ser alterada.
+    """
+    if not tabelas:
+        return _ler(engine, sql, params)
+    # Sem o listener, alterações feitas por outros processos só apareceriam depois do TTL
+    catalogo.iniciar_escuta()
+    chave = (engine.url.host, sql, repr(sorted((params or {}).items())))
+    # Cópia: a tela altera o DataFrame no lugar (Tabulator.patch/stream)
+    return cache_leituras.get_or_set(chave, lambda: _ler(engine, sql, params), tabelas).copy()
@@ -0,0 +1,97 @@
+import argparse
+import os
+import threading
+import types
+
+import panel as pn
+
+import exportacao
+import metricas
+
+# Servidor único com todas as telas, cada uma numa rota:
+#   python principal.py [--porta 5006]
+# Configuração (.env), engines/pools, executor, caches e o listener de avisos são carregados
+# uma vez por processo e divididos por todas as telas, em vez de um servidor por script.
+#
+# Cada tela continua sendo um script (roda sozinha com `panel serve app.py`). Aqui o script é
+# lido e compilado só na primeira visita à rota; cada sessão executa o código já compilado
+# num namespace novo, então os widgets continuam sendo por sessão.
+
+pn.extension('tabulator', notifications=True)
+
+PASTA = os.path.dirname(os.path.abspath(__file__))
+
+# rota -> (script, título no menu, objeto raiz criado pelo script)
+TELAS = {
+    'usuarios':  ('app.py', '👤 Usuários', 'layout'),
+    'programas': ('PA.py', '💰 Programas', 'template'),
+    'editais':   ('ed.py', '📅 Editais', 'template'),
+    'bolsistas': ('bs.py', '🎓 Bolsistas', 'template'),
+    'visao-geral': ('visao_geral.py', '📊 Visão Geral', 'template'),
+    'admin':     ('admin.py', '⏱️ Desempenho', 'template'),
+}
+# Rotas que existem mas não aparecem no menu das telas (acesso direto pela URL)
+FORA_DO_MENU = {'admin'}
+
+_compilados = {}  # script -> code object
+_lock = threading.Lock()
+
+
+def _codigo(arquivo):
+    """Compila o script na primeira visita; as sessões seguintes reaproveitam o code object."""
+    with _lock:
+        if arquivo not in _compilados:
+            caminho = os.path.join(PASTA, arquivo)
+            with open(caminho, encoding='utf-8') as f:
+                _compilados[arquivo] = compile(f.read(), caminho, 'exec')
+        return _compilados[arquivo]
+
+
+def _menu(atual):
+    links = ' | '.join(
+        f'**{titulo}**' if rota == atual else f'[{titulo}](/{rota})'
+        for rota, (_, titulo, _) in TELAS.items()
+        if rota not in FORA_DO_MENU or rota == atual
+    )
+    return pn.pane.Markdown(links, styles={'color': 'white'}, margin=(0, 20))
+
+
+def criar_tela(rota):
+    """Função da rota: executa o script da tela para a sessão e devolve o layout com o menu."""
+    arquivo, titulo, raiz = TELAS[rota]
+
+    def criar():
+        modulo = types.ModuleType(f'tela_{rota}')
+        modulo.__file__ = os.path.join(PASTA, arquivo)
+        exec(_codigo(arquivo), modulo.__dict__)
+        objeto = getattr(modulo, raiz)
+        if isinstance(objeto, pn.template.BaseTemplate):
+            objeto.header.append(_menu(rota))
+            return objeto
+        return pn.template.FastListTemplate(title=titulo, header=[_menu(rota)], main=[objeto])
+
+    return criar
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Servidor único das telas de bolsas e auxílios')
+    parser.add_argument('--porta', type=int, default=5006)
+    parser.add_argument('--endereco', default='localhost', help='interface de rede (ex: 0.0.0.0)')
+    parser.add_argument('--origem', action='append', default=None,
+                        help='origem permitida no websocket (host:porta); pode repetir')
+    args = parser.parse_args()
+
+    pn.serve(
+        {rota: criar_tela(rota) for rota in TELAS},
+        port=args.porta,
+        address=args.endereco,
+        websocket_origin=args.origem,
+        title={rota: titulo for rota, (_, titulo, _) in TELAS.items()},
+        # Download das exportações (CSV/Parquet) e métricas no formato do Prometheus (com token)
+        extra_patterns=exportacao.ROUTES + metricas.ROUTES,
+        show=False,
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,296 @@
+import json
+
+from psycopg2.extras import execute_values
+
+from auditoria import auditoria, imagem
+from conexao import tabela_alterada
+from preparados import executar
+
+# Camada de escrita compartilhada pelas telas: um Repositorio por tabela de criacao.sql.
+# Cada operação é um único comando SQL (uma ida ao banco) que já devolve a linha afetada:
+#   INSERT ... RETURNING *, INSERT ... ON CONFLICT ... RETURNING *,
+#   UPDATE ... RETURNING *, DELETE ... RETURNING *
+# Nada de "SELECT 1 para ver se existe" antes de gravar: além da ida extra ao banco, entre o
+# SELECT e o comando outra sessão podia inserir/apagar a mesma linha.
+#
+# As operações recebem o cursor da transação (conexao.transacao()), então várias delas
+# e a leitura da linha para a tabela da tela (FonteKeyset.linha) podem ir no mesmo commit.
+# As operações de uma linha vão como comandos preparados (preparados.py): o texto de cada
+# INSERT/UPDATE/DELETE é o mesmo a cada clique, então o parse/planejamento é feito uma vez por conexão.
+# Toda escrita invalida as leituras em cache da tabela (conexao.tabela_alterada): na hora e de
+# novo depois do commit; escritas de outros processos chegam pelo aviso LISTEN/NOTIFY.
+# Toda escrita é auditada (auditoria.py): o próprio RETURNING traz a imagem da linha antes
+# (_antes) e/ou depois (_depois) em JSON, que segue para a fila da auditoria e sai do resultado.
+
+# Linhas por comando nas operações em lote (execute_values)
+TAMANHO_LOTE = 500
+
+
+class Repositorio:
+    """
+    Escritas de uma tabela.
+
+    - tabela: nome da tabela no banco.
+    - chave: colunas da chave primária.
+    - colunas: colunas graváveis (inclui a chave quando ela não é SERIAL).
+    Linhas entram como dict {coluna: valor} (nomes sem diferenciar maiúsculas) e voltam como
+    dict com os nomes em minúsculas, do jeito que o Postgres os devolve.
+    """
+
+    def __init__(self, tabela, chave, colunas):
+        self.tabela = tabela
+        self.chave = tuple(chave)
+        self.colunas = tuple(colunas)
+        self._nomes = {c.lower(): c for c in (*self.chave, *self.colunas)}
+
+    # --- Montagem dos comandos ---
+
+    def _normalizar(self, valores):
+        """Converte as chaves do dict para os nomes do esquema (e recusa colunas desconhecidas)."""
+        normalizados = {}
+        for nome, valor in valores.items():
+            coluna = self._nomes.get(nome.lower())
+            if coluna is None:
+                raise ValueError(f'{self.tabela} não tem a coluna {nome!r}')
+            normalizados[coluna] = valor
+        return normalizados
+
+    def _where_chave(self, chave, apelido=None):
+        """WHERE da chave primária; `chave` é o valor (ou tupla de valores, se composta)."""
+        valores = chave if isinstance(chave, (tuple, list)) else (chave,)
+        if len(valores) != len(self.chave):
+            raise ValueError(f'{self.tabela}: chave {self.chave} recebeu {chave!r}')
+        prefixo = f'{apelido}.' if apelido else ''
+        condicao = ' AND '.join(f'{prefixo}{c} = %(_pk{i})s' for i, c in enumerate(self.chave))
+        return condicao, {f'_pk{i}': v for i, v in enumerate(valores)}
+
+    def _alterada(self):
+        tabela_alterada(self.tabela)
+
+    def _auditar(self, operacao, linha):
+        """Tira as imagens _antes/_depois da linha devolvida e as entrega à auditoria."""
+        if linha is not None:
+            antes, depois = linha.pop('_antes', None), linha.pop('_depois', None)
+            chave = {c.lower(): linha[c.lower()] for c in self.chave}
+            auditoria.registrar(self.tabela, operacao, chave, antes, depois)
+        return linha
+
+    @staticmethod
+    def _linha(cursor):
+        registro = cursor.fetchone()
+        if registro is None:
+            return None
+        return dict(zip([d.name for d in cursor.description], registro))
+
+    def _insert(self, valores):
+        valores = self._normalizar(valores)
+        colunas = ', '.join(valores)
+        marcadores = ', '.join(f'%({c})s' for c in valores)
+        return f"INSERT INTO {self.tabela} ({colunas}) VALUES ({marcadores})", valores
+
+    # --- Operações ---
+
+    def inserir(self, cursor, valores):
+        """INSERT ... RETURNING *: devolve a linha gravada (com o ID gerado pelo banco)."""
+        sql, params = self._insert(valores)
+        executar(cursor, f"{sql} RETURNING *, {imagem(self.tabela)} AS _depois", params)
+        self._alterada()
+        return self._auditar('INSERT', self._linha(cursor))
+
+    def inserir_se_novo(self, cursor, valores, conflito=None):
+        """
+        Insere só se não houver linha com a mesma chave (ou as colunas `conflito`, de um UNIQUE).
+        Devolve a linha gravada, ou None se já existia. Seguro contra inserções simultâneas.
+        """
+        sql, params = self._insert(valores)
+        alvo = ', '.join(conflito or self.chave)
+        executar(cursor, f"{sql} ON CONFLICT ({alvo}) DO NOTHING RETURNING *, {imagem(self.tabela)} AS _depois",
+                 params)
+        self._alterada()
+        return self._auditar('INSERT', self._linha(cursor))
+
+    def inserir_ou_atualizar(self, cursor, valores, conflito=None):
+        """Upsert: insere, ou atualiza as colunas informadas se a chave (ou `conflito`) já existir."""
+        sql, params = self._insert(valores)
+        alvo = [self._nomes[c.lower()] for c in (conflito or self.chave)]
+        atualizar = [c for c in params if c not in alvo]
+        if atualizar:
+            acao = 'DO UPDATE SET ' + ', '.join(f'{c} = EXCLUDED.{c}' for c in atualizar)
+        else:
+            # Nada para atualizar: um UPDATE inócuo para o RETURNING devolver a linha existente
+            acao = f'DO UPDATE SET {alvo[0]} = EXCLUDED.{alvo[0]}'
+        # O RETURNING do ON CONFLICT só enxerga a linha final: a auditoria fica sem a imagem anterior
+        executar(cursor, f"{sql} ON CONFLICT ({', '.join(alvo)}) {acao} RETURNING *, {imagem(self.tabela)} AS _depois",
+                 params)
+        self._alterada()
+        return self._auditar('UPSERT', self._linha(cursor))
+
+    def atualizar(self, cursor, chave, valores):
+        """UPDATE ... WHERE chave RETURNING *: devolve a linha nova, ou None se a chave não existe."""
+        valores = self._normalizar(valores)
+        if not valores:
+            raise ValueError(f'{self.tabela}: nada para atualizar')
+        condicao, params = self._where_chave(chave, '_nova')
+        atribuicoes = ', '.join(f'{c} = %({c})s' for c in valores)
+        # A própria tabela no FROM (mesma chave) é a linha como estava antes do UPDATE
+        juncao = ' AND '.join(f'_velha.{c} = _nova.{c}' for c in self.chave)
+        executar(
+            cursor,
+            f"UPDATE {self.tabela} AS _nova SET {atribuicoes} FROM {self.tabela} AS _velha "
+            f"WHERE {condicao} AND {juncao} "
+            f"RETURNING _nova.*, {imagem('_velha')} AS _antes, {imagem('_nova')} AS _depois",
+            {**valores, **params}
+        )
+        self._alterada()
+        return self._auditar('UPDATE', self._linha(cursor))
+
+    def excluir(self, cursor, chave):
+        """DELETE ... RETURNING *: devolve a linha apagada, ou None se a chave não existe."""
+        condicao, params = self._where_chave(chave)
+        executar(cursor, f"DELETE FROM {self.tabela} WHERE {condicao} RETURNING *, {imagem(self.tabela)} AS _antes",
+                 params)
+        self._alterada()
+        return self._auditar('DELETE', self._linha(cursor))
+
+    # --- Em lote (várias linhas por comando) ---
+
+    def inserir_varios(self, cursor, linhas):
+        """INSERT ... VALUES (...), (...) RETURNING * com execute_values; devolve as linhas gravadas."""
+        # Agrupa por conjunto de colunas: coluna omitida fica com o DEFAULT do banco
+        grupos = {}
+        for valores in linhas:
+            valores = self._normalizar(valores)
+            grupos.setdefault(tuple(valores), []).append(tuple(valores.values()))
+        gravadas = []
+        for colunas, registros in grupos.items():
+            resultado = execute_values(
+                cursor,
+                f"INSERT INTO {self.tabela} ({', '.join(colunas)}) VALUES %s "
+                f"RETURNING *, {imagem(self.tabela)} AS _depois",
+                registros, page_size=TAMANHO_LOTE, fetch=True
+            )
+            nomes = [d.name for d in cursor.description]
+            gravadas.extend(self._auditar('INSERT', dict(zip(nomes, r))) for r in resultado)
+        if gravadas:
+            self._alterada()
+        return gravadas
+
+    def atualizar_varios(self, cursor, alteracoes):
+        """
+        Aplica {chave: {coluna: valor}} com execute_values: um UPDATE ... FROM (VALUES ...) por
+        conjunto de colunas, com até TAMANHO_LOTE linhas por comando. Devolve quantas linhas
+        foram de fato atualizadas (chave inexistente não conta nem é auditada).
+        """
+        grupos = {}
+        for chave, valores in alteracoes.items():
+            valores = self._normalizar(valores)
+            if valores:
+                chave = chave if isinstance(chave, (tuple, list)) else (chave,)
+                grupos.setdefault(tuple(valores), []).append(
+                    {**{c.lower(): v for c, v in zip(self.chave, chave)},
+                     **{c.lower(): v for c, v in valores.items()}}
+                )
+        atualizadas = 0
+        for colunas, registros in grupos.items():
+            # Cada linha vai como JSON e volta tipada pelo próprio tipo-linha da tabela
+            # (um literal no VALUES seria text, e text não vira date/numeric sozinho)
+            atribuicoes = ', '.join(f'{c} = _r.{c}' for c in colunas)
+            juncao = ' AND '.join(f'_nova.{c} = _r.{c} AND _velha.{c} = _r.{c}' for c in self.chave)
+            resultado = execute_values(
+                cursor,
+                f"UPDATE {self.tabela} AS _nova SET {atribuicoes} "
+                f"FROM {self.tabela} AS _velha, (VALUES %s) AS _v (dados), "
+                f"jsonb_populate_record(NULL::{self.tabela}, _v.dados) AS _r "
+                f"WHERE {juncao} "
+                f"RETURNING _nova.*, {imagem('_velha')} AS _antes, {imagem('_nova')} AS _depois",
+                [(json.dumps(r, default=str),) for r in registros],
+                template='(%s::jsonb)', page_size=TAMANHO_LOTE, fetch=True
+            )
+            nomes = [d.name for d in cursor.description]
+            for r in resultado:
+                self._auditar('UPDATE', dict(zip(nomes, r)))
+            atualizadas += len(resultado)
+        if atualizadas:
+            self._alterada()
+        return atualizadas
+
+    def excluir_varios(self, cursor, chaves):
+        """DELETE ... WHERE chave IN (VALUES ...) com execute_values; devolve as linhas apagadas."""
+        registros = [tuple(c) if isinstance(c, (tuple, list)) else (c,) for c in chaves]
+        if not registros:
+            return []
+        resultado = execute_values(
+            cursor,
+            f"DELETE FROM {self.tabela} WHERE ({', '.join(self.chave)}) IN (VALUES %s) "
+            f"RETURNING *, {imagem(self.tabela)} AS _antes",
+            registros, page_size=TAMANHO_LOTE, fetch=True
+        )
+        self._alterada()
+        nomes = [d.name for d in cursor.description]
+        return [self._auditar('DELETE', dict(zip(nomes, r))) for r in resultado]
+
+    def aplicar_lote(self, cursor, inserir=(), atualizar=None, excluir=()):
+        """
+        Grava um conjunto de alterações (ex: edição na tabela da tela) no cursor da transação:
+        exclui, depois atualiza, depois insere. Devolve as contagens de cada operação.
+        """
+        excluidas = self.excluir_varios(cursor, excluir)
+        atualizadas = self.atualizar_varios(cursor, atualizar or {})
+        inseridas = self.inserir_varios(cursor, inserir)
+        return {'inseridas': len(inseridas), 'atualizadas': atualizadas, 'excluidas': len(excluidas)}
+
+    def obter(self, cursor, chave):
+        """Linha da chave (ou None), lida na mesma transação."""
+        condicao, params = self._where_chave(chave)
+        executar(cursor, f"SELECT * FROM {self.tabela} WHERE {condicao}", params)
+        return self._linha(cursor)
+
+
+# --- Tabelas (criacao.sql) ---
+
+usuarios = Repositorio(
+    'Usuario', ['Id_usuario'],
+    ['CPF', 'Nome', 'Email', 'Senha', 'Endereco', 'Telefone']
+)
+formularios = Repositorio(
+    'FormularioSocioeconomico', ['Id_Form'],
+    ['Banco', 'Agencia', 'Conta', 'RendaPerCapita']
+)
+programas = Repositorio(
+    'Programa_Auxilio', ['Id_programa'],
+    ['Nome_Programa', 'Descricao', 'Valor', 'Tipo', 'Vagas']
+)
+# Servidor, Estudante e Bolsista herdam a chave de outra tabela: ela entra no INSERT
+servidores = Repositorio(
+    'Servidor', ['Id_Servidor'],
+    ['Id_Servidor', 'Cargo', 'Setor']
+)
+estudantes = Repositorio(
+    'Estudante', ['Id_Estudante'],
+    ['Id_Estudante', 'Matricula', 'Curso', 'Id_Form']
+)
+editais = Repositorio(
+    'Edital', ['Id_edital'],
+    ['Data_inicio', 'Data_fim', 'Status', 'Id_programa']
+)
+inscricoes = Repositorio(
+    'Inscricao', ['Id_inscricao'],
+    ['Data', 'Status', 'Justificativa', 'Id_edital', 'Id_Estudante']
+)
+documentos = Repositorio(
+    'Documento', ['Id_documento'],
+    ['Tipo_documento', 'Arquivo_path', 'Data_envio', 'Id_inscricao']
+)
+supervisoes = Repositorio(
+    'Supervisiona', ['Id_Servidor', 'Id_inscricao'],
+    ['Id_Servidor', 'Id_inscricao']
+)
+# Particionada por Data_Pagamento (migracoes/0007): a coluna de partição faz parte da PK
+pagamentos = Repositorio(
+    'Pagamento', ['Id_pagamento', 'Data_Pagamento'],
+    ['Valor_pago', 'Data_Pagamento', 'Id_inscricao']
+)
+bolsistas = Repositorio(
+    'Bolsista', ['Id_inscricao'],
+    ['Id_inscricao', 'Data_inicio', 'Data_fim', 'Data_desligamento', 'Frequencia', 'Id_Orientador', 'Id_Estudante']
+)
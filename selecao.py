@@ -0,0 +1,118 @@
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from conexao import transacao
+
+# Seleção dos candidatos de um edital.
+# Todas as inscrições do edital vêm numa consulta só, com a renda per capita do formulário
+# socioeconômico; a classificação é feita de uma vez com NumPy (sem laço por inscrição) e as
+# situações são gravadas com um UPDATE por situação, numa única transação.
+#
+# Critérios, nesta ordem:
+#   1. menor renda per capita (sem formulário/renda informada fica no fim);
+#   2. inscrição mais antiga (Data);
+#   3. menor número de inscrição.
+# As vagas são as do programa do edital menos as inscrições já aprovadas nele.
+#
+# Uso:
+#   python selecao.py ID_EDITAL [--simular]
+
+STATUS_CANDIDATO = 'Em Análise'
+STATUS_APROVADO = 'Aprovado'
+STATUS_ESPERA = 'Lista de Espera'
+
+# Trava o edital: duas seleções simultâneas do mesmo edital não distribuem as mesmas vagas
+SQL_EDITAL = """
+    SELECT E.Id_edital, coalesce(P.Vagas, 0) AS vagas
+    FROM Edital E
+    JOIN Programa_Auxilio P ON P.Id_programa = E.Id_programa
+    WHERE E.Id_edital = %(edital)s
+    FOR UPDATE OF E
+"""
+
+SQL_INSCRICOES = """
+    SELECT I.Id_inscricao, I.Data, I.Status, F.RendaPerCapita
+    FROM Inscricao I
+    LEFT JOIN Estudante ES ON ES.Id_Estudante = I.Id_Estudante
+    LEFT JOIN FormularioSocioeconomico F ON F.Id_Form = ES.Id_Form
+    WHERE I.Id_edital = %(edital)s
+"""
+
+SQL_ATUALIZAR_STATUS = "UPDATE Inscricao SET Status = %(status)s WHERE Id_inscricao = ANY(%(ids)s)"
+
+
+def classificar(inscricoes, vagas):
+    """
+    Recebe as inscrições do edital (id_inscricao, data, status, rendapercapita) e as vagas do programa.
+    Devolve os candidatos em ordem de classificação com as colunas `posicao` e `novo_status`.
+    """
+    ja_aprovados = int((inscricoes['status'] == STATUS_APROVADO).sum())
+    livres = max(int(vagas) - ja_aprovados, 0)
+
+    candidatos = inscricoes[inscricoes['status'] == STATUS_CANDIDATO]
+    renda = pd.to_numeric(candidatos['rendapercapita'], errors='coerce').to_numpy(dtype=float)
+    sem_renda = np.isnan(renda)
+    # Inscrição sem data vai para depois das datadas
+    data = pd.to_datetime(candidatos['data']).fillna(pd.Timestamp.max).to_numpy(dtype='datetime64[ns]').astype(np.int64)
+    ids = candidatos['id_inscricao'].to_numpy()
+
+    # lexsort ordena pela última chave primeiro: sem renda no fim, depois renda, data e ID
+    ordem = np.lexsort((ids, data, np.where(sem_renda, np.inf, renda), sem_renda))
+
+    classificados = candidatos.iloc[ordem].reset_index(drop=True)
+    classificados['posicao'] = np.arange(1, len(classificados) + 1)
+    classificados['novo_status'] = np.where(classificados['posicao'] <= livres, STATUS_APROVADO, STATUS_ESPERA)
+    return classificados
+
+
+def selecionar(id_edital, simular=False):
+    """
+    Classifica e grava as situações das inscrições em análise do edital.
+    Devolve {'vagas', 'ja_aprovados', 'candidatos', 'aprovados', 'espera', 'classificacao': DataFrame}.
+    Com simular=True nada é gravado.
+    """
+    with transacao() as con, con.cursor() as cursor:
+        cursor.execute(SQL_EDITAL, {'edital': id_edital})
+        edital = cursor.fetchone()
+        if edital is None:
+            raise ValueError(f'Edital {id_edital} não encontrado.')
+        vagas = edital[1]
+
+        cursor.execute(SQL_INSCRICOES, {'edital': id_edital})
+        inscricoes = pd.DataFrame.from_records(cursor.fetchall(), columns=[d.name for d in cursor.description])
+        classificados = classificar(inscricoes, vagas)
+
+        if not simular:
+            for status in (STATUS_APROVADO, STATUS_ESPERA):
+                ids = classificados.loc[classificados['novo_status'] == status, 'id_inscricao'].tolist()
+                if ids:
+                    cursor.execute(SQL_ATUALIZAR_STATUS, {'status': status, 'ids': ids})
+
+    aprovados = int((classificados['novo_status'] == STATUS_APROVADO).sum())
+    return {
+        'vagas': int(vagas),
+        'ja_aprovados': int((inscricoes['status'] == STATUS_APROVADO).sum()),
+        'candidatos': len(classificados),
+        'aprovados': aprovados,
+        'espera': len(classificados) - aprovados,
+        'classificacao': classificados,
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Classifica as inscrições de um edital e distribui as vagas')
+    parser.add_argument('edital', type=int, help='ID do edital')
+    parser.add_argument('--simular', action='store_true', help='mostra a classificação sem gravar')
+    args = parser.parse_args()
+
+    resultado = selecionar(args.edital, simular=args.simular)
+
+    print(f"Vagas do programa: {resultado['vagas']} (já aprovados no edital: {resultado['ja_aprovados']})")
+    print(f"Candidatos em análise: {resultado['candidatos']}")
+    print(f"Aprovados agora: {resultado['aprovados']} | Lista de espera: {resultado['espera']}")
+    if args.simular:
+        print("Simulação: nada foi gravado.")
+        colunas = ['posicao', 'id_inscricao', 'rendapercapita', 'data', 'novo_status']
+        print(resultado['classificacao'][colunas].head(30).to_string(index=False))
@@ -0,0 +1,32 @@
+import asyncio
+import contextvars
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from conexao import POOL_SIZE, POOL_MAX_OVERFLOW
+
+# Execução do acesso ao banco fora do IOLoop do Tornado/Bokeh.
+# O IOLoop atende todas as sessões: uma consulta lenta rodando nele congela a tela de todo mundo.
+
+# Mais threads que conexões no pool só ficariam esperando uma conexão livre
+executor = ThreadPoolExecutor(
+    max_workers=POOL_SIZE + POOL_MAX_OVERFLOW,
+    thread_name_prefix='bolsas-db'
+)
+
+# BOLSAS_EXECUCAO_SINCRONA=1 roda tudo no próprio loop (útil para depurar no notebook)
+EXECUCAO_SINCRONA = os.getenv('BOLSAS_EXECUCAO_SINCRONA', '0') == '1'
+
+
+async def em_segundo_plano(funcao, *args, **kwargs):
+    """
+    Executa `funcao(*args, **kwargs)` num thread do executor e aguarda o resultado.
+    O contexto (contextvars) é copiado para o thread, então `pn.state.curdoc`
+    e `pn.state.notifications` continuam apontando para a sessão que disparou a ação.
+    """
+    if EXECUCAO_SINCRONA:
+        return funcao(*args, **kwargs)
+    loop = asyncio.get_running_loop()
+    contexto = contextvars.copy_context()
+    return await loop.run_in_executor(executor, functools.partial(contexto.run, funcao, *args, **kwargs))
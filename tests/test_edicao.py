@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+
+from edicao import EdicaoEmLote
+from paginacao import TabelaPaginada
+
+
+class FonteFixa:
+    """Uma página fixa no lugar da FonteKeyset: a edição não vai ao banco até o Salvar."""
+
+    colunas = {'id_edital': 'E.Id_edital', 'status': 'E.Status'}
+    categorias = ['status']
+    chave = 'id_edital'
+    origem = 'Edital E'
+
+    def total(self):
+        return 2
+
+    def total_paginas(self):
+        return 1
+
+    def pagina(self, numero):
+        df = pd.DataFrame({'id_edital': [1, 2], 'status': ['Aberto', 'Aberto']})
+        return df.astype({'status': 'category'})
+
+
+def _editar(grid, coluna, linha, valor):
+    """O que o Tabulator faz ao receber a célula editada no navegador."""
+    valores = grid.value[coluna].to_numpy(dtype=object, copy=True)
+    valores[linha] = valor
+    grid._update_column(coluna, np.array(valores, dtype=object))
+
+
+def test_editar_categoria_com_valor_fora_da_pagina():
+    tabela = TabelaPaginada(FonteFixa())
+    tabela.ir_para(1)
+    edicao = EdicaoEmLote(tabela, repositorio=None, colunas={'status': 'Status'})
+    edicao.modo.value = True
+
+    _editar(tabela.tabela, 'status', 0, 'Encerrado')
+
+    assert list(tabela.tabela.value['status']) == ['Encerrado', 'Aberto']
+
+
+def test_pagina_nova_no_modo_de_edicao_aceita_valor_fora_da_pagina():
+    tabela = TabelaPaginada(FonteFixa())
+    edicao = EdicaoEmLote(tabela, repositorio=None, colunas={'status': 'Status'})
+    edicao.modo.value = True
+    tabela.ir_para(1)
+
+    _editar(tabela.tabela, 'status', 1, 'Encerrado')
+
+    assert list(tabela.tabela.value['status']) == ['Aberto', 'Encerrado']
@@ -0,0 +1,80 @@
+import pandas as pd
+import panel as pn
+
+from indicadores import MESES_PAGAMENTOS, TEMPO_CACHE, carregar_painel
+from metricas import cronometrado
+from tarefas import em_segundo_plano
+
+# --- Configuração Inicial ---
+pn.extension('tabulator', notifications=True)
+
+# --- Widgets ---
+tabela_programas = pn.widgets.Tabulator(
+    pd.DataFrame(), show_index=False, disabled=True, sizing_mode='stretch_width',
+    titles={
+        'id_programa': 'ID', 'nome_programa': 'Programa', 'editais_abertos': 'Editais abertos',
+        'inscricoes': 'Inscrições', 'vagas_ocupadas': 'Vagas ocupadas', 'vagas': 'Vagas',
+        'vagas_livres': 'Vagas livres',
+    },
+)
+tabela_pagamentos = pn.widgets.Tabulator(
+    pd.DataFrame(), show_index=False, disabled=True, sizing_mode='stretch_width',
+    titles={'id_programa': 'ID', 'nome_programa': 'Programa'},
+)
+total_inscricoes = pn.indicators.Number(name='Inscrições', value=0, format='{value:,.0f}', font_size='28pt')
+total_ocupadas = pn.indicators.Number(name='Vagas ocupadas', value=0, format='{value:,.0f}', font_size='28pt')
+total_pago = pn.indicators.Number(name=f'Pago ({MESES_PAGAMENTOS} meses)', value=0,
+                                  format='R$ {value:,.2f}', font_size='28pt')
+info = pn.pane.Markdown("Carregando...", margin=(5, 10))
+btn_atualizar = pn.widgets.Button(name='🔄 Atualizar', button_type='primary')
+
+
+@cronometrado('visao_geral.atualizar')
+async def atualizar(event=None):
+    # Clique no botão (event) recalcula no banco; ao abrir a tela, vale o cache
+    tabela_programas.loading = tabela_pagamentos.loading = True
+    try:
+        resumo, pagamentos, calculado_em = await em_segundo_plano(carregar_painel, recalcular=event is not None)
+    except Exception as e:
+        pn.state.notifications.error(f'Erro ao carregar o painel: {str(e)}')
+        info.object = f"Erro: {str(e)}"
+        return
+    finally:
+        tabela_programas.loading = tabela_pagamentos.loading = False
+
+    tabela_programas.value = resumo
+    tabela_pagamentos.value = pagamentos
+    total_inscricoes.value = int(resumo['inscricoes'].sum())
+    total_ocupadas.value = int(resumo['vagas_ocupadas'].sum())
+    total_pago.value = float(pagamentos.drop(columns=['id_programa', 'nome_programa']).to_numpy().sum()) if len(pagamentos) else 0.0
+    info.object = (f"Calculado às {calculado_em:%H:%M:%S}; "
+                   f"os números são recalculados a cada {TEMPO_CACHE // 60} minutos ou em 🔄 Atualizar.")
+
+btn_atualizar.on_click(atualizar)
+pn.state.onload(atualizar)
+
+# --- Layout ---
+template = pn.template.FastListTemplate(
+    title='📊 Visão Geral dos Programas',
+    sidebar=[
+        pn.pane.Markdown("### Indicadores"),
+        total_inscricoes,
+        total_ocupadas,
+        total_pago,
+        pn.layout.Divider(),
+        btn_atualizar,
+        info,
+    ],
+    main=[
+        pn.pane.Markdown("### Por programa"),
+        tabela_programas,
+        pn.pane.Markdown(f"### Valor pago por mês (últimos {MESES_PAGAMENTOS} meses)"),
+        tabela_pagamentos,
+    ],
+    accent_base_color="#3F51B5",
+    header_background="#3F51B5",
+)
+
+# `panel serve visao_geral.py` serve a tela sozinha; em principal.py ela entra como uma das rotas
+if __name__.startswith('bokeh_app_'):
+    template.servable()